@@ -1,4 +1,6 @@
 # coding= utf-8
+import asyncio
+import contextlib
 import threading
 from motor_controller.interface import *
 
@@ -11,9 +13,22 @@ def MCC2SerialConnector(port: str, timeout: float = 0.2, baudrate: float = 11520
     return SerialConnector(port=port, beg_symbol=b'\x02', end_symbol=b'\x03', timeout=timeout, baudrate=baudrate)
 
 
-class MCC2Communicator(ContrCommunicator):
-    """Diese Klasse beschreibt die Sprache, die man braucht, um mit MCC2 Controller zu kommunizieren.
-    Hier sind alle MCC2-spezifische Eigenschaften zusammen gesammelt"""
+# noinspection PyPep8Naming
+def MCC2AsyncSerialConnector(port: str, timeout: float = 0.2, baudrate: float = 115200) -> AsyncSerialConnector:
+    return AsyncSerialConnector(port=port, beg_symbol=b'\x02', end_symbol=b'\x03', timeout=timeout,
+                                baudrate=baudrate)
+
+
+def probe_order(known_buses: Union[Iterable[int], None]) -> List[int]:
+    """Gibt alle 16 Bus-Nummern zurück, die bekannten zuerst."""
+
+    known = list(known_buses or ())
+    return known + [bus for bus in range(16) if bus not in known]
+
+
+class MCC2Protocol:
+    """Die Befehle des MCC2 und die Auswertung seiner Antworten, gemeinsam für MCC2Communicator
+    und AsyncMCC2Communicator. Die beiden Communicators unterscheiden sich nur im Schicken und Lesen."""
 
     # Dict, der für jeder Parameter dazugehöriger Nummer ausgibt.
     PARAMETER_NUMBER = {'Lauffrequenz': 14, 'Stoppstrom': 40, 'Laufstrom': 41, 'Booststrom': 42, 'Initiatortyp': 27,
@@ -31,105 +46,342 @@ class MCC2Communicator(ContrCommunicator):
 
     tolerance = 1.1  # Für MCC2 akzeptabele Abweichung bei Positionierung der Motoren (in Controller Einheiten)
     calibration_shift = 500000
+    probe_latency = 0.005  # s, bis ein Controller auf eine Abfrage beim Absuchen zu antworten beginnt
+    probe_reply_size = 64  # Zeichen, länger ist keine Antwort beim Absuchen
+
+    # Befehle ohne Argumente
+    _STOP = b'S'
+    _POSITION = b'P20R'
+    _STAND = b'=H'
+    _AT_THE_BEG = b'=I-'
+    _AT_THE_END = b'=I+'
+    _VERSION = b'IVR'
+    _N_AXES = b'IAR'
+
+    connector: Union[Connector, AsyncConnector]
+
+    @staticmethod
+    def _go_command(shift: float) -> bytes:
+        return str(shift).encode()
+
+    @staticmethod
+    def _go_to_command(destination: float) -> bytes:
+        return f"A{destination}".encode()
+
+    @staticmethod
+    def _set_position_command(new_position: float) -> bytes:
+        return f"P20S{new_position}".encode()
+
+    @classmethod
+    def _parameter_command(cls, parameter_name: str, neu_value: float = None) -> bytes:
+        """Gibt den Befehl zurück, der den Parameter liest (neu_value ist None) oder ändert."""
+
+        if parameter_name not in cls.PARAMETER_NUMBER.keys():
+            raise ValueError(f'Falscher Name des Parameters: "{parameter_name}"')
+
+        param_number = cls.PARAMETER_NUMBER[parameter_name]
+        if neu_value is None:
+            return f"P{param_number}R".encode()
+        return f"P{param_number}S{neu_value}".encode()
+
+    @classmethod
+    def _address(cls, command: bytes, bus: int, axis: int = None) -> bytes:
+        """Adressiert den Befehl an den Controller bus und, wenn angegeben, an die Achse axis."""
+
+        prefix = cls._contr_prefix(bus)
+        if axis is not None:
+            prefix += cls._axis_prefix(axis)
+        return prefix + command
+
+    @staticmethod
+    def _parse_reply(reply: Union[bytes, None]) -> (bool, Union[bytes, None]):
+        """Wandelt die vom Connector gelesene Nachricht in das Format (Quittung, Daten) um."""
+
+        if reply is None:
+            return None, None
+        elif reply[:1] == b'\x06':
+            return True, reply[1:]
+        elif reply == b'\x15':
+            return False, None
+        else:
+            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}')
+
+    @staticmethod
+    def _bus_check_result(reply: Tuple[bool, Union[bytes, None]]) -> (bool, str):
+        """Wertet die Antwort auf den Versionsbefehl für bus_check aus."""
+
+        if reply[0] is None:
+            return False, None
+        elif reply[0] is False:
+            return False, f'Unerwartete Antwort vom Controller: {reply[1]}!'
+        elif reply[1][0:3] == b'MCC':
+            return True, reply[1]
+        else:
+            return False, reply[1]
+
+    @classmethod
+    def _axes_from_reply(cls, reply: Tuple[bool, Union[bytes, None]]) -> Tuple[int]:
+        n_axes = int(cls._transform_float_reply(reply))
+        return tuple(range(1, n_axes+1))
+
+    @classmethod
+    def _found_buses(cls, checks: List[Tuple[bool, str]]) -> List[int]:
+        """Gibt die Bus-Nummern zurück, bei denen bus_check einen Controller gefunden hat."""
+
+        for bus, check in enumerate(checks):
+            if not check[0]:
+                cls._log_missing_bus(bus, check)
+        return [bus for bus, check in enumerate(checks) if check[0]]
+
+    @staticmethod
+    def _log_missing_bus(bus: int, check: (bool, str)):
+        logging.info(f'Bei Bus Nummer {bus} keinen Kontroller gefunden. Controller Antwort:{check[1]}')
+
+    @property
+    def probe_timeout(self) -> float:
+        """Time-out (s) beim Absuchen der Bus-Nummern: probe_latency und die Übertragung der längsten Antwort
+        (10 Bit pro Zeichen) bei der Baudrate des Connectors."""
+
+        baudrate = getattr(self.connector, 'baudrate', None) or 115200
+        return self.probe_latency + self.probe_reply_size * 10 / baudrate
+
+    @staticmethod
+    def _suspect_buses(answered: List[bool]) -> List[int]:
+        """Gibt die Bus-Nummern zurück, deren Ergebnis beim schnellen Absuchen falsch sein kann.
+
+        Antwortet ein Controller erst nach probe_timeout, wird seine Antwort bei einer der nächsten Bus-Nummern
+        gelesen, und jede weitere Antwort verschiebt sich bis zum nächsten Time-out. Unsicher sind deswegen
+        die Antworten nach einem Time-out und die Time-outs unmittelbar davor."""
+
+        suspects, timeouts, shifted = [], [], False
+        for bus, bus_answered in enumerate(answered):
+            if not bus_answered:
+                timeouts.append(bus)
+                shifted = False
+                continue
+            if timeouts:
+                suspects += timeouts
+                timeouts = []
+                shifted = True
+            if shifted:
+                suspects.append(bus)
+        return suspects
+
+    @contextlib.contextmanager
+    def _probing(self):
+        """Innerhalb des with-Blocks wartet der Connector höchstens probe_timeout auf eine Antwort."""
+
+        timeout = self.connector.get_timeout()
+        self.connector.set_timeout(min(timeout, self.probe_timeout))
+        try:
+            yield
+        finally:
+            self.connector.set_timeout(timeout)
+
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        """Schätzt die Fahrzeit (in s) für die Strecke distance (in Controller Einheiten) anhand der
+        Lauffrequenz (Schritte/s). Die Rampen werden nicht berücksichtigt."""
+
+        frequency = parameters.get('Lauffrequenz')
+        units_per_step = parameters.get('Umrechnungsfaktor(Contr)')
+        if not frequency or not units_per_step:
+            return None
+        return abs(distance / units_per_step) / frequency
+
+    # TODO schreiben check_raw_input_data zu Ende
+    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
+        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
+
+        for motor_line in raw_input_data:
+            init_status = motor_line['Mit Initiatoren(0/1)']
+            message = f'"Mit Initiatoren" muss 0 oder 1 sein, und kein "{init_status}"'
+            if init_status != '':
+                try:
+                    init_status = bool(int(motor_line['Mit Initiatoren(0/1)']))
+                except ValueError:
+                    return False, message
+                if init_status not in (0, 1):
+                    return False, message
+
+            units_per_step = motor_line['Umrechnungsfaktor']
+            message = f'"Einheiten pro Schritt" muss ein float Wert haben, und kein "{units_per_step}"'
+            if units_per_step != '':
+                try:
+                    float(motor_line['Mit Initiatoren(0/1)'])
+                except ValueError:
+                    return False, message
+
+        return True, ""
+
+    @staticmethod
+    def _check_command_result(reply: Tuple[bool, Union[bytes, None]]):
+        """Prüft die Antwort vom Controller für ein Befehl ohne erwartete Antwort."""
+
+        if reply[0] is None:
+            raise NoReplyError('Der Controller antwortet nicht!')
+        elif reply[0] is False:
+            raise ControllerError('Controller hat den Befehl negativ quittiert!')
+        elif reply[0] is True:
+            if reply[1]:
+                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}!')
+
+    @staticmethod
+    def _transform_float_reply(reply: Tuple[bool, Union[bytes, None]]) -> float:
+        """Prüft die Antwort vom Controller und kriegt die enthaltene Fließkommazahl heraus.
+        """
+
+        if reply[0] is None:
+            raise NoReplyError('Der Controller antwortet nicht!')
+        elif reply[0] is False:
+            raise ControllerError('Controller hat den Befehl negativ quittiert!')
+        elif reply[0] is True:
+            try:
+                return float(reply[1])
+            except ValueError:
+                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+
+    @staticmethod
+    def _transform_bool_reply(reply: Tuple[bool, Union[bytes, None]]) -> bool:
+        """Prüft die Antwort vom Controller und kriegt den enthaltenen boll Wert heraus.
+        """
+
+        if reply[0] is None:
+            raise NoReplyError('Der Controller antwortet nicht!')
+        elif reply[0] is False:
+            raise ControllerError('Controller hat den Befehl negativ quittiert!')
+        elif reply[1] == b'E':
+            return True
+        elif reply[1] == b'N':
+            return False
+        else:
+            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}')
 
-    def __init__(self, connector: Connector):
+    @staticmethod
+    def _contr_prefix(bus: int) -> bytes:
+        """Gibt ein Präfix zurück, das einen Befehl an den gewünschten Controller adressiert."""
+
+        if bus > 15 or bus < 0:
+            raise ValueError(f'bus muss ein Wert zwischen 0 und 15 haben und kein {bus}')
+        return f'{bus:x}'.encode()
+
+    @staticmethod
+    def _axis_prefix(axis: int) -> bytes:
+        """Gibt ein Teil des Präfixes zurück, das einen Befehl an die gewünschte Achse adressiert."""
+
+        if axis > 9 or axis < 0:
+            raise ValueError(f'axis muss ein Wert zwischen 0 und 9 haben und kein {axis}')
+        return str(axis).encode()
+
+
+class MCC2Communicator(MCC2Protocol, ContrCommunicator):
+    """Diese Klasse beschreibt die Sprache, die man braucht, um mit MCC2 Controller zu kommunizieren.
+    Hier sind alle MCC2-spezifische Eigenschaften zusammen gesammelt"""
+
+    def __init__(self, connector: Connector, known_buses: Iterable[int] = None):
         self.connector = connector
+        # Die Bus-Nummern aus einer früheren Sitzung: sie werden bei bus_list nur bestätigt.
+        self.known_buses = None if known_buses is None else tuple(known_buses)
         self.__mutex = threading.Lock()
 
     def go(self, shift: float, bus: int, axis: int):
         """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
 
-        command = str(shift).encode()
-        self.command_without_reply(command, bus, axis)
+        self.command_without_reply(self._go_command(shift), bus, axis)
 
     def go_to(self, destination: float, bus: int, axis: int):
         """Schickt den angegeben Motor zur angegebene absolute Position."""
 
-        command = f"A{destination}".encode()
-        self.command_without_reply(command, bus, axis)
+        self.command_without_reply(self._go_to_command(destination), bus, axis)
 
     def stop(self, bus: int, axis: int):
         """Stoppt den angegebenen Motor."""
 
-        command = b"S"
-        self.command_without_reply(command, bus, axis)
+        self.command_without_reply(self._STOP, bus, axis)
+
+    def stop_motors(self, coords: List[Tuple[int, int]]):
+        """Stoppt alle Motoren aus der Liste [(bus, Achse), …] mit einem einzigen Schreibvorgang."""
+
+        for reply in self.execute_many([(self._STOP, bus, axis) for bus, axis in coords]):
+            self._check_command_result(reply)
 
     def get_position(self, bus: int, axis: int) -> float:
         """Gibt die Position des angegebenen Motors zurück."""
 
-        command = b"P20R"
-        return self.command_with_float_reply(command, bus, axis)
+        return self.command_with_float_reply(self._POSITION, bus, axis)
+
+    def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] zurück.
+        Alle Abfragen werden auf einmal geschickt."""
+
+        replies = self.execute_many([(self._POSITION, bus, axis) for bus, axis in coords])
+        return list(map(self._transform_float_reply, replies))
 
     def set_position(self, new_position: float, bus: int, axis: int):
         """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
 
-        command = f"P20S{new_position}".encode()
-        self.command_without_reply(command, bus, axis)
+        self.command_without_reply(self._set_position_command(new_position), bus, axis)
 
     def get_parameter(self, parameter_name: str, bus: int, axis: int) -> float:
         """Liest den Wert des angegebenen Parameters."""
 
-        if parameter_name not in self.PARAMETER_NUMBER.keys():
-            raise ValueError(f'Falscher Name des Parameters: "{parameter_name}"')
-
-        param_number = self.PARAMETER_NUMBER[parameter_name]
-        command = f"P{param_number}R".encode()
-        return self.command_with_float_reply(command, bus, axis)
+        return self.command_with_float_reply(self._parameter_command(parameter_name), bus, axis)
 
     def set_parameter(self, parameter_name: str, neu_value: float, bus: int, axis: int):
         """Ändert den Wert des angegebenen Parameters."""
 
-        if parameter_name not in self.PARAMETER_NUMBER.keys():
-            raise ValueError(f'Falscher Name des Parameters: "{parameter_name}"')
-
-        param_number = self.PARAMETER_NUMBER[parameter_name]
-        command = f"P{param_number}S{neu_value}".encode()
-        self.command_without_reply(command, bus, axis)
+        self.command_without_reply(self._parameter_command(parameter_name, neu_value), bus, axis)
 
     def motor_stand(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
 
-        command = b'=H'
-        return self.command_with_bool_reply(command, bus, axis)
+        return self.command_with_bool_reply(self._STAND, bus, axis)
+
+    def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …], ob er im Moment steht(True) oder fährt(False).
+        Alle Abfragen werden auf einmal geschickt."""
+
+        replies = self.execute_many([(self._STAND, bus, axis) for bus, axis in coords])
+        return list(map(self._transform_bool_reply, replies))
 
     def motor_at_the_beg(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
 
-        command = b'=I-'
-        return self.command_with_bool_reply(command, bus, axis)
+        return self.command_with_bool_reply(self._AT_THE_BEG, bus, axis)
 
     def motor_at_the_end(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der End-Initiator im Moment aktiviert ist."""
 
-        command = b'=I+'
-        return self.command_with_bool_reply(command, bus, axis)
+        return self.command_with_bool_reply(self._AT_THE_END, bus, axis)
 
     def read_reply(self) -> (bool, Union[bytes, None]):
         """Antwort lesen, der nach einem Befehl erscheint."""
 
-        reply = self.connector.read()
-        if reply is None:
-            return None, None
-        elif reply[:1] == b'\x06':
-            return True, reply[1:]
-        elif reply == b'\x15':
-            return False, None
-        else:
-            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}')
+        return self._parse_reply(self.connector.read())
 
     def bus_list(self) -> Tuple[int]:
-        """Gibt die Liste der allen verfügbaren Bus-Nummern zurück."""
+        """Gibt die Liste der allen verfügbaren Bus-Nummern zurück.
 
-        bus_list = []
-        for i in range(16):
-            for j in range(2):
-                check = self.bus_check(i)
-                if check[0]:
-                    bus_list.append(i)
-                    break
-            # noinspection PyUnboundLocalVariable
-            if not check[0]:
-                logging.warning(f'Bei Bus Nummer {i} keinen Kontroller gefunden. Controller Antwort:{check[1]}')
+        Sind known_buses angegeben, werden nur diese (mit probe_timeout) bestätigt. Sonst wird jede Bus-Nummer
+        einmal mit probe_timeout abgefragt; die Bus-Nummern, bei denen eine verspätete Antwort das Ergebnis
+        verfälscht haben kann (s. _suspect_buses), werden danach mit dem vollen Time-out des Connectors
+        noch einmal abgefragt. Wurde so kein Controller gefunden, wird alles mit dem vollen Time-out abgesucht.
+        """
+
+        if self.known_buses is not None:
+            with self._probing():
+                confirmed = all(self.bus_check(bus)[0] for bus in self.known_buses)
+            if confirmed and self.known_buses:
+                return self.known_buses
+            logging.warning(f'Die Controller {self.known_buses} wurden nicht alle bestätigt, '
+                            f'der Bus wird neu abgesucht.')
+
+        with self._probing():
+            checks = [self.bus_check(bus) for bus in range(16)]
+        for bus in self._suspect_buses([check[0] for check in checks]):
+            checks[bus] = self.bus_check(bus)
+        if not any(check[0] for check in checks):
+            checks = [self.bus_check(bus) for bus in range(16)]
+        bus_list = self._found_buses(checks)
         if not bus_list:
             raise SerialError("Es wurde keine Controller gefunden!")
         return tuple(bus_list)
@@ -137,18 +389,16 @@ class MCC2Communicator(ContrCommunicator):
     def axes_list(self, bus: int) -> Tuple[int]:
         """Gibt die Liste der allen verfügbaren Achsen zurück."""
 
-        command = b"IAR"
-        n_axes = int(self.command_with_float_reply(command, bus))
-        return tuple(range(1, n_axes+1))
+        return self._axes_from_reply(self.command(self._N_AXES, bus))
 
     def check_connection(self) -> (bool, bytes):
-        """Prüft ob es bei dem Com-Port tatsächlich ein Controller gibt, und gibt die Version davon zurück."""
+        """Prüft ob es bei dem Com-Port tatsächlich ein Controller gibt, und gibt die Version davon zurück.
+        Jede Bus-Nummer wird einmal mit probe_timeout abgefragt, die bekannten zuerst."""
 
-        check = False
-        for i in range(16):
-            for j in range(4):
+        check = False, None
+        with self._probing():
+            for i in probe_order(self.known_buses):
                 check = self.bus_check(i)
-                # print(check)
                 if check[0]:
                     return check
         return check
@@ -164,153 +414,253 @@ class MCC2Communicator(ContrCommunicator):
     def command_to_modul(self, command: bytes, bus: int) -> (bool, Union[bytes, None]):
         """Ausführt ein zum Modul adressierte Befehl und gibt die Antwort zurück."""
 
-        command = self.__contr_prefix(bus) + command
-        return self.command_to_box(command)
+        return self.command_to_box(self._address(command, bus))
 
     def command_to_motor(self, command: bytes, bus: int, axis: int) -> (bool, Union[bytes, None]):
         """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
 
-        command = self.__axis_prefix(axis) + command
-        return self.command_to_modul(command, bus)
+        return self.command_to_box(self._address(command, bus, axis))
 
     def command(self, command: bytes, bus: int, axis: int = None) -> (bool, Union[bytes, None]):
         """Ausführt ein Befehl für Motor oder für Controller und gibt die Antwort zurück."""
 
-        if axis is None:
-            return self.command_to_modul(command, bus)
-        else:
-            return self.command_to_motor(command, bus, axis)
+        return self.command_to_box(self._address(command, bus, axis))
 
-    # TODO schreiben check_raw_input_data zu Ende
-    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
-        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
+    def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Schickt mehrere Befehle im Format [(Befehl, Bus, Achse), …] mit einem einzigen Schreibvorgang
+        und liest danach die Antworten in derselben Reihenfolge.
 
-        for motor_line in raw_input_data:
-            init_status = motor_line['Mit Initiatoren(0/1)']
-            message = f'"Mit Initiatoren" muss 0 oder 1 sein, und kein "{init_status}"'
-            if init_status != '':
-                try:
-                    init_status = bool(int(motor_line['Mit Initiatoren(0/1)']))
-                except ValueError:
-                    return False, message
-                if init_status not in (0, 1):
-                    return False, message
-
-            units_per_step = motor_line['Umrechnungsfaktor']
-            message = f'"Einheiten pro Schritt" muss ein float Wert haben, und kein "{units_per_step}"'
-            if units_per_step != '':
-                try:
-                    float(motor_line['Mit Initiatoren(0/1)'])
-                except ValueError:
-                    return False, message
+        Die Antworten werden nur nach der Reihenfolge zugeordnet, deswegen sollen alle adressierte Module
+        vorhanden sein. Ein Modul, das nicht antwortet, verschiebt die Zuordnung der folgenden Antworten.
+        """
 
-        return True, ""
+        messages = [self._address(command, bus, axis) for command, bus, axis in commands]
+        with self.__mutex:
+            self.connector.send_many(messages)
+            replies = [self.read_reply() for _ in messages]
+        return replies
 
     def bus_check(self, bus: int) -> (bool, str):
         """Prüft ob es bei dem Bus-Nummer ein Controller gibt, und gibt die Version davon zurück."""
 
         try:
-            command = b"IVR"
-            reply = self.command_to_modul(command, bus)
+            reply = self.command_to_modul(self._VERSION, bus)
         except ReplyError as err:
             logging.error(str(err))
             return False, str(err)
-
-        if reply[0] is None:
-            return False, None
-        elif reply[0] is False:
-            return False, f'Unerwartete Antwort vom Controller: {reply[1]}!'
-        elif reply[1][0:3] == b'MCC':
-            return True, reply[1]
-        else:
-            return False, reply[1]
+        return self._bus_check_result(reply)
 
     def command_with_float_reply(self, command: bytes, bus: int, axis: int = None) -> float:
         """Ausführt ein Befehl mit einer erwarteten Fließkommazahl-Antwort
         und gibt die erhaltene Fließkommazahl zurück.
         """
 
-        reply = self.command(command, bus, axis)
-        return self.__transform_float_reply(reply)
+        return self._transform_float_reply(self.command(command, bus, axis))
 
     def command_with_bool_reply(self, command: bytes, bus: int, axis: int = None) -> bool:
         """Ausführt ein Befehl mit einer erwarteten bool Antwort
         und gibt den erhaltenen bool Wert zurück.
         """
 
-        reply = self.command(command, bus, axis)
-        return self.__transform_bool_reply(reply)
+        return self._transform_bool_reply(self.command(command, bus, axis))
 
     def command_without_reply(self, command: bytes, bus: int, axis: int = None):
         """Ausführt ein Befehl ohne erwartete Antwort."""
 
-        reply = self.command(command, bus, axis)
-        self.__check_command_result(reply)
+        self._check_command_result(self.command(command, bus, axis))
 
-    @staticmethod
-    def __check_command_result(reply: Tuple[bool, Union[bytes, None]]):
-        """Prüft die Antwort vom Controller für ein Befehl ohne erwartete Antwort."""
 
-        if reply[0] is None:
-            raise NoReplyError('Der Controller antwortet nicht!')
-        elif reply[0] is False:
-            raise ControllerError('Controller hat den Befehl negativ quittiert!')
-        elif reply[0] is True:
-            if reply[1]:
-                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}!')
+class AsyncMCC2Communicator(MCC2Protocol, AsyncContrCommunicator):
+    """Asynchrone Version von MCC2Communicator. Die Befehle und die Auswertung der Antworten
+    kommen aus MCC2Protocol, nur wird auf die Antworten in der Ereignisschleife gewartet."""
 
-    @staticmethod
-    def __transform_float_reply(reply: Tuple[bool, Union[bytes, None]]) -> float:
-        """Prüft die Antwort vom Controller und kriegt die enthaltene Fließkommazahl heraus.
+    def __init__(self, connector: AsyncConnector, known_buses: Iterable[int] = None):
+        self.connector = connector
+        self.known_buses = None if known_buses is None else tuple(known_buses)
+        self.__mutex = asyncio.Lock()
+
+    async def go(self, shift: float, bus: int, axis: int):
+        """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
+
+        await self.command_without_reply(self._go_command(shift), bus, axis)
+
+    async def go_to(self, destination: float, bus: int, axis: int):
+        """Schickt den angegeben Motor zur angegebene absolute Position."""
+
+        await self.command_without_reply(self._go_to_command(destination), bus, axis)
+
+    async def stop(self, bus: int, axis: int):
+        """Stoppt den angegebenen Motor."""
+
+        await self.command_without_reply(self._STOP, bus, axis)
+
+    async def stop_motors(self, coords: List[Tuple[int, int]]):
+        """Stoppt alle Motoren aus der Liste [(bus, Achse), …] mit einem einzigen Schreibvorgang."""
+
+        for reply in await self.execute_many([(self._STOP, bus, axis) for bus, axis in coords]):
+            self._check_command_result(reply)
+
+    async def get_position(self, bus: int, axis: int) -> float:
+        """Gibt die Position des angegebenen Motors zurück."""
+
+        return await self.command_with_float_reply(self._POSITION, bus, axis)
+
+    async def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] zurück.
+        Alle Abfragen werden auf einmal geschickt."""
+
+        replies = await self.execute_many([(self._POSITION, bus, axis) for bus, axis in coords])
+        return list(map(self._transform_float_reply, replies))
+
+    async def set_position(self, new_position: float, bus: int, axis: int):
+        """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
+
+        await self.command_without_reply(self._set_position_command(new_position), bus, axis)
+
+    async def get_parameter(self, parameter_name: str, bus: int, axis: int) -> float:
+        """Liest den Wert des angegebenen Parameters."""
+
+        return await self.command_with_float_reply(self._parameter_command(parameter_name), bus, axis)
+
+    async def set_parameter(self, parameter_name: str, neu_value: float, bus: int, axis: int):
+        """Ändert den Wert des angegebenen Parameters."""
+
+        await self.command_without_reply(self._parameter_command(parameter_name, neu_value), bus, axis)
+
+    async def motor_stand(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
+
+        return await self.command_with_bool_reply(self._STAND, bus, axis)
+
+    async def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …], ob er im Moment steht(True) oder fährt(False).
+        Alle Abfragen werden auf einmal geschickt."""
+
+        replies = await self.execute_many([(self._STAND, bus, axis) for bus, axis in coords])
+        return list(map(self._transform_bool_reply, replies))
+
+    async def motor_at_the_beg(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
+
+        return await self.command_with_bool_reply(self._AT_THE_BEG, bus, axis)
+
+    async def motor_at_the_end(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der End-Initiator im Moment aktiviert ist."""
+
+        return await self.command_with_bool_reply(self._AT_THE_END, bus, axis)
+
+    async def bus_check(self, bus: int) -> (bool, str):
+        """Prüft ob es bei dem Bus-Nummer ein Controller gibt, und gibt die Version davon zurück."""
+
+        try:
+            reply = await self.command_to_modul(self._VERSION, bus)
+        except ReplyError as err:
+            logging.error(str(err))
+            return False, str(err)
+        return self._bus_check_result(reply)
+
+    async def bus_list(self) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Bus-Nummern zurück (s. MCC2Communicator.bus_list)."""
+
+        if self.known_buses is not None:
+            with self._probing():
+                confirmed = [(await self.bus_check(bus))[0] for bus in self.known_buses]
+            if all(confirmed) and self.known_buses:
+                return self.known_buses
+            logging.warning(f'Die Controller {self.known_buses} wurden nicht alle bestätigt, '
+                            f'der Bus wird neu abgesucht.')
+
+        with self._probing():
+            checks = [await self.bus_check(bus) for bus in range(16)]
+        for bus in self._suspect_buses([check[0] for check in checks]):
+            checks[bus] = await self.bus_check(bus)
+        if not any(check[0] for check in checks):
+            checks = [await self.bus_check(bus) for bus in range(16)]
+        bus_list = self._found_buses(checks)
+        if not bus_list:
+            raise SerialError("Es wurde keine Controller gefunden!")
+        return tuple(bus_list)
+
+    async def axes_list(self, bus: int) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Achsen zurück."""
+
+        return self._axes_from_reply(await self.command(self._N_AXES, bus))
+
+    async def check_connection(self) -> (bool, bytes):
+        """Prüft ob es bei dem Com-Port tatsächlich ein Controller gibt, und gibt die Version davon zurück."""
+
+        check = False, None
+        with self._probing():
+            for i in probe_order(self.known_buses):
+                check = await self.bus_check(i)
+                if check[0]:
+                    return check
+        return check
+
+    async def read_reply(self) -> (bool, Union[bytes, None]):
+        """Antwort lesen, der nach einem Befehl erscheint."""
+
+        return self._parse_reply(await self.connector.read())
+
+    async def command_to_box(self, command: bytes) -> (bool, Union[bytes, None]):
+        """Ausführt ein Befehl ohne Adressieren und gibt die Antwort zurück."""
+
+        async with self.__mutex:
+            await self.connector.send(command)
+            return await self.read_reply()
+
+    async def command_to_modul(self, command: bytes, bus: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Modul adressierte Befehl und gibt die Antwort zurück."""
+
+        return await self.command_to_box(self._address(command, bus))
+
+    async def command_to_motor(self, command: bytes, bus: int, axis: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
+
+        return await self.command_to_box(self._address(command, bus, axis))
+
+    async def command(self, command: bytes, bus: int, axis: int = None) -> (bool, Union[bytes, None]):
+        """Ausführt ein Befehl für Motor oder für Controller und gibt die Antwort zurück."""
+
+        return await self.command_to_box(self._address(command, bus, axis))
+
+    async def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Schickt mehrere Befehle im Format [(Befehl, Bus, Achse), …] mit einem einzigen Schreibvorgang
+        und liest danach die Antworten in derselben Reihenfolge (siehe MCC2Communicator.execute_many).
         """
 
-        if reply[0] is None:
-            raise NoReplyError('Der Controller antwortet nicht!')
-        elif reply[0] is False:
-            raise ControllerError('Controller hat den Befehl negativ quittiert!')
-        elif reply[0] is True:
-            try:
-                return float(reply[1])
-            except ValueError:
-                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+        messages = [self._address(command, bus, axis) for command, bus, axis in commands]
+        async with self.__mutex:
+            await self.connector.send_many(messages)
+            return [await self.read_reply() for _ in messages]
 
-    @staticmethod
-    def __transform_bool_reply(reply: Tuple[bool, Union[bytes, None]]) -> bool:
-        """Prüft die Antwort vom Controller und kriegt den enthaltenen boll Wert heraus.
+    async def command_with_float_reply(self, command: bytes, bus: int, axis: int = None) -> float:
+        """Ausführt ein Befehl mit einer erwarteten Fließkommazahl-Antwort
+        und gibt die erhaltene Fließkommazahl zurück.
         """
 
-        if reply[0] is None:
-            raise NoReplyError('Der Controller antwortet nicht!')
-        elif reply[0] is False:
-            raise ControllerError('Controller hat den Befehl negativ quittiert!')
-        elif reply[1] == b'E':
-            return True
-        elif reply[1] == b'N':
-            return False
-        else:
-            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply[1]}')
+        return self._transform_float_reply(await self.command(command, bus, axis))
 
-    @staticmethod
-    def __contr_prefix(bus: int) -> bytes:
-        """Gibt ein Präfix zurück, das einen Befehl an den gewünschten Controller adressiert."""
+    async def command_with_bool_reply(self, command: bytes, bus: int, axis: int = None) -> bool:
+        """Ausführt ein Befehl mit einer erwarteten bool Antwort
+        und gibt den erhaltenen bool Wert zurück.
+        """
 
-        if bus > 15 or bus < 0:
-            raise ValueError(f'bus muss ein Wert zwischen 0 und 15 haben und kein {bus}')
-        return f'{bus:x}'.encode()
+        return self._transform_bool_reply(await self.command(command, bus, axis))
 
-    @staticmethod
-    def __axis_prefix(axis: int) -> bytes:
-        """Gibt ein Teil des Präfixes zurück, das einen Befehl an die gewünschte Achse adressiert."""
+    async def command_without_reply(self, command: bytes, bus: int, axis: int = None):
+        """Ausführt ein Befehl ohne erwartete Antwort."""
 
-        if axis > 9 or axis < 0:
-            raise ValueError(f'axis muss ein Wert zwischen 0 und 9 haben und kein {axis}')
-        return str(axis).encode()
+        self._check_command_result(await self.command(command, bus, axis))
 
 
 # noinspection PyPep8Naming
-def MCC2BoxSerial(port: str, timeout: float = 0.2, baudrate: float = 115200, input_file: str = None) -> Box:
+def MCC2BoxSerial(port: str, timeout: float = 0.2, baudrate: float = 115200, input_file: str = None,
+                  known_buses: Iterable[int] = None) -> Box:
     connector = MCC2SerialConnector(port=port, timeout=timeout, baudrate=baudrate)
-    communicator = MCC2Communicator(connector)
+    communicator = MCC2Communicator(connector, known_buses)
     return Box(communicator=communicator, input_file=input_file)
 
 
@@ -339,6 +689,11 @@ class MCC2BoxEmulator(SerialEmulator, ContrCommunicator):
         self.buffer: bytes = b''
         self.last_command = b''
 
+    @property
+    def settle_time(self) -> float:
+        # Ohne realtime steht der Motor gleich nach dem Fahrbefehl am Ziel, es gibt nichts abzuwarten.
+        return ContrCommunicator.settle_time if self.realtime else 0.0
+
     def go(self, shift: float, bus: int, axis: int):
         """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
 
@@ -373,6 +728,12 @@ class MCC2BoxEmulator(SerialEmulator, ContrCommunicator):
     def motor_stand(self, bus: int, axis: int) -> bool:
         return self.__get_motor(bus, axis).stand()
 
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        # Ohne realtime fährt der Emulator ohne Verzögerung, dann gibt es nichts zu schätzen.
+        if not self.realtime:
+            return None
+        return MCC2Communicator.estimate_move_time(self, distance, parameters)
+
     def motor_at_the_beg(self, bus: int, axis: int) -> bool:
         return self.__get_motor(bus, axis).at_the_beg()
 
@@ -427,7 +788,28 @@ class MCC2BoxEmulator(SerialEmulator, ContrCommunicator):
                 time.sleep(self.timeout)
             return self.buffer
 
+    def read(self, size: int = 1) -> bytes:
+        if not self.buffer and self.realtime:
+            time.sleep(self.timeout)
+        answer, self.buffer = self.buffer[:size], self.buffer[size:]
+        return answer
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.buffer)
+
     def write(self, command: bytes):
+        """Liest, interpretiert und ausführt den angegebenen Befehl.
+        Mehrere auf einmal geschickte Befehle werden nacheinander ausgeführt.
+        """
+
+        if command.count(b'\x03') > 1:
+            for frame in command.split(b'\x03')[:-1]:
+                self.__execute(frame + b'\x03')
+        else:
+            self.__execute(command)
+
+    def __execute(self, command: bytes):
         """Liest, interpretiert und ausführt den angegebenen Befehl."""
         def read_axis_number(digit: str):
             if len(digit) > 1:
@@ -1,11 +1,14 @@
+import concurrent.futures
 import logging
+import queue
 import threading
 import time
 from copy import deepcopy
 from typing import Union, Dict, List, Tuple
 
 from motor_controller.interface.interface import ContrCommunicator, SerialConnector, Connector, ReplyError, \
-    NoReplyError, ControllerError, NotSupportedError, Box
+    NoReplyError, ControllerError, NotSupportedError, Box, trapezoid_move_time, SerialEmulator, StatusPoller, \
+    CompletionWatcher, ConnectError
 
 import logscolor
 
@@ -68,17 +71,61 @@ def decode_error(er_code: int):
         return f'Unknown error code "{er_code}"'
 
 
+def completed_channel(reply: bytes) -> Union[int, None]:
+    """Gibt den Kanal einer Meldung über das Ende einer Bewegung ('C<Kanal>') zurück,
+    oder None, wenn die Antwort keine solche Meldung ist."""
+
+    if reply[:1] == b'C' and reply[1:].isdigit():
+        return int(reply[1:])
+    return None
+
+
 def MCS_SerialConnector(port: str, timeout: float = 0.2, baudrate: float = 115200) -> SerialConnector:
     return SerialConnector(port=port, beg_symbol=b':', end_symbol=b'\n', timeout=timeout, baudrate=baudrate)
 
 
-def MCSBoxSerial(port: str, timeout: float = 0.2, baudrate: float = 115200, input_file: str = None) -> Box:
+def MCSBoxSerial(port: str, timeout: float = 0.2, baudrate: float = 115200, input_file: str = None,
+                 asynchronous: bool = False) -> Box:
     connector = MCS_SerialConnector(port=port, timeout=timeout, baudrate=baudrate)
-    communicator = MCSCommunicator(connector)
+    communicator = MCSCommunicator(connector, asynchronous)
     return Box(communicator=communicator, input_file=input_file)
 
 
+class MCSCompletionWatcher(CompletionWatcher):
+    """Wartet auf den Stop der Achsen anhand der Meldungen 'C<Kanal>', die der Controller im asynchronen
+    Modus am Ende jeder Bewegung schickt, statt den Status (GS) regelmäßig abzufragen (s. CompletionWatcher).
+
+    Die Abfrage nach einer Meldung läuft in einem eigenen Thread, weil der Lese-Thread
+    des Communicators, der die Meldung übergibt, nicht auf eine Antwort warten kann.
+    """
+
+    def __init__(self, communicator: 'MCSCommunicator'):
+        super().__init__(communicator)
+        self.__executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='MCSCompletionWatcher')
+
+    def completed(self, channel: int):
+        """Wird vom Lese-Thread des Communicators für jede Meldung 'C<Kanal>' aufgerufen."""
+
+        coord = (0, channel)
+        if self._completed(coord):
+            self.__executor.submit(self._check, [coord])
+
+    def close(self):
+        """Beendet den Thread für die Abfragen nach den Meldungen."""
+
+        self.__executor.shutdown()
+
+
 class MCSCommunicator(ContrCommunicator):
+    """Communicator für SmarAct MCS.
+
+    Im synchronen Modus (SCM0) folgt auf jeden Befehl genau eine Antwort, und auf den Stop wird
+    durch Abfragen des Status (GS) gewartet. Mit asynchronous=True wird der asynchrone Modus (SCM1)
+    eingestellt und für alle Kanäle die Meldung am Ende der Bewegung eingeschaltet (SRC). Ein eigener
+    Lese-Thread liest dann alles, was vom Controller kommt: die Meldungen 'C<Kanal>' gehen an den
+    MCSCompletionWatcher, alle anderen sind Antworten auf die Befehle und werden in derselben Reihenfolge
+    an die Befehle übergeben. Die Leitung bleibt während der Bewegung frei, z.B. für Abfragen der Position.
+    """
 
     tolerance = 30*10**3  # Für MCS akzeptabele Abweichung bei Positionierung der Motoren (in Controller Einheiten: nm)
     calibration_shift = 500 * 10**6
@@ -87,22 +134,39 @@ class MCSCommunicator(ContrCommunicator):
     PARAMETER_DEFAULT = {'Sensor Type': 1, 'max Frequency': 5000, 'max move Speed': 0}
     PARAMETER_COMMAND = {'Sensor Type': b'ST', 'max Frequency': b'CLF', 'max move Speed': b'CLS'}
 
-    def __init__(self, connector: Connector):
+    def __init__(self, connector: Connector, asynchronous: bool = False):
         self.connector = connector
+        self.asynchronous = False
         self.__mutex = threading.Lock()
+        self.__replies: queue.Queue = queue.Queue()
+        self.__reader: Union[threading.Thread, None] = None
+        self.__closing = False
+        self.__watcher: Union[MCSCompletionWatcher, None] = None
 
-        self.__set_sync_communication_mode()
+        if asynchronous:
+            self.__set_async_communication_mode()
+        else:
+            self.__set_sync_communication_mode()
 
         self.__axen_list = []
         self.__get_axen_list()
 
+        if asynchronous:
+            for axis in self.cached_axes_list(0):
+                self.command_with_proof_reply(f'SRC{axis},1'.encode())
+
     def __get_axen_list(self):
         """Liest wie viel Achsen jeder Modul hat,
         und sichert dieser Information für weitere berechnung der Nummern von Chennels.
         """
         self.__axen_list = []
-        for bus in self.bus_list():
-            self.__axen_list.append(len(self.axes_list(bus)))
+        for bus in self.cached_bus_list():
+            self.__axen_list.append(len(self.cached_axes_list(bus)))
+
+    def invalidate_topology(self):
+        """Vergisst die gespeicherte Topologie und liest die Achsenzahlen für die Kanalnummern neu."""
+        super().invalidate_topology()
+        self.__get_axen_list()
 
     def __ch_n(self, bus: int, axis: int) -> int:
         return sum(self.__axen_list[:bus]) + axis
@@ -110,6 +174,70 @@ class MCSCommunicator(ContrCommunicator):
     def __set_sync_communication_mode(self):
         self.command_with_proof_reply(b'SCM0')
 
+    def __set_async_communication_mode(self):
+        self.command_with_proof_reply(b'SCM1')
+        self.__watcher = MCSCompletionWatcher(self)
+        self.asynchronous = True
+        self.__reader = threading.Thread(target=self.__read_loop, name='MCSReader', daemon=True)
+        self.__reader.start()
+
+    def __read_loop(self):
+        """Lese-Thread des asynchronen Modus."""
+
+        while not self.__closing:
+            try:
+                reply = self.connector.read()
+            except ReplyError as err:
+                logging.warning(f'MCS: {err}')
+                continue
+            except Exception as err:
+                if not self.__closing:
+                    logging.error(f'MCS: Der Lese-Thread wurde beendet: {err}')
+                    self.__watcher.fail_all(err)
+                return
+            if reply is None:
+                continue
+            channel = completed_channel(reply)
+            if channel is None:
+                self.__replies.put(reply)
+            else:
+                self.__watcher.completed(channel)
+
+    def __send(self, commands: List[bytes]):
+        if not self.asynchronous:
+            self.connector.send_many(commands)
+            return
+        # verspätete Antworten auf frühere Befehle verwerfen, der Buffer gehört dem Lese-Thread
+        while not self.__replies.empty():
+            self.__replies.get_nowait()
+        self.connector.send_many(commands, clear_buffer=False)
+
+    def __read(self) -> Union[bytes, None]:
+        if not self.asynchronous:
+            return self.connector.read()
+        try:
+            return self.__replies.get(timeout=self.connector.get_timeout())
+        except queue.Empty:
+            return None
+
+    def status_poller(self) -> Union[MCSCompletionWatcher, StatusPoller]:
+        """Im asynchronen Modus der MCSCompletionWatcher, sonst der StatusPoller."""
+
+        if self.__watcher is None:
+            return super().status_poller()
+        return self.__watcher
+
+    def close(self):
+        """Beendet den Lese-Thread des asynchronen Modus. Wer noch auf den Stop wartet, bekommt ConnectError."""
+
+        self.__closing = True
+        if self.__reader is not None:
+            self.__reader.join()
+            self.__reader = None
+        if self.__watcher is not None:
+            self.__watcher.fail_all(ConnectError('Die Verbindung zum Controller wurde geschlossen.'))
+            self.__watcher.close()
+
     def __get_int_parameter(self, command_root: bytes, reply_root: bytes, bus: int, axis: int) -> int:
         command = command_root + str(axis).encode()
         reply = self.command(command, bus)
@@ -179,6 +307,12 @@ class MCSCommunicator(ContrCommunicator):
         else:
             return False
 
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        """Schätzt die Fahrzeit (in s) aus 'max move Speed' (nm/s).
+        Bei 0 ist die Geschwindigkeit nicht begrenzt, dann ist die Fahrzeit unbekannt."""
+
+        return trapezoid_move_time(distance, parameters.get('max move Speed'), 0)
+
     def motor_at_the_beg(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
         raise NotSupportedError("MCS-Kontroller unterschtützt Initiatoren nicht.")
@@ -220,8 +354,14 @@ class MCSCommunicator(ContrCommunicator):
         """Ausführt ein Befehl ohne Adressieren und gibt die Antwort zurück."""
 
         with self.__mutex:
-            self.connector.send(command)
-            reply = self.connector.read()
+            self.__send([command])
+            reply = self.__read()
+
+        return self.__check_reply(reply)
+
+    @staticmethod
+    def __check_reply(reply: Union[bytes, None]) -> (bool, Union[bytes, None]):
+        """Prüft die Antwort vom Controller und gibt sie im Format (Erfolg, Antwort) zurück."""
 
         if reply is None:
             return False, None
@@ -251,6 +391,25 @@ class MCSCommunicator(ContrCommunicator):
         """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
         raise NotSupportedError("Ein Befehl zum Motor ist bei MCC semantisch nicht implementiert.")
 
+    def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Schickt mehrere Befehle im Format [(Befehl, Bus, Achse), …] mit einem einzigen Schreibvorgang
+        und liest danach die Antworten in derselben Reihenfolge.
+
+        Bei MCS enthält der Befehl selbst die Kanalnummer, deswegen muss Achse immer None sein.
+        """
+
+        for command, bus, axis in commands:
+            if bus != 0:
+                raise ValueError(f'Bei MCC ist nur bus = 0 verfügbar, und kein "{bus}"!')
+            if axis is not None:
+                raise NotSupportedError("Ein Befehl zum Motor ist bei MCC semantisch nicht implementiert.")
+
+        with self.__mutex:
+            self.__send([command for command, bus, axis in commands])
+            replies = [self.__read() for _ in commands]
+        return list(map(self.__check_reply, replies))
+
     def command(self, command: bytes, bus: int = 0) -> Union[bytes, None]:
 
         success, reply = self.command_to_modul(command, bus)
@@ -288,6 +447,204 @@ class MCSCommunicator(ContrCommunicator):
         self.command_to_box(f'CB{baudrate}'.encode())
 
 
+class MCSChannelEmulator:
+    """Ein Kanal des MCSEmulator. Die Bewegung wird aus der Zeit berechnet."""
+
+    def __init__(self, box: 'MCSEmulator'):
+        self.box = box
+        self.parameters = {'ST': 1, 'CLF': 5000, 'CLS': 0}
+        self.__start = 0
+        self.__target = 0
+        self.__t_start = 0.0
+        self.__t_end = 0.0
+        self.__calibrating = False
+
+    def moving(self) -> bool:
+        return time.monotonic() < self.__t_end
+
+    def remaining_time(self) -> float:
+        return max(0.0, self.__t_end - time.monotonic())
+
+    def get_position(self) -> int:
+        now = time.monotonic()
+        if now >= self.__t_end or self.__calibrating:
+            return self.__target
+        part = (now - self.__t_start) / (self.__t_end - self.__t_start)
+        return round(self.__start + (self.__target - self.__start) * part)
+
+    def set_position(self, position: int):
+        self.__start = self.__target = position
+        self.__t_end = 0.0
+
+    def move_to(self, target: int):
+        position = self.get_position()
+        speed = self.parameters['CLS'] or self.box.default_speed
+        self.__start, self.__target = position, target
+        self.__t_start = time.monotonic()
+        self.__t_end = self.__t_start + abs(target - position) / speed
+        self.__calibrating = False
+
+    def stop(self):
+        self.set_position(self.get_position())
+        self.__calibrating = False
+
+    def calibrate(self):
+        self.__start = self.__target = self.get_position()
+        self.__t_start = time.monotonic()
+        self.__t_end = self.__t_start + self.box.calibration_time
+        self.__calibrating = True
+
+    def status(self) -> int:
+        if not self.moving():
+            return 0  # stopped
+        return 6 if self.__calibrating else 4  # calibrating, target
+
+
+class MCSEmulator(SerialEmulator):
+    """Ahmt einen MCS Controller mit n_channels Kanälen an der seriellen Schnittstelle nach
+    (für SerialConnector(emulator=...) bzw. MCS_SerialConnector).
+
+    Im asynchronen Modus (SCM1) wird für die Kanäle, bei denen SRC<Kanal>,1 eingestellt ist,
+    am Ende jeder Bewegung die Meldung ':C<Kanal>' geschickt.
+    """
+
+    timeout: float = 0.2
+
+    def __init__(self, n_channels: int = 3):
+        self.channels = [MCSChannelEmulator(self) for _ in range(n_channels)]
+        self.default_speed = 10**9  # nm/s, wenn CLS 0 ist
+        self.calibration_time = 0.05  # s
+        self.asynchronous = False
+        self.report_on_complete = set()
+        self.commands_received = 0
+        self.__output = bytearray()
+        self.__input = b''
+        self.__condition = threading.Condition()
+        self.__moves = [0] * n_channels  # Zähler der Bewegungen, damit veraltete Meldungen entfallen
+
+    def write(self, command: bytes):
+        with self.__condition:
+            self.__input += command
+            while b'\n' in self.__input:
+                line, self.__input = self.__input.split(b'\n', 1)
+                self.commands_received += 1
+                self.__answer(self.__execute(line.strip().lstrip(b':').decode()))
+
+    def read(self, size: int = 1) -> bytes:
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__output, self.timeout)
+            answer = bytes(self.__output[:size])
+            del self.__output[:size]
+            return answer
+
+    def read_until(self, end_symbol: bytes) -> bytes:
+        with self.__condition:
+            self.__condition.wait_for(lambda: end_symbol in self.__output, self.timeout)
+            i = self.__output.find(end_symbol)
+            end = len(self.__output) if i == -1 else i + len(end_symbol)
+            answer = bytes(self.__output[:end])
+            del self.__output[:end]
+            return answer
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.__output)
+
+    # noinspection PyPep8Naming
+    def flushInput(self):
+        with self.__condition:
+            self.__output.clear()
+
+    def close(self):
+        pass
+
+    def __answer(self, reply: str):
+        self.__output += f':{reply}\n'.encode()
+        self.__condition.notify_all()
+
+    def __execute(self, command: str) -> str:
+        try:
+            return self.__execute_command(command)
+        except (ValueError, IndexError):
+            return 'E-1,2'  # Invalid Command Error
+
+    def __execute_command(self, command: str) -> str:
+        if command == 'GNC':
+            return f'N{len(self.channels)}'
+        if command == 'GIV':
+            return 'IV1,0,0'
+        if command.startswith('SCM'):
+            self.asynchronous = bool(int(command[3:]))
+            return 'E-1,0'
+        for root in ('ST', 'CLF', 'CLS'):
+            if command.startswith('G' + root):
+                channel = int(command[len(root) + 1:])
+                return f'{root}{channel},{self.channels[channel].parameters[root]}'
+            if command.startswith('S' + root):
+                channel, value = map(int, command[len(root) + 1:].split(','))
+                self.channels[channel].parameters[root] = value
+                return f'E{channel},0'
+        if command.startswith('SRC'):
+            channel, report = map(int, command[3:].split(','))
+            self.channels[channel]  # Kanal prüfen
+            if report:
+                self.report_on_complete.add(channel)
+            else:
+                self.report_on_complete.discard(channel)
+            return f'E{channel},0'
+        if command.startswith('GP'):
+            channel = int(command[2:])
+            return f'P{channel},{self.channels[channel].get_position()}'
+        if command.startswith('GS'):
+            channel = int(command[2:])
+            return f'S{channel},{self.channels[channel].status()}'
+        if command.startswith('SP'):
+            channel, position = map(int, command[2:].split(','))
+            self.channels[channel].set_position(position)
+            return f'E{channel},0'
+        if command.startswith(('MPA', 'MPR')):
+            channel, value, _ = map(int, command[3:].split(','))
+            target = value if command.startswith('MPA') else self.channels[channel].get_position() + value
+            self.channels[channel].move_to(target)
+            self.__movement_started(channel)
+            return f'E{channel},0'
+        if command.startswith(('CS', 'FRM')):
+            channel = int(command[2:] if command.startswith('CS') else command[3:].split(',')[0])
+            self.channels[channel].calibrate()
+            self.__movement_started(channel)
+            return f'E{channel},0'
+        if command.startswith('S'):
+            channel = int(command[1:])
+            was_moving = self.channels[channel].moving()
+            self.channels[channel].stop()
+            self.__moves[channel] += 1
+            if was_moving:
+                self.__report_complete(channel)
+            return f'E{channel},0'
+        raise ValueError(command)
+
+    def __movement_started(self, channel: int):
+        self.__moves[channel] += 1
+        timer = threading.Timer(self.channels[channel].remaining_time(), self.__movement_finished,
+                                (channel, self.__moves[channel]))
+        timer.daemon = True
+        timer.start()
+
+    def __movement_finished(self, channel: int, move: int):
+        with self.__condition:
+            if move != self.__moves[channel]:
+                return
+            if self.channels[channel].moving():
+                self.__moves[channel] -= 1
+                self.__movement_started(channel)
+            else:
+                self.__report_complete(channel)
+
+    def __report_complete(self, channel: int):
+        if self.asynchronous and channel in self.report_on_complete:
+            self.__answer(f'C{channel}')
+
+
 if __name__ == '__main__':
 
     port = '/dev/cu.usbserial-1430'
@@ -1,11 +1,18 @@
+import asyncio
+import concurrent.futures
+import contextlib
 import logging
+import socket
 import threading
 import time
+from collections import deque
 from copy import deepcopy
-from typing import Union, Dict, List, Tuple
+from typing import Union, Dict, List, Tuple, NamedTuple, Callable, Deque, Set
 
 from motor_controller.interface import ContrCommunicator, SerialEmulator, Connector, NoReplyError, \
-    ReplyError, ControllerError, EthernetConnector, Box, SerialConnector
+    ReplyError, ControllerError, EthernetConnector, Box, SerialConnector, AsyncContrCommunicator, AsyncConnector, \
+    AsyncEthernetConnector, trapezoid_move_time, StatusPoller, FrameDecoder, StopIndicator, CompletionWatcher, \
+    ConnectError
 from motor_controller.Phytron_MCC2 import is_h_digit, MCC2Communicator
 
 import logscolor
@@ -18,13 +25,301 @@ def MCS2_EthernetConnector(ip: str, port: str = "55551", timeout: float = 0.004)
     return EthernetConnector(ip, port, end_symbol=b'\r\n', timeout=timeout)
 
 
-def MCS2BoxEthernet(ip: str, port: str = "55551", timeout: float = 0.004, input_file: str = None) -> Box:
+def MCS2_AsyncEthernetConnector(ip: str, port: str = "55551", timeout: float = 0.004) -> AsyncEthernetConnector:
+    return AsyncEthernetConnector(ip, port, end_symbol=b'\r\n', timeout=timeout)
+
+
+# Bits der Antwort auf :STATe?
+STATE_ACTIVELY_MOVING = 0x0001
+STATE_CLOSED_LOOP_ACTIVE = 0x0002
+STATE_CALIBRATING = 0x0004
+STATE_REFERENCING = 0x0008
+STATE_SENSOR_PRESENT = 0x0020
+STATE_IS_CALIBRATED = 0x0040
+STATE_IS_REFERENCED = 0x0080
+STATE_END_STOP_REACHED = 0x0100
+STATE_RANGE_LIMIT_REACHED = 0x0200
+
+
+class ChannelState(NamedTuple):
+    """Position (in pm) und Zustand (die Bits von :STATe?) eines MCS2 Kanals."""
+
+    position: float
+    state: int
+
+    @property
+    def moving(self) -> bool:
+        return bool(self.state & STATE_ACTIVELY_MOVING)
+
+    @property
+    def end_stop_reached(self) -> bool:
+        return bool(self.state & STATE_END_STOP_REACHED)
+
+    @property
+    def calibrating(self) -> bool:
+        return bool(self.state & STATE_CALIBRATING)
+
+    @property
+    def is_calibrated(self) -> bool:
+        return bool(self.state & STATE_IS_CALIBRATED)
+
+
+def chained_query(channels: List[int], queries: List[bytes]) -> bytes:
+    """Baut eine Zeile, die jede der Abfragen für jeden der Kanäle stellt: ':CHAN0:POS?;:CHAN0:STAT?;…'."""
+
+    return b';'.join(f':CHAN{channel}'.encode() + query for channel in channels for query in queries)
+
+
+def split_chained_reply(reply: Union[bytes, None], n_values: int) -> List[float]:
+    """Teilt die Antwort auf eine verkettete Abfrage in die einzelnen Zahlenwerte."""
+
+    values = reply.split(b';') if reply else []
+    if len(values) != n_values:
+        raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+    try:
+        return list(map(float, values))
+    except ValueError:
+        raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+
+
+def split_errors_count(reply: Union[bytes, None]) -> (Union[bytes, None], int):
+    """Trennt die angehängte Antwort auf :SYST:ERR:COUN? ab und gibt (Antwort, Anzahl der Fehler) zurück.
+    Die Antwort ist None, wenn der Befehl selbst keine Antwort hatte."""
+
+    if reply is None:
+        raise NoReplyError('Der Controller antwortet nicht!')
+    value, separator, count = reply.rpartition(b';')
+    try:
+        errors_count = int(count)
+    except ValueError:
+        raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+    return (value if separator else None), errors_count
+
+
+def assign_chained_replies(replies: List[Tuple[Union[bytes, None], int]], n_lines: int, errors: List[bytes]) \
+        -> Union[List[Tuple[bool, Union[bytes, None]]], None]:
+    """Ordnet die Antworten auf n_lines Zeilen mit angehängter Fehleranzahl [(Antwort, Fehleranzahl), …] und die
+    Fehler aus der Fehlerschlange den Zeilen zu und gibt für jede Zeile (Erfolg, Antwort oder Fehlermeldungen) zurück.
+
+    Sind alle Zeilen beantwortet, gehört der Anstieg der Fehleranzahl zur Zeile selbst. Fehlen Antworten, hat der
+    Controller die Zeilen mit einem fehlerhaften Befehl verworfen: jede davon hat einen Fehler hinterlassen, so zeigt
+    der Anstieg der Fehleranzahl, vor welcher Antwort sie fehlen. Gibt None zurück, wenn das nicht aufgeht."""
+
+    results = []
+    missing = n_lines - len(replies)
+    previous = 0
+    for reply, count in replies:
+        if count < previous or count > len(errors):
+            return None
+        new_errors, previous = errors[previous:count], count
+        if missing:
+            if len(new_errors) > missing:
+                return None
+            results += [(False, error + b'\n') for error in new_errors]
+            missing -= len(new_errors)
+            results.append((True, reply))
+        elif new_errors:
+            results.append((False, b''.join(error + b'\n' for error in new_errors)))
+        else:
+            results.append((True, reply))
+    if missing:
+        if len(errors) - previous != missing:
+            return None
+        results += [(False, error + b'\n') for error in errors[previous:]]
+    return results
+
+
+def channel_table(axen_list: List[int]) -> Dict[Tuple[int, int], int]:
+    """Gibt die Kanalnummern {(Bus, Achse): Kanal} für die angegebene Anzahl der Achsen in jedem Modul zurück."""
+
+    table = {}
+    for bus, n_axes in enumerate(axen_list):
+        for axis in range(n_axes):
+            table[(bus, axis)] = len(table)
+    return table
+
+
+# Ereignistypen der Ereignisschlange
+EVENT_MOVEMENT_FINISHED = 0x0001
+
+
+def parse_event(line: bytes) -> Union[Tuple[int, int, int], None]:
+    """Zerlegt eine Ereignismeldung 'EVENT Kanal,Typ,Parameter' in (Kanal, Typ, Parameter).
+    Gibt None zurück, wenn die Zeile keine Ereignismeldung ist."""
+
+    prefix, _, rest = line.partition(b' ')
+    if prefix != b'EVENT':
+        return None
+    try:
+        channel, event_type, parameter = map(int, rest.split(b','))
+    except ValueError:
+        raise ReplyError(f'Unerwartete Ereignismeldung vom Controller: {line}!')
+    return channel, event_type, parameter
+
+
+def _pass_result(source: concurrent.futures.Future, targets: List[concurrent.futures.Future]):
+    for target in targets:
+        if target.done():
+            continue
+        if source.cancelled():
+            target.cancel()
+            continue
+        try:
+            if source.exception() is not None:
+                target.set_exception(source.exception())
+            else:
+                target.set_result(source.result())
+        except concurrent.futures.InvalidStateError:
+            pass  # inzwischen von einem anderen Thread abgesagt
+
+
+class MCS2EventWatcher(CompletionWatcher):
+    """Wartet auf den Stop der Achsen anhand der Ereignisse des Controllers, statt den Status
+    regelmäßig abzufragen (s. CompletionWatcher).
+
+    Über eine zweite TCP-Verbindung werden die Ereignisse abonniert (:EVENt:NOTify 1), danach meldet
+    der Controller jedes Bewegungsende als 'EVENT Kanal,1,Parameter'.
+    Lässt sich das Abonnement nicht einrichten oder bricht die Verbindung ab, übernimmt ein StatusPoller.
+    """
+
+    connect_timeout: float = 1.0
+
+    def __init__(self, communicator: 'MCS2Communicator'):
+        super().__init__(communicator)
+        self.__coords: Dict[int, Tuple[int, int]] = {}
+        self.__sock: Union[socket.socket, None] = None
+        self.__decoder = FrameDecoder(end_symbol=b'\r\n')
+        self.__thread: Union[threading.Thread, None] = None
+        self.__fallback: Union[StatusPoller, None] = None
+        self.__start_lock = threading.Lock()  # nur ein Abonnement zugleich, ohne _lock zu blockieren
+
+    @property
+    def listening(self) -> bool:
+        """Zeigt, ob die Ereignisse gerade abonniert sind."""
+        return self.__thread is not None
+
+    @property
+    def events_received(self) -> int:
+        """Anzahl der bisher empfangenen Ereignisse über das Ende einer Bewegung."""
+        return self.completions_received
+
+    def close(self):
+        """Beendet das Abonnement, weitere Wartende werden vom StatusPoller bedient."""
+
+        with self._lock:
+            sock = self.__sock
+            if self.__fallback is None:
+                self.__fallback = StatusPoller(self.communicator)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _start(self):
+        """Richtet bei Bedarf das Abonnement ein, oder schaltet auf den StatusPoller um.
+        Die Verbindung wird ohne _lock aufgebaut, die Ereignisse und Wartenden werden solange weiter bedient."""
+
+        with self.__start_lock:
+            with self._lock:
+                if self.__fallback is not None or self.__thread is not None:
+                    return
+            try:
+                sock = self.__subscribe()
+            except (OSError, ReplyError, ConnectError) as err:
+                logging.warning(f'Die Ereignisse des MCS2 lassen sich nicht abonnieren ({err}), '
+                                f'der Status wird stattdessen abgefragt.')
+                with self._lock:
+                    if self.__fallback is None:
+                        self.__fallback = StatusPoller(self.communicator)
+                try:
+                    self.communicator.get_errors()  # ein unbekannter Befehl landet in der Fehlerschlange
+                except (OSError, ReplyError):
+                    pass
+                return
+            with self._lock:
+                if self.__fallback is not None:  # inzwischen geschlossen
+                    sock.close()
+                    return
+                self.__sock = sock
+                self.__thread = threading.Thread(target=self.__run, name='MCS2EventWatcher', daemon=True)
+                self.__thread.start()
+
+    def _fallback(self) -> Union[StatusPoller, None]:
+        return self.__fallback
+
+    def __subscribe(self) -> socket.socket:
+        connector = self.communicator.connector
+        if not hasattr(connector, 'ip'):
+            raise ConnectError('Ereignisse gibt es nur bei einer Verbindung durch Ethernet.')
+        self.__coords = {channel: coord for coord, channel in self.communicator.channel_numbers().items()}
+        sock = socket.create_connection((connector.ip, connector.port), timeout=self.connect_timeout)
+        try:
+            # auf die Antwort wird nicht länger als bei jedem anderen Befehl gewartet
+            sock.settimeout(connector.get_timeout())
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(b':EVEN:NOT 1;:EVEN:NOT?\r\n')
+            reply = self.__read_frame(sock)
+            while parse_event(reply) is not None:
+                reply = self.__read_frame(sock)
+            if reply != b'1':
+                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+        except (OSError, ReplyError, ConnectError):
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+
+    def __read_frame(self, sock: socket.socket) -> bytes:
+        frame = self.__decoder.next_frame()
+        while frame is None:
+            if not self.__decoder.fill(sock.recv_into):
+                raise ConnectError('Die Verbindung wurde vom Controller geschlossen.')
+            frame = self.__decoder.next_frame()
+        return frame
+
+    def __run(self):
+        try:
+            while True:
+                event = parse_event(self.__read_frame(self.__sock))
+                if event is None or event[1] != EVENT_MOVEMENT_FINISHED:
+                    continue
+                if self._completed(self.__coords.get(event[0])):
+                    self._check([self.__coords[event[0]]])
+        except (OSError, ReplyError, ConnectError):
+            pass
+        finally:
+            self.__fall_back()
+
+    def __fall_back(self):
+        """Übergibt die noch Wartenden an den StatusPoller, nachdem die Ereignisverbindung weg ist."""
+
+        with self._lock:
+            if self.__fallback is None:
+                logging.warning('Die Ereignisverbindung zum MCS2 ist abgebrochen, '
+                                'der Status wird stattdessen abgefragt.')
+                self.__fallback = StatusPoller(self.communicator)
+            waiters = self._take_waiters()
+            self.__sock.close()
+            self.__sock = None
+            self.__thread = None
+        for coord, futures in waiters.items():
+            pending = [future for future in futures if not future.done()]
+            if pending:
+                polled = self.__fallback.watch(*coord)
+                polled.add_done_callback(lambda source, targets=pending: _pass_result(source, targets))
+
+
+def MCS2BoxEthernet(ip: str, port: str = "55551", timeout: float = 0.004, input_file: str = None,
+                    error_check: str = 'chained', events: bool = False) -> Box:
     connector = MCS2_EthernetConnector(ip=ip, port=port, timeout=timeout)
-    communicator = MCS2Communicator(connector)
+    communicator = MCS2Communicator(connector, error_check, events)
     return Box(communicator=communicator, input_file=input_file)
 
 
-class MCS2Communicator(ContrCommunicator):
+class MCS2Protocol:
+    """Die Befehle des MCS2 und die Auswertung seiner Antworten, gemeinsam für MCS2Communicator
+    und AsyncMCS2Communicator. Die beiden Communicators unterscheiden sich nur im Schicken und Lesen."""
 
     tolerance = 10**6  # Für MCS2 akzeptabele Abweichung bei Positionierung der Motoren (in Controller Einheiten)
     calibration_shift = 50*10**9
@@ -34,38 +329,217 @@ class MCS2Communicator(ContrCommunicator):
     PARAMETER_COMMAND = {'Positioner Type': b':PTYPe', 'Velocity': b':VEL', 'Acceleration': b':ACC',
                          'inversion': b':LSCale:INVersion'}
 
-    def __init__(self, connector: Connector):
+    ERROR_CHECK_MODES = ('chained', 'always')
+    ERROR_COUNT_QUERY = b':SYST:ERR:COUN?'
+    ERROR_NEXT_QUERY = b':SYST:ERR:NEXT?'
+
+    # Abfragen ohne Argumente
+    _POSITION = b':POS?'
+    _STATE = b':STATe?'
+    _N_MODULS = b':DEV:NOBM?'
+    _N_CHANNELS = b':NOMC?'
+    _IDENTIFICATION = b'*IDN?'
+
+    @classmethod
+    def _check_error_check_mode(cls, error_check: str):
+        if error_check not in cls.ERROR_CHECK_MODES:
+            raise ValueError(f'Unbekannter error_check: "{error_check}"')
+
+    @staticmethod
+    def _modul_address(command: bytes, bus: int) -> bytes:
+        return f':MOD{bus}'.encode() + command
+
+    @staticmethod
+    def _channel_address(command: bytes, channel: int) -> bytes:
+        return f':CHAN{channel}'.encode() + command
+
+    @staticmethod
+    def _move_command(move_mode: int, value: float, channel: int, current_mode: Union[int, None]) -> bytes:
+        """Gibt :MOVE zurück, davor in derselben Zeile :MMOD, wenn der Kanal noch nicht in diesem Modus ist."""
+
+        command = f':MOVE{channel} {value}'.encode()
+        if current_mode != move_mode:
+            command = f':CHAN{channel}:MMOD {move_mode};'.encode() + command
+        return command
+
+    @staticmethod
+    def _stop_command(channel: int) -> bytes:
+        return f':STOP{channel}'.encode()
+
+    @staticmethod
+    def _set_position_command(new_position: float) -> bytes:
+        return f':POS {new_position}'.encode()
+
+    @classmethod
+    def _parameter_command(cls, parameter_name: str, neu_value: float = None) -> bytes:
+        """Gibt den Befehl zurück, der den Parameter liest (neu_value ist None) oder ändert."""
+
+        if neu_value is None:
+            return cls.PARAMETER_COMMAND[parameter_name] + b'?'
+        return cls.PARAMETER_COMMAND[parameter_name] + f' {neu_value}'.encode()
+
+    @staticmethod
+    def _calibration_commands(channel: int) -> List[bytes]:
+        return [f':CHAN{channel}:CAL:OPT 0'.encode(), f':CAL{channel}'.encode()]
+
+    @classmethod
+    def _with_errors_count(cls, command: bytes) -> bytes:
+        """Hängt die Abfrage der Fehleranzahl an den Befehl an (error_check 'chained')."""
+
+        return command + b';' + cls.ERROR_COUNT_QUERY
+
+    @staticmethod
+    def _expects_reply(message: bytes) -> bool:
+        """Eine Antwort wird nur für die Abfragen (Befehle mit '?') erwartet."""
+
+        return b'?' in message
+
+    @staticmethod
+    def _float_reply(reply: Union[bytes, None]) -> float:
+        """Prüft die Antwort vom Controller und kriegt die enthaltene Fließkommazahl heraus."""
+
+        if reply is None or reply == b'':
+            raise NoReplyError("Der Controller antwortet nicht!")
+        try:
+            return float(reply)
+        except ValueError:
+            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+
+    @staticmethod
+    def _check_no_reply(reply: Union[bytes, None]):
+        """Prüft die Antwort vom Controller für ein Befehl ohne erwartete Antwort."""
+
+        if reply is not None:
+            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+
+    @staticmethod
+    def _command_result(success: bool, reply: Union[bytes, None]) -> Union[bytes, None]:
+        """Gibt die Antwort zurück, oder ruft ControllerError, wenn der Controller einen Fehler gemeldet hat."""
+
+        if not success:
+            raise ControllerError(f'Der Controller hat einen Fehler gemeldet: {reply}')
+        return reply
+
+    @staticmethod
+    def _warn_ignored_axis(bus: Union[int, None], axis: Union[int, None]):
+        if axis is not None and bus is None:
+            logging.warning(f'Die Eingabe von axis wurde ignoriert, wenn bus None ist!')
+
+    @staticmethod
+    def _join_errors(errors: List[bytes]) -> bytes:
+        return b''.join(error + b'\n' for error in errors)
+
+    @staticmethod
+    def _many_results(replies: List[Union[bytes, None]], errors: bytes) -> List[Tuple[bool, Union[bytes, None]]]:
+        """Ordnet die gemeldeten Fehler den Antworten von execute_many zu."""
+
+        if errors:
+            return [(False, errors)] * len(replies)
+        else:
+            return [(True, reply) for reply in replies]
+
+    @classmethod
+    def _chained_results(cls, replies: List[Tuple[Union[bytes, None], int]], n_lines: int, errors: List[bytes]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Wie _many_results für error_check 'chained', die Fehler werden dabei den einzelnen Befehlen zugeordnet.
+        Lässt sich das nicht eindeutig machen, bekommen alle Befehle (False, Fehlermeldungen)."""
+
+        results = assign_chained_replies(replies, n_lines, errors)
+        if results is None:
+            return [(False, cls._join_errors(errors))] * n_lines
+        return results
+
+    @staticmethod
+    def _channel_states(coords: List[Tuple[int, int]], values: List[float]) -> Dict[Tuple[int, int], ChannelState]:
+        return {coord: ChannelState(values[2*i], int(values[2*i + 1])) for i, coord in enumerate(coords)}
+
+    @staticmethod
+    def _stands(states: List[float]) -> List[bool]:
+        return [not int(state) & STATE_ACTIVELY_MOVING for state in states]
+
+    @staticmethod
+    def _no_sensor(err: ControllerError) -> bool:
+        """Zeigt, ob :NOMC? nur deswegen fehlgeschlagen ist, weil am Modul kein Sensor angeschlossen ist."""
+
+        return 'no sensor present' in str(err)
+
+    @staticmethod
+    def _channel_not_found(bus: int, axis: int) -> ValueError:
+        return ValueError(f'Achse {axis} am Modul {bus} ist nicht vorhanden.')
+
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        """Schätzt die Fahrzeit (in s) aus Velocity (pm/s) und Acceleration (pm/s²).
+        Bei Velocity = 0 wird die Geschwindigkeit nicht geregelt, dann ist die Fahrzeit unbekannt."""
+        return trapezoid_move_time(distance, parameters.get('Velocity'), parameters.get('Acceleration'))
+
+    # TODO schreiben check_raw_input_data zu Ende
+    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
+        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
+
+        return True, ""
+
+
+class MCS2Communicator(MCS2Protocol, ContrCommunicator):
+    """Communicator für SmarAct MCS2.
+
+    Die Fehlerschlange des Controllers wird je nach error_check geprüft:
+    'chained' – die Abfrage der Fehleranzahl wird an denselben Befehl angehängt (ein Round-Trip pro Befehl);
+    verwirft der Controller nach einem Fehler den Rest der Zeile, bleibt die Antwort aus und die Fehler
+    werden danach einzeln abgefragt,
+    'always' – die Fehler werden vor und nach jedem Befehl einzeln abgefragt.
+    Innerhalb von transaction() wird nur einmal am Ende geprüft.
+
+    Mit events=True wird auf den Stop der Motoren anhand der Ereignisse des Controllers gewartet
+    (s. MCS2EventWatcher), sonst (standardmäßig) wird der Status regelmäßig abgefragt.
+    """
+
+    def __init__(self, connector: Connector, error_check: str = 'chained', events: bool = False):
+        self._check_error_check_mode(error_check)
         self.connector = connector
+        self.error_check = error_check
         self.__mutex1 = threading.Lock()
         self.__mutex2 = threading.Lock()
         self.__mutex3 = threading.Lock()
+        self.__transaction_owner: Union[int, None] = None
 
         self.__axen_list = []
+        self.__channels: Dict[Tuple[int, int], int] = {}
+        self.__move_mode: Dict[int, int] = {}  # zuletzt eingestellter :MMOD jedes Kanals
         self.__get_axen_list()
+        self.__event_watcher = MCS2EventWatcher(self) if events else None
 
     def __get_axen_list(self):
         """Liest wie viel Achsen jeder Modul hat,
         und sichert dieser Information für weitere berechnung der Nummern von Chennels.
         """
         self.__axen_list = []
-        for bus in self.bus_list():
-            self.__axen_list.append(len(self.axes_list(bus)))
+        for bus in self.cached_bus_list():
+            self.__axen_list.append(len(self.cached_axes_list(bus)))
+        self.__channels = channel_table(self.__axen_list)
+
+    def invalidate_topology(self):
+        """Vergisst die gespeicherte Topologie und die zuletzt eingestellten :MMOD (z.B. nach einem Neustart
+        des Controllers) und liest die Achsenzahlen für die Kanalnummern neu."""
+        super().invalidate_topology()
+        self.__move_mode.clear()
+        self.__get_axen_list()
+
+    def channel_numbers(self) -> Dict[Tuple[int, int], int]:
+        """Gibt die Kanalnummern {(Bus, Achse): Kanal} zurück."""
+        return dict(self.__channels)
 
     def __ch_n(self, bus: int, axis: int) -> int:
-        return sum(self.__axen_list[:bus]) + axis
+        try:
+            return self.__channels[(bus, axis)]
+        except KeyError:
+            raise self._channel_not_found(bus, axis)
 
     def command_with_float_reply(self, command: bytes, bus: int = None, axis: int = None) -> float:
         """Ausführt ein Befehl mit einer erwarteten Fließkommazahl-Antwort
         und gibt die erhaltene Fließkommazahl zurück.
         """
 
-        reply = self.command(command, bus, axis)
-        if reply is None or reply == b'':
-            raise NoReplyError("Der Controller antwortet nicht!")
-        try:
-            return float(reply)
-        except ValueError:
-            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+        return self._float_reply(self.command(command, bus, axis))
 
     def command_with_int_reply(self, command: bytes, bus: int = None, axis: int = None) -> int:
         """Ausführt ein Befehl mit einer erwarteten int-Antwort
@@ -78,9 +552,7 @@ class MCS2Communicator(ContrCommunicator):
     def command_without_reply(self, command: bytes, bus: int = None, axis: int = None):
         """Ausführt ein Befehl ohne erwartete Antwort"""
 
-        reply = self.command(command, bus, axis)
-        if reply is not None:
-            raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+        self._check_no_reply(self.command(command, bus, axis))
 
     def __command(self, command: bytes, clear_buffer: bool = True) -> bytes:
         """Ausführt ein Befehl und gibt die Antwort zurück, ohne Prüfung der Ausführung."""
@@ -104,77 +576,153 @@ class MCS2Communicator(ContrCommunicator):
         Wenn keine Fehler gibt, dann gibt leere bytes-string zurück.
         """
 
+        return self._join_errors(self.__error_list())
+
+    def __error_list(self) -> List[bytes]:
         with self.__mutex2:
-            reply = self.__command(b':SYST:ERR:COUN?')
+            reply = self.__command(self.ERROR_COUNT_QUERY)
+            _, errors_count = split_errors_count(reply)
+            return self.__read_errors(errors_count)
 
-            if reply is None:
-                raise NoReplyError('Der Controller antwortet nicht!')
-            try:
-                errors_count = int(reply)
-            except ValueError:
-                raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
+    def __read_errors(self, errors_count: int) -> List[bytes]:
+        return [self.__command(self.ERROR_NEXT_QUERY) for _ in range(errors_count)]
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Die Befehle im with-Block werden ohne einzelne Fehlerprüfung geschickt. Die Fehler werden einmal
+        am Ende geprüft und als ControllerError gemeldet. Andere Threads warten bis zum Ende des Blocks."""
 
-            errors = b''
-            if errors_count:
-                for i in range(errors_count):
-                    reply = self.__command(b':SYST:ERR:NEXT?')
-                    # reply_ = reply.split(b',')
-                    # if len(reply_) != 2:
-                    #     raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
-                    # error_n, mess = reply_
-                    # try:
-                    #     error_n = int(error_n)
-                    # except ValueError:
-                    #     raise ReplyError(f'Unerwartete Antwort vom Controller: {reply}!')
-                    errors += reply + b'\n'
-        return errors
+        if self.__transaction_owner == threading.get_ident():
+            yield self
+            return
+        with self.__mutex3:
+            self.__transaction_owner = threading.get_ident()
+            try:
+                yield self
+            finally:
+                self.__transaction_owner = None
+            errors = self.get_errors()
+        if errors:
+            raise ControllerError(f'Der Controller hat einen Fehler gemeldet: {errors}')
 
     def go(self, shift: float, bus: int, axis: int):
         """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
-        channel = self.__ch_n(bus, axis)
-        self.command_without_reply(b':MMOD 1', bus, axis)
-        self.command_without_reply(f':MOVE{channel} {shift}'.encode())
+        self.__move(1, shift, bus, axis)
 
     def go_to(self, destination: float, bus: int, axis: int):
         """Schickt den angegeben Motor zur angegebene absolute Position."""
+        self.__move(0, destination, bus, axis)
+
+    def __move(self, move_mode: int, value: float, bus: int, axis: int):
+        """Schickt :MOVE, davor in derselben Zeile :MMOD, wenn der Kanal noch nicht in diesem Modus ist."""
         channel = self.__ch_n(bus, axis)
-        self.command_without_reply(b':MMOD 0', bus, axis)
-        self.command_without_reply(f':MOVE{channel} {destination}'.encode())
+        # bis die Zeile erfolgreich war, ist der Modus des Kanals unbekannt
+        command = self._move_command(move_mode, value, channel, self.__move_mode.pop(channel, None))
+        self.command_without_reply(command)
+        self.__move_mode[channel] = move_mode
 
     def stop(self, bus: int, axis: int):
         """Stoppt den angegebenen Motor."""
-        channel = self.__ch_n(bus, axis)
-        self.command_without_reply(f':STOP{channel}'.encode())
+        self.command_without_reply(self._stop_command(self.__ch_n(bus, axis)))
 
     def get_position(self, bus: int, axis: int) -> float:
         """Gibt die Position des angegebenen Motors zurück."""
-        return self.command_with_float_reply(b':POS?', bus, axis)
+        return self.command_with_float_reply(self._POSITION, bus, axis)
 
     def set_position(self, new_position: float, bus: int, axis: int):
         """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
-        self.command_without_reply(f':POS {new_position}'.encode(), bus, axis)
+        self.command_without_reply(self._set_position_command(new_position), bus, axis)
 
     def get_parameter(self, parameter_name: str, bus: int, axis: int) -> float:
         """Liest den Wert des angegebenen Parameters."""
-        return self.command_with_float_reply(self.PARAMETER_COMMAND[parameter_name]+b'?')
+        return self.command_with_float_reply(self._parameter_command(parameter_name), bus, axis)
 
     def set_parameter(self, parameter_name: str, neu_value: float, bus: int, axis: int):
         """Ändert den Wert des angegebenen Parameters."""
-        self.command_without_reply(self.PARAMETER_COMMAND[parameter_name] + f' {neu_value}'.encode(), bus, axis)
+        self.command_without_reply(self._parameter_command(parameter_name, neu_value), bus, axis)
 
-    def __get_chan_prop(self, bus: int, axis: int) -> Tuple[int]:
-        int32 = self.command_with_int_reply(b':STATe?', bus, axis)
-        bits_feld = list(map(int, format(int32, '016b')))
-        bits_feld.reverse()
-        return tuple(bits_feld)
+    def __get_state(self, bus: int, axis: int) -> int:
+        return self.command_with_int_reply(self._STATE, bus, axis)
 
     def motor_stand(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
-        return not bool(self.__get_chan_prop(bus, axis)[0])
+        return not self.__get_state(bus, axis) & STATE_ACTIVELY_MOVING
+
+    def snapshot(self, coords: List[Tuple[int, int]] = None) -> Dict[Tuple[int, int], ChannelState]:
+        """Liest Position und Zustand der angegebenen Motoren (ohne Angabe: aller Motoren)
+        mit einer einzigen verketteten Abfrage."""
+        coords = list(self.__channels) if coords is None else list(coords)
+        return self._channel_states(coords, self.__query_channels(coords, [self._POSITION, self._STATE]))
+
+    def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] mit einer Abfrage zurück."""
+        return self.__query_channels(coords, [self._POSITION])
+
+    def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …] mit einer Abfrage, ob er steht."""
+        return self._stands(self.__query_channels(coords, [self._STATE]))
+
+    def __query_channels(self, coords: List[Tuple[int, int]], queries: List[bytes]) -> List[float]:
+        if not coords:
+            return []
+        channels = [self.__ch_n(bus, axis) for bus, axis in coords]
+        reply = self.command(chained_query(channels, queries))
+        return split_chained_reply(reply, len(channels) * len(queries))
+
+    def status_poller(self) -> Union[MCS2EventWatcher, StatusPoller]:
+        """Gibt den MCS2EventWatcher zurück, oder den StatusPoller, wenn events=False ist."""
+        if self.__event_watcher is None:
+            return super().status_poller()
+        return self.__event_watcher
+
+    def stream_trajectory(self, frames: List[Dict[Tuple[int, int], float]], rate: float = None,
+                          stop_indicator: StopIndicator = None) -> bool:
+        """Übergibt die Punkte frames [{(bus, Achse): Position}, …] als Trajektorie (:STReam) an den Controller,
+        der sie im Takt von rate Punkten/s (None = eingestellte :DEV:STReam:BRATe) abfährt, und wartet bis
+        zum Ende. Die Punkte werden blockweise in einer Zeile geschickt und nachgefüllt, wenn der Puffer
+        des Controllers halb leer ist. Gibt False zurück, wenn durch stop_indicator abgebrochen."""
+
+        lines = [self.__stream_frame(frame) for frame in frames]
+        if rate is not None:
+            self.command_without_reply(f':DEV:STR:BRAT {rate:g}'.encode())
+        rate = self.command_with_float_reply(b':DEV:STR:BRAT?')
+        self.command_without_reply(b':STR:OPEN')
+        finished = False
+        try:
+            capacity = free = self.command_with_int_reply(b':STR:FREE?')
+            sent = 0
+            while sent < len(lines):
+                if stop_indicator is not None and stop_indicator.has_stop_requested():
+                    return False
+                batch = lines[sent:sent + free]
+                if batch:
+                    free = int(self._float_reply(self.command(b';'.join(batch + [b':STR:FREE?']))))
+                    sent += len(batch)
+                else:
+                    time.sleep(max(capacity // 2 - free, 1) / rate)
+                    free = self.command_with_int_reply(b':STR:FREE?')
+            self.command_without_reply(b':STR:CLOS')
+
+            while self.command_with_int_reply(b':STR:STAT?'):
+                if stop_indicator is not None and stop_indicator.has_stop_requested():
+                    return False
+                remaining = capacity - self.command_with_int_reply(b':STR:FREE?')
+                time.sleep(max(remaining / rate / 2, self.poll_interval))
+            finished = True
+        finally:
+            if not finished:
+                # die Trajektorie wird bei Abbruch und bei jedem Fehler beendet
+                with contextlib.suppress(Exception):
+                    self.command_to_box(b':STR:ABOR')
+        return True
+
+    def __stream_frame(self, frame: Dict[Tuple[int, int], float]) -> bytes:
+        values = ','.join(f'{self.__ch_n(bus, axis)},{position:.0f}' for (bus, axis), position in frame.items())
+        return f':STR:FRAM {values}'.encode()
 
     def motor_at_the_beg(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
-        return bool(self.__get_chan_prop(bus, axis)[8])
+        return bool(self.__get_state(bus, axis) & STATE_END_STOP_REACHED)
 
     def motor_at_the_end(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der End-Initiator im Moment aktiviert ist."""
@@ -182,16 +730,16 @@ class MCS2Communicator(ContrCommunicator):
 
     def bus_list(self) -> Tuple[int]:
         """Gibt die Liste der allen verfügbaren Bus-Nummern zurück."""
-        n_moduls = self.command_with_int_reply(b':DEV:NOBM?')
+        n_moduls = self.command_with_int_reply(self._N_MODULS)
         return tuple(range(n_moduls))
 
     def axes_list(self, bus: int) -> Tuple[int]:
         """Gibt die Liste der allen verfügbaren Achsen zurück."""
 
         try:
-            n_axis = self.command_with_int_reply(b':NOMC?', bus)
+            n_axis = self.command_with_int_reply(self._N_CHANNELS, bus)
         except ControllerError as err:
-            if 'no sensor present' in str(err):
+            if self._no_sensor(err):
                 n_axis = 0
             else:
                 raise err
@@ -199,7 +747,7 @@ class MCS2Communicator(ContrCommunicator):
 
     def check_connection(self) -> (bool, bytes):
         """Prüft ob es bei dem Port tatsächlich ein Controller gibt, und gibt die Version davon zurück."""
-        reply = self.__command(b'*IDN?')
+        reply = self.__command(self._IDENTIFICATION)
         if reply[:7] == b'SmarAct':
             return True
         else:
@@ -208,7 +756,23 @@ class MCS2Communicator(ContrCommunicator):
     def command_to_box(self, command: bytes) -> (bool, Union[bytes, None]):
         """Ausführt ein Befehl ohne Adressieren und gibt die Antwort zurück."""
 
+        if self.__transaction_owner == threading.get_ident():
+            return True, self.__command(command)
+
         with self.__mutex3:
+            if self.error_check == 'chained':
+                try:
+                    reply, errors_count = split_errors_count(self.__command(self._with_errors_count(command)))
+                except ReplyError:
+                    # die Zeile wurde nach einem Fehler verworfen, sonst ist der Fehler ein anderer
+                    errors = self.get_errors()
+                    if errors:
+                        return False, errors
+                    raise
+                if errors_count:
+                    return False, self._join_errors(self.__read_errors(errors_count))
+                return True, reply
+
             self.get_errors()
             reply = self.__command(command)
 
@@ -220,43 +784,755 @@ class MCS2Communicator(ContrCommunicator):
 
     def command_to_modul(self, command: bytes, bus: int) -> (bool, Union[bytes, None]):
         """Ausführt ein zum Modul adressierte Befehl und gibt die Antwort zurück."""
-        command = f':MOD{bus}'.encode() + command
-        return self.command_to_box(command)
+        return self.command_to_box(self._modul_address(command, bus))
+
+    def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Schickt mehrere Befehle im Format [(Befehl, Bus, Achse), …] mit einem einzigen Schreibvorgang
+        und liest danach die Antworten in derselben Reihenfolge. Wenn Achse None ist, wird der Befehl zum Modul adressiert.
+
+        Eine Antwort wird nur für die Abfragen (Befehle mit '?') erwartet, für andere Befehle wird None
+        zurückgegeben. Bei error_check 'chained' bekommt jeder Befehl die Abfrage der Fehleranzahl angehängt,
+        so wird (False, Fehlermeldungen) nur für die fehlerhaften Befehle zurückgegeben. Bei 'always' werden
+        die Fehler einmal für den ganzen Block geprüft, und wenn es welche gibt, wird (False, Fehlermeldungen)
+        für alle Befehle zurückgegeben.
+        """
+
+        messages = []
+        for command, bus, axis in commands:
+            if axis is None:
+                messages.append(self._modul_address(command, bus))
+            else:
+                messages.append(self._channel_address(command, self.__ch_n(bus, axis)))
+
+        if self.__transaction_owner == threading.get_ident():
+            with self.__mutex1:
+                self.connector.send_many(messages)
+                return [(True, self.connector.read() if self._expects_reply(message) else None)
+                        for message in messages]
+
+        with self.__mutex3:
+            if self.error_check == 'chained':
+                # jede Zeile bekommt die Abfrage angehängt, so gibt es auch für fehlerhafte Befehle eine Antwort
+                with self.__mutex1:
+                    self.connector.send_many([self._with_errors_count(message) for message in messages])
+                    replies = []
+                    for _ in messages:
+                        reply = self.connector.read()
+                        if reply is None:
+                            break  # die übrigen Zeilen wurden nach einem Fehler verworfen
+                        replies.append(split_errors_count(reply))
+                if len(replies) < len(messages):
+                    errors = self.__error_list()
+                else:
+                    errors = self.__read_errors(replies[-1][1] if replies else 0)
+                return self._chained_results(replies, len(messages), errors)
+            else:
+                self.get_errors()
+                with self.__mutex1:
+                    self.connector.send_many(messages)
+                    replies = [self.connector.read() if self._expects_reply(message) else None
+                               for message in messages]
+
+                errors = self.get_errors()
+            return self._many_results(replies, errors)
 
     def command_to_motor(self, command: bytes, bus: int, axis: int) -> (bool, Union[bytes, None]):
         """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
-        chanel = self.__ch_n(bus, axis)
-        command = f':CHAN{chanel}'.encode() + command
-        return self.command_to_box(command)
+        return self.command_to_box(self._channel_address(command, self.__ch_n(bus, axis)))
 
     def command(self, command: bytes, bus: int = None, axis: int = None) -> Union[bytes, None]:
         """Ausführt ein Befehl für Motor oder für Controller und gibt die Antwort zurück."""
-        if axis is not None and bus is None:
-            logging.warning(f'Die Eingabe von axis wurde ignoriert, wenn bus None ist!')
+        self._warn_ignored_axis(bus, axis)
         if bus is None:
             success, reply = self.command_to_box(command)
         elif axis is None:
             success, reply = self.command_to_modul(command, bus)
         else:
             success, reply = self.command_to_motor(command, bus, axis)
-        if not success:
-            raise ControllerError(f'Der Controller hat einen Fehler gemeldet: {reply}')
-        return reply
-
-    # TODO schreiben check_raw_input_data zu Ende
-    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
-        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
-
-        return True, ""
+        return self._command_result(success, reply)
 
     def calibrate(self, bus: int, axis: int):
         """Die standarte Justierungmaßnahmen durchführen, wenn der Kontroller welche unterstützt."""
-        channel = self.__ch_n(bus, axis)
-        self.command_without_reply(f':CHAN{channel}:CAL:OPT 0'.encode())
-        self.command_without_reply(f':CAL{channel}'.encode())
+        for command in self._calibration_commands(self.__ch_n(bus, axis)):
+            self.command_without_reply(command)
         # self.command_without_reply(b'*WAI')
 
 
+class AsyncMCS2Communicator(MCS2Protocol, AsyncContrCommunicator):
+    """Asynchrone Version von MCS2Communicator. Die Befehle und die Auswertung der Antworten
+    kommen aus MCS2Protocol, nur wird auf die Antworten in der Ereignisschleife gewartet.
+
+    Die Anzahl der Achsen in jedem Modul (für die Berechnung der Kanalnummern) wird beim ersten
+    an einen Motor adressierten Befehl gelesen, weil der Konstruktor keine Koroutine sein kann.
+    """
+
+    def __init__(self, connector: AsyncConnector, error_check: str = 'chained'):
+        self._check_error_check_mode(error_check)
+        self.connector = connector
+        self.error_check = error_check
+        self.__mutex1 = asyncio.Lock()
+        self.__mutex2 = asyncio.Lock()
+        self.__mutex3 = asyncio.Lock()
+        self.__transaction_owner: Union[asyncio.Task, None] = None
+
+        self.__channels: Union[Dict[Tuple[int, int], int], None] = None
+        self.__move_mode: Dict[int, int] = {}  # zuletzt eingestellter :MMOD jedes Kanals
+
+    def invalidate_topology(self):
+        """Vergisst die Kanalnummern und die zuletzt eingestellten :MMOD (z.B. nach einem Neustart
+        des Controllers), sie werden beim nächsten Befehl neu gelesen bzw. geschickt."""
+        self.__channels = None
+        self.__move_mode.clear()
+
+    async def __channel_table(self) -> Dict[Tuple[int, int], int]:
+        if self.__channels is None:
+            axen_list = []
+            for bus_i in await self.bus_list():
+                axen_list.append(len(await self.axes_list(bus_i)))
+            self.__channels = channel_table(axen_list)
+        return self.__channels
+
+    async def __ch_n(self, bus: int, axis: int) -> int:
+        try:
+            return (await self.__channel_table())[(bus, axis)]
+        except KeyError:
+            raise self._channel_not_found(bus, axis)
+
+    async def command_with_float_reply(self, command: bytes, bus: int = None, axis: int = None) -> float:
+        """Ausführt ein Befehl mit einer erwarteten Fließkommazahl-Antwort
+        und gibt die erhaltene Fließkommazahl zurück.
+        """
+
+        return self._float_reply(await self.command(command, bus, axis))
+
+    async def command_with_int_reply(self, command: bytes, bus: int = None, axis: int = None) -> int:
+        """Ausführt ein Befehl mit einer erwarteten int-Antwort
+        und gibt die erhaltene int zurück.
+        """
+
+        return int(await self.command_with_float_reply(command, bus, axis))
+
+    async def command_without_reply(self, command: bytes, bus: int = None, axis: int = None):
+        """Ausführt ein Befehl ohne erwartete Antwort"""
+
+        self._check_no_reply(await self.command(command, bus, axis))
+
+    async def __command(self, command: bytes, clear_buffer: bool = True) -> bytes:
+        """Ausführt ein Befehl und gibt die Antwort zurück, ohne Prüfung der Ausführung."""
+
+        async with self.__mutex1:
+            await self.connector.send(command, clear_buffer)
+            return await self.connector.read()
+
+    async def get_errors(self) -> bytes:
+        """Fragt den Controller ob Fehler gibt, und gibt ein Bericht mit allen Fehlern zurück.
+        Wenn keine Fehler gibt, dann gibt leere bytes-string zurück.
+        """
+
+        return self._join_errors(await self.__error_list())
+
+    async def __error_list(self) -> List[bytes]:
+        async with self.__mutex2:
+            _, errors_count = split_errors_count(await self.__command(self.ERROR_COUNT_QUERY))
+            return await self.__read_errors(errors_count)
+
+    async def __read_errors(self, errors_count: int) -> List[bytes]:
+        return [await self.__command(self.ERROR_NEXT_QUERY) for _ in range(errors_count)]
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Asynchrone Version von MCS2Communicator.transaction: die Fehler werden einmal am Ende geprüft,
+        andere Tasks warten bis zum Ende des Blocks."""
+
+        if self.__transaction_owner is asyncio.current_task():
+            yield self
+            return
+        async with self.__mutex3:
+            self.__transaction_owner = asyncio.current_task()
+            try:
+                yield self
+            finally:
+                self.__transaction_owner = None
+            errors = await self.get_errors()
+        if errors:
+            raise ControllerError(f'Der Controller hat einen Fehler gemeldet: {errors}')
+
+    async def go(self, shift: float, bus: int, axis: int):
+        """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
+        await self.__move(1, shift, bus, axis)
+
+    async def go_to(self, destination: float, bus: int, axis: int):
+        """Schickt den angegeben Motor zur angegebene absolute Position."""
+        await self.__move(0, destination, bus, axis)
+
+    async def __move(self, move_mode: int, value: float, bus: int, axis: int):
+        """Schickt :MOVE, davor in derselben Zeile :MMOD, wenn der Kanal noch nicht in diesem Modus ist."""
+        channel = await self.__ch_n(bus, axis)
+        command = self._move_command(move_mode, value, channel, self.__move_mode.pop(channel, None))
+        await self.command_without_reply(command)
+        self.__move_mode[channel] = move_mode
+
+    async def stop(self, bus: int, axis: int):
+        """Stoppt den angegebenen Motor."""
+        await self.command_without_reply(self._stop_command(await self.__ch_n(bus, axis)))
+
+    async def get_position(self, bus: int, axis: int) -> float:
+        """Gibt die Position des angegebenen Motors zurück."""
+        return await self.command_with_float_reply(self._POSITION, bus, axis)
+
+    async def set_position(self, new_position: float, bus: int, axis: int):
+        """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
+        await self.command_without_reply(self._set_position_command(new_position), bus, axis)
+
+    async def get_parameter(self, parameter_name: str, bus: int, axis: int) -> float:
+        """Liest den Wert des angegebenen Parameters."""
+        return await self.command_with_float_reply(self._parameter_command(parameter_name), bus, axis)
+
+    async def set_parameter(self, parameter_name: str, neu_value: float, bus: int, axis: int):
+        """Ändert den Wert des angegebenen Parameters."""
+        await self.command_without_reply(self._parameter_command(parameter_name, neu_value), bus, axis)
+
+    async def __get_state(self, bus: int, axis: int) -> int:
+        return await self.command_with_int_reply(self._STATE, bus, axis)
+
+    async def motor_stand(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
+        return not await self.__get_state(bus, axis) & STATE_ACTIVELY_MOVING
+
+    async def snapshot(self, coords: List[Tuple[int, int]] = None) -> Dict[Tuple[int, int], ChannelState]:
+        """Asynchrone Version von MCS2Communicator.snapshot."""
+        coords = list(await self.__channel_table()) if coords is None else list(coords)
+        return self._channel_states(coords, await self.__query_channels(coords, [self._POSITION, self._STATE]))
+
+    async def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] mit einer Abfrage zurück."""
+        return await self.__query_channels(coords, [self._POSITION])
+
+    async def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …] mit einer Abfrage, ob er steht."""
+        return self._stands(await self.__query_channels(coords, [self._STATE]))
+
+    async def __query_channels(self, coords: List[Tuple[int, int]], queries: List[bytes]) -> List[float]:
+        if not coords:
+            return []
+        channels = [await self.__ch_n(bus, axis) for bus, axis in coords]
+        reply = await self.command(chained_query(channels, queries))
+        return split_chained_reply(reply, len(channels) * len(queries))
+
+    async def motor_at_the_beg(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
+        return bool(await self.__get_state(bus, axis) & STATE_END_STOP_REACHED)
+
+    async def motor_at_the_end(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der End-Initiator im Moment aktiviert ist."""
+        return await self.motor_at_the_beg(bus, axis)
+
+    async def bus_list(self) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Bus-Nummern zurück."""
+        n_moduls = await self.command_with_int_reply(self._N_MODULS)
+        return tuple(range(n_moduls))
+
+    async def axes_list(self, bus: int) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Achsen zurück."""
+
+        try:
+            n_axis = await self.command_with_int_reply(self._N_CHANNELS, bus)
+        except ControllerError as err:
+            if self._no_sensor(err):
+                n_axis = 0
+            else:
+                raise err
+        return tuple(range(n_axis))
+
+    async def check_connection(self) -> (bool, bytes):
+        """Prüft ob es bei dem Port tatsächlich ein Controller gibt, und gibt die Version davon zurück."""
+        reply = await self.__command(self._IDENTIFICATION)
+        if reply[:7] == b'SmarAct':
+            return True, reply
+        else:
+            return False, reply
+
+    async def command_to_box(self, command: bytes) -> (bool, Union[bytes, None]):
+        """Ausführt ein Befehl ohne Adressieren und gibt die Antwort zurück."""
+
+        if self.__transaction_owner is asyncio.current_task():
+            return True, await self.__command(command)
+
+        async with self.__mutex3:
+            if self.error_check == 'chained':
+                try:
+                    reply, errors_count = split_errors_count(await self.__command(self._with_errors_count(command)))
+                except ReplyError:
+                    errors = await self.get_errors()
+                    if errors:
+                        return False, errors
+                    raise
+                if errors_count:
+                    return False, self._join_errors(await self.__read_errors(errors_count))
+                return True, reply
+
+            await self.get_errors()
+            reply = await self.__command(command)
+
+            errors = await self.get_errors()
+            if errors:
+                return False, errors
+            else:
+                return True, reply
+
+    async def command_to_modul(self, command: bytes, bus: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Modul adressierte Befehl und gibt die Antwort zurück."""
+        return await self.command_to_box(self._modul_address(command, bus))
+
+    async def command_to_motor(self, command: bytes, bus: int, axis: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
+        return await self.command_to_box(self._channel_address(command, await self.__ch_n(bus, axis)))
+
+    async def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Schickt mehrere Befehle im Format [(Befehl, Bus, Achse), …] mit einem einzigen Schreibvorgang
+        und liest danach die Antworten in derselben Reihenfolge (siehe MCS2Communicator.execute_many).
+        """
+
+        messages = []
+        for command, bus, axis in commands:
+            if axis is None:
+                messages.append(self._modul_address(command, bus))
+            else:
+                messages.append(self._channel_address(command, await self.__ch_n(bus, axis)))
+
+        if self.__transaction_owner is asyncio.current_task():
+            async with self.__mutex1:
+                await self.connector.send_many(messages)
+                return [(True, await self.connector.read() if self._expects_reply(message) else None)
+                        for message in messages]
+
+        async with self.__mutex3:
+            if self.error_check == 'chained':
+                async with self.__mutex1:
+                    await self.connector.send_many([self._with_errors_count(message) for message in messages])
+                    replies = []
+                    for _ in messages:
+                        reply = await self.connector.read()
+                        if reply is None:
+                            break
+                        replies.append(split_errors_count(reply))
+                if len(replies) < len(messages):
+                    errors = await self.__error_list()
+                else:
+                    errors = await self.__read_errors(replies[-1][1] if replies else 0)
+                return self._chained_results(replies, len(messages), errors)
+            else:
+                await self.get_errors()
+                async with self.__mutex1:
+                    await self.connector.send_many(messages)
+                    replies = [await self.connector.read() if self._expects_reply(message) else None
+                               for message in messages]
+
+                errors = await self.get_errors()
+            return self._many_results(replies, errors)
+
+    async def command(self, command: bytes, bus: int = None, axis: int = None) -> Union[bytes, None]:
+        """Ausführt ein Befehl für Motor oder für Controller und gibt die Antwort zurück."""
+        self._warn_ignored_axis(bus, axis)
+        if bus is None:
+            success, reply = await self.command_to_box(command)
+        elif axis is None:
+            success, reply = await self.command_to_modul(command, bus)
+        else:
+            success, reply = await self.command_to_motor(command, bus, axis)
+        return self._command_result(success, reply)
+
+    async def calibrate(self, bus: int, axis: int):
+        """Die standarte Justierungmaßnahmen durchführen, wenn der Kontroller welche unterstützt."""
+        for command in self._calibration_commands(await self.__ch_n(bus, axis)):
+            await self.command_without_reply(command)
+
+
+class MCS2ChannelEmulator:
+    """Ein Kanal (Positioner) des MCS2Emulator. Die Bewegung wird aus der Zeit berechnet,
+    ein eigener Thread wird dafür nicht gebraucht."""
+
+    def __init__(self, box: 'MCS2Emulator'):
+        self.box = box
+        self.parameters = {'MMOD': 0, 'VEL': 0, 'ACC': 0, 'PTYP': 300, 'LSC:INV': 0, 'CAL:OPT': 0}
+        self.__start = 0.0
+        self.__target = 0.0
+        self.__t_start = 0.0
+        self.__t_end = 0.0
+        self.__calibrating = False
+        self.__calibrated = False
+        self.__end_stop = False
+
+    def moving(self) -> bool:
+        return time.monotonic() < self.__t_end
+
+    def remaining_time(self) -> float:
+        return max(0.0, self.__t_end - time.monotonic())
+
+    def get_position(self) -> float:
+        now = time.monotonic()
+        if now >= self.__t_end or self.__calibrating:
+            self.__finish(now)
+            return self.__target
+        return self.__position_at(now)
+
+    def __position_at(self, moment: float) -> float:
+        if moment >= self.__t_end:
+            return self.__target
+        if moment <= self.__t_start:
+            return self.__start
+        part = (moment - self.__t_start) / (self.__t_end - self.__t_start)
+        return self.__start + (self.__target - self.__start) * part
+
+    def set_position(self, position: float):
+        self.__start = self.__target = position
+        self.__t_end = 0.0
+
+    def move(self, value: float):
+        position = self.get_position()
+        target = position + value if self.parameters['MMOD'] else value
+        limit = self.box.range_limit
+        self.__end_stop = abs(target) > limit
+        target = max(-limit, min(limit, target))
+        velocity = self.parameters['VEL'] or self.box.default_velocity
+        self.__start, self.__target = position, target
+        self.__t_start = time.monotonic()
+        self.__t_end = self.__t_start + abs(target - position) / velocity
+
+    def stream_to(self, target: float, t_start: float, duration: float):
+        """Fährt ab t_start in duration Sekunden linear zu target (ein Punkt einer Trajektorie)."""
+        limit = self.box.range_limit
+        self.__start = self.__position_at(t_start)
+        self.__target = max(-limit, min(limit, target))
+        self.__t_start, self.__t_end = t_start, t_start + duration
+        self.__end_stop = False
+
+    def stop(self):
+        position = self.get_position()
+        self.__start = self.__target = position
+        self.__t_end = 0.0
+        self.__calibrating = False
+
+    def calibrate(self):
+        self.__start = self.__target = self.get_position()
+        self.__t_start = time.monotonic()
+        self.__t_end = self.__t_start + self.box.calibration_time
+        self.__calibrating = True
+        self.__calibrated = False
+
+    def state(self) -> int:
+        moving = self.moving()
+        self.__finish(time.monotonic())
+        return (moving | self.__calibrating << 2 | 1 << 5 | self.__calibrated << 6
+                | (self.__end_stop and not moving) << 8)
+
+    def __finish(self, now: float):
+        if now >= self.__t_end and self.__calibrating:
+            self.__calibrating = False
+            self.__calibrated = True
+
+
+class MCS2Emulator(threading.Thread):
+    """Ein lokaler TCP-Server, der einen MCS2 Controller mit n_modules Modulen zu je n_channels Kanälen
+    nachahmt. Es werden die Befehle verstanden, die MCS2Communicator benutzt, auch mehrere durch ';'
+    verkettete Befehle in einer Zeile (die Antworten kommen dann durch ';' getrennt in einer Zeile zurück).
+    Fehlerhafte Befehle landen in der Fehlerschlange (:SYST:ERR:COUN?, :SYST:ERR:NEXT?); mit
+    discard_after_error wird danach der Rest der Zeile samt Antworten verworfen.
+    Eine Verbindung, die :EVENt:NOTify 1 geschickt hat, bekommt am Ende jeder Bewegung oder Kalibrierung
+    die Ereignismeldung 'EVENT Kanal,1,0'.
+
+    Trajektorien: nach :STReam:OPEN werden die Punkte ':STReam:FRAMe Kanal,Position,…' gepuffert
+    (stream_buffer_size Punkte, :STReam:FREE? gibt den freien Platz) und im Takt von :DEV:STReam:BRATe
+    abgefahren, zwischen den Punkten linear. :STReam:CLOSe beendet die Übergabe, :STReam:ABORt bricht ab.
+    Läuft der Puffer vor :STReam:CLOSe leer, wird das in stream_underruns gezählt.
+
+    port=0 wählt einen freien Port, der danach in self.port steht.
+    """
+
+    LONG_NAMES = {'STATE': 'STAT', 'PTYPE': 'PTYP', 'LSCALE': 'LSC', 'INVERSION': 'INV', 'SYSTEM': 'SYST',
+                  'ERROR': 'ERR', 'COUNT': 'COUN', 'DEVICE': 'DEV', 'CHANNEL': 'CHAN', 'MODULE': 'MOD',
+                  'POSITION': 'POS', 'VELOCITY': 'VEL', 'ACCELERATION': 'ACC', 'CALIBRATE': 'CAL',
+                  'OPTIONS': 'OPT', 'EVENT': 'EVEN', 'NOTIFY': 'NOT', 'STREAM': 'STR', 'FRAME': 'FRAM',
+                  'CLOSE': 'CLOS', 'ABORT': 'ABOR', 'BRATE': 'BRAT', 'STATUS': 'STAT'}
+
+    def __init__(self, n_modules: int = 2, n_channels: int = 3, ip: str = 'localhost', port: int = 0):
+        super().__init__(name='MCS2Emulator', daemon=True)
+        self.n_modules = n_modules
+        self.n_channels = n_channels
+        self.range_limit = 10**10  # pm
+        self.default_velocity = 10**10  # pm/s, wenn :VEL 0 ist
+        self.calibration_time = 0.05  # s
+        self.stream_rate = 1000  # Punkte/s
+        self.stream_buffer_size = 256
+        self.stream_underruns = 0
+        self.discard_after_error = False  # wie IEEE 488.2: nach einem Fehler wird der Rest der Zeile verworfen
+
+        self.channels = [MCS2ChannelEmulator(self) for _ in range(n_modules * n_channels)]
+        self.errors: List[str] = []
+        self.lines_received = 0
+        self.events_sent = 0
+        self.__lock = threading.Lock()
+        self.__subscribers: List[Callable[[str], None]] = []
+        self.__moves = [0] * len(self.channels)  # Zähler der Bewegungen, damit veraltete Ereignisse entfallen
+        self.__stream_open = False
+        self.__stream_frames: Deque[List[Tuple[int, float]]] = deque()
+        self.__stream_next = 0.0  # Zeitpunkt des nächsten Punktes
+        self.__stream_channels: Set[int] = set()
+        self.__stop_signal = False
+
+        self.server = socket.create_server((ip, port))
+        self.server.settimeout(0.05)
+        self.ip, self.port = self.server.getsockname()[:2]
+        self.start()
+
+    def run(self):
+        while not self.__stop_signal:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self.__serve, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self.__stop_signal = True
+        self.server.close()
+
+    def __serve(self, conn: socket.socket):
+        conn.settimeout(0.05)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_lock = threading.Lock()
+
+        def send(text: str):
+            with send_lock:
+                conn.sendall(text.encode() + b'\r\n')
+
+        buffer = b''
+        try:
+            with conn:
+                while not self.__stop_signal:
+                    try:
+                        data = conn.recv(4096)
+                    except socket.timeout:
+                        continue
+                    except OSError:
+                        return
+                    if not data:
+                        return
+                    buffer += data
+                    while b'\n' in buffer:
+                        line, buffer = buffer.split(b'\n', 1)
+                        reply = self.execute_line(line.strip().decode(), send)
+                        if reply is not None:
+                            send(reply)
+        finally:
+            with self.__lock:
+                if send in self.__subscribers:
+                    self.__subscribers.remove(send)
+
+    def execute_line(self, line: str, subscriber: Callable[[str], None] = None) -> Union[str, None]:
+        """Führt eine Zeile mit einem oder mehreren durch ';' verketteten Befehlen aus
+        und gibt die Antworten der Abfragen zurück (None, wenn es keine gibt).
+        subscriber schickt eine Zeile an die Verbindung, von der die Befehle kommen (für :EVENt:NOTify)."""
+
+        with self.__lock:
+            self.lines_received += 1
+            self.__advance_stream()
+            replies = []
+            for unit in line.split(';'):
+                if not unit.strip():
+                    continue
+                try:
+                    reply = self.__execute(unit.strip(), subscriber)
+                except (ValueError, IndexError, KeyError):
+                    self.errors.append(f'-100,"Command error: {unit.strip()}"')
+                    if self.discard_after_error:
+                        return None
+                    continue
+                if reply is not None:
+                    replies.append(reply)
+            return ';'.join(replies) if replies else None
+
+    def __execute(self, unit: str, subscriber: Union[Callable[[str], None], None]) -> Union[str, None]:
+        header, _, argument = unit.partition(' ')
+        query = header.endswith('?')
+        header = header.rstrip('?').upper()
+        if header == '*IDN':
+            return 'SmarAct,MCS2 Emulator'
+
+        nodes = []
+        for node in header.strip(':').split(':'):
+            name = node.rstrip('0123456789')
+            suffix = int(node[len(name):]) if len(name) < len(node) else None
+            nodes.append((self.LONG_NAMES.get(name, name), suffix))
+        names = tuple(name for name, _ in nodes)
+
+        if names == ('DEV', 'NOBM') and query:
+            return str(self.n_modules)
+        if names == ('SYST', 'ERR', 'COUN') and query:
+            return str(len(self.errors))
+        if names == ('SYST', 'ERR', 'NEXT') and query:
+            return self.errors.pop(0) if self.errors else '0,"No error"'
+        if names == ('MOD', 'NOMC') and query:
+            if not 0 <= nodes[0][1] < self.n_modules:
+                raise IndexError
+            return str(self.n_channels)
+        if names == ('EVEN', 'NOT'):
+            if query:
+                return str(int(subscriber is not None and subscriber in self.__subscribers))
+            if subscriber is None:
+                raise ValueError(unit)
+            if subscriber in self.__subscribers:
+                self.__subscribers.remove(subscriber)
+            if int(argument):
+                self.__subscribers.append(subscriber)
+            return None
+        if names == ('DEV', 'STR', 'BRAT'):
+            if query:
+                return f'{self.stream_rate:g}'
+            if not float(argument) > 0:
+                raise ValueError(unit)
+            self.stream_rate = float(argument)
+            return None
+        if names[0] == 'STR' and len(names) == 2:
+            return self.__stream_command(names[1], query, argument)
+        if names in (('MOVE',), ('STOP',), ('CAL',)) and not query:
+            index = nodes[0][1]
+            channel = self.channels[index]
+            if names == ('STOP',) and index in self.__stream_channels and \
+                    (self.__stream_open or self.__stream_frames):
+                self.__abort_stream()
+            was_moving = channel.moving()
+            if names == ('MOVE',):
+                channel.move(float(argument))
+            elif names == ('STOP',):
+                channel.stop()
+            else:
+                channel.calibrate()
+            self.__moves[index] += 1
+            if channel.moving():
+                self.__schedule_event(index)
+            elif was_moving or names != ('STOP',):
+                self.__emit_event(index, EVENT_MOVEMENT_FINISHED, 0)
+            return None
+        if names[0] == 'CHAN' and len(names) > 1:
+            return self.__channel_property(self.channels[nodes[0][1]], ':'.join(names[1:]), query, argument)
+        raise ValueError(unit)
+
+    def __stream_command(self, name: str, query: bool, argument: str) -> Union[str, None]:
+        if name == 'FREE' and query:
+            return str(self.stream_buffer_size - len(self.__stream_frames))
+        if name == 'STAT' and query:
+            active = self.__stream_open or self.__stream_frames or \
+                any(self.channels[index].moving() for index in self.__stream_channels)
+            return str(int(bool(active)))
+        if query:
+            raise ValueError(name)
+        if name == 'OPEN' and not self.__stream_open:
+            self.__stream_open = True
+            self.__stream_channels = set()
+        elif name == 'FRAM' and self.__stream_open and len(self.__stream_frames) < self.stream_buffer_size:
+            values = argument.split(',')
+            frame = [(int(values[i]), float(values[i + 1])) for i in range(0, len(values), 2)]
+            for index, _ in frame:
+                if not 0 <= index < len(self.channels):
+                    raise IndexError
+            if not self.__stream_frames and self.__stream_next < time.monotonic():
+                self.__stream_next = time.monotonic()
+            self.__stream_frames.append(frame)
+        elif name == 'CLOS' and self.__stream_open:
+            self.__stream_open = False
+            self.__schedule_stream_end()
+        elif name == 'ABOR':
+            self.__abort_stream()
+        else:
+            raise ValueError(name)
+        return None
+
+    def __advance_stream(self):
+        """Fährt die Punkte der Trajektorie ab, deren Zeit schon gekommen ist."""
+
+        now = time.monotonic()
+        period = 1 / self.stream_rate
+        while self.__stream_frames and self.__stream_next <= now:
+            for index, position in self.__stream_frames.popleft():
+                self.channels[index].stream_to(position, self.__stream_next, period)
+                self.__stream_channels.add(index)
+            self.__stream_next += period
+        if not self.__stream_frames and self.__stream_open and self.__stream_channels \
+                and self.__stream_next < now - period:
+            self.stream_underruns += 1
+            self.__stream_next = now
+
+    def __schedule_stream_end(self):
+        """Nach dem letzten Punkt der Trajektorie die Ereignisse für die beteiligten Kanäle melden."""
+
+        end = self.__stream_next + len(self.__stream_frames) / self.stream_rate
+        timer = threading.Timer(max(0.0, end - time.monotonic()), self.__stream_finished)
+        timer.daemon = True
+        timer.start()
+
+    def __stream_finished(self):
+        with self.__lock:
+            self.__advance_stream()
+            if self.__stream_open:
+                return
+            if self.__stream_frames:
+                self.__schedule_stream_end()
+                return
+            for index in sorted(self.__stream_channels):
+                self.__moves[index] += 1
+                self.__schedule_event(index)
+
+    def __abort_stream(self):
+        self.__stream_open = False
+        self.__stream_frames.clear()
+        for index in self.__stream_channels:
+            self.channels[index].stop()
+
+    def __schedule_event(self, index: int):
+        timer = threading.Timer(self.channels[index].remaining_time(), self.__movement_finished,
+                                (index, self.__moves[index]))
+        timer.daemon = True
+        timer.start()
+
+    def __movement_finished(self, index: int, move: int):
+        with self.__lock:
+            if self.__stop_signal or move != self.__moves[index]:
+                return
+            if self.channels[index].moving():
+                self.__schedule_event(index)
+            else:
+                self.__emit_event(index, EVENT_MOVEMENT_FINISHED, 0)
+
+    def __emit_event(self, channel: int, event_type: int, parameter: int):
+        self.events_sent += 1
+        for send in list(self.__subscribers):
+            try:
+                send(f'EVENT {channel},{event_type},{parameter}')
+            except OSError:
+                self.__subscribers.remove(send)
+
+    @staticmethod
+    def __channel_property(channel: MCS2ChannelEmulator, name: str, query: bool, argument: str) -> Union[str, None]:
+        if name == 'POS':
+            if query:
+                return f'{channel.get_position():.0f}'
+            channel.set_position(float(argument))
+        elif name == 'STAT' and query:
+            return str(channel.state())
+        elif name in channel.parameters:
+            if query:
+                return f'{channel.parameters[name]:g}'
+            channel.parameters[name] = int(float(argument))
+        else:
+            raise ValueError(name)
+        return None
+
+
 # class MCC2BoxEmulator(SerialEmulator, ContrCommunicator):
 #
 #     PARAMETER_NUMBER = deepcopy(MCC2Communicator.PARAMETER_NUMBER)
@@ -2,7 +2,7 @@
 import platform
 import threading
 from motor_controller.interface import *
-from motor_controller.interface import ContrCommunicator
+from motor_controller.interface import ContrCommunicator, trapezoid_move_time
 
 if platform.system() == 'Windows':
     import thorlabs_apt as apt
@@ -112,6 +112,11 @@ class TDC001Communicator(ContrCommunicator):
         self.apt_motor[axis].set_velocity_parameters(0, parameters["accn"], parameters["max_vel"])
         self.parameters[axis] = parameters
 
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        """Schätzt die Fahrzeit (in s) aus max_vel und accn (Trapezprofil)."""
+
+        return trapezoid_move_time(distance, parameters.get('max_vel'), parameters.get('accn'))
+
     def motor_stand(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
 
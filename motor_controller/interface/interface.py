@@ -1,16 +1,24 @@
+import asyncio
 import concurrent.futures
+import contextlib
+import inspect
+import itertools
 import csv
+import json
 import logging
+import re
 import socket
-import telnetlib
 import threading
 import time
+import warnings
+from collections.abc import MutableMapping
 from copy import deepcopy
-from typing import Dict, List, Tuple, Union, Set, Callable, Iterable
+from typing import Dict, List, Tuple, Union, Set, Callable, Iterable, AsyncIterator
+import numpy as np
 import pandas as pd
 
 import serial.tools.list_ports
-from math import isclose
+from math import isclose, sqrt
 from serial import Serial
 
 import logscolor
@@ -31,25 +39,20 @@ class Connector:
     def reply_format(self, reply: bytes) -> Union[bytes, None]:
         if reply == b'':
             return None
-        f_reply = deepcopy(reply)
-        err = ReplyError(f'Unerwartete Antwort: "{reply}"')
-
-        if self.beg_symbol:
-            if reply[:len(self.beg_symbol)] == self.beg_symbol:
-                f_reply = f_reply[len(self.beg_symbol):]
-            else:
-                raise err
-        if self.end_symbol:
-            if reply[-len(self.end_symbol):] == self.end_symbol:
-                f_reply = f_reply[:-len(self.end_symbol)]
-            else:
-                raise err
-        return f_reply
+        if not reply.startswith(self.beg_symbol) or not reply.endswith(self.end_symbol):
+            raise ReplyError(f'Unerwartete Antwort: "{reply}"')
+        return reply[len(self.beg_symbol):len(reply) - len(self.end_symbol)]
 
     def send(self, message: bytes, clear_buffer=True):
         """Schickt ein Nachricht zum Controller."""
         raise NotImplementedError
 
+    def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten nacheinander zum Controller."""
+
+        for i, message in enumerate(messages):
+            self.send(message, clear_buffer and i == 0)
+
     def read(self) -> Union[bytes, None]:
         """Liest ein Nachricht von dem Controller bis zum End-Symbol oder bis zum maximale Anzahl von Bytes
          und gibt das zurück."""
@@ -72,6 +75,103 @@ class Connector:
         raise NotImplementedError
 
 
+class FrameDecoder:
+    """Zerlegt einen empfangenen Byte-Strom inkrementell in Nachrichten zwischen beg_symbol und end_symbol.
+
+    Die Daten liegen in einem bytearray mit Lese- und Schreibposition. Neue Daten werden
+    direkt in den freien Teil davon geschrieben (fill) und die fertigen Nachrichten werden über
+    memoryview herausgeschnitten, so dass pro Nachricht nur die Antwort selbst kopiert wird.
+    Der gelesene Anfang des Buffers wird erst dann freigegeben, wenn der Platz am Ende nicht reicht.
+    """
+
+    def __init__(self, beg_symbol: bytes = b'', end_symbol: bytes = b'\n', size: int = 4096):
+        if not end_symbol:
+            raise ValueError('end_symbol darf nicht leer sein!')
+        self.beg_symbol = beg_symbol
+        self.end_symbol = end_symbol
+        self.__buffer = bytearray(size)
+        self.__start = 0  # Anfang der noch nicht gelesenen Daten
+        self.__end = 0  # Ende der empfangenen Daten
+        self.__search = 0  # ab hier wird nach dem End-Symbol gesucht
+
+    def __len__(self) -> int:
+        return self.__end - self.__start
+
+    def feed(self, data: bytes):
+        """Fügt die empfangene Daten in den Buffer hinzu."""
+
+        n = len(data)
+        self.__reserve(n)
+        self.__buffer[self.__end:self.__end + n] = data
+        self.__end += n
+
+    def fill(self, read_into: Callable[[memoryview], int], min_free: int = 1024) -> int:
+        """Liest die Daten durch read_into (z.B. socket.recv_into) direkt in den freien Teil des Buffers.
+        Gibt die Anzahl der gelesenen Bytes zurück.
+        """
+
+        self.__reserve(min_free)
+        with memoryview(self.__buffer) as view, view[self.__end:] as free:
+            n = read_into(free)
+        if n:
+            self.__end += n
+        return n or 0
+
+    def next_frame(self) -> Union[bytes, None]:
+        """Gibt die nächste vollständige Nachricht ohne beg_symbol und end_symbol zurück,
+        oder None, wenn es noch keine gibt.
+        """
+
+        i = self.__buffer.find(self.end_symbol, self.__search, self.__end)
+        if i == -1:
+            self.__search = max(self.__start, self.__end - len(self.end_symbol) + 1)
+            return None
+
+        frame_end = i + len(self.end_symbol)
+        start = self.__start
+        self.__start = self.__search = frame_end
+        if self.__start == self.__end:
+            self.__start = self.__end = self.__search = 0
+
+        if not self.__buffer.startswith(self.beg_symbol, start, i):
+            raise ReplyError(f'Unerwartete Antwort: "{bytes(self.__buffer[start:frame_end])}"')
+        with memoryview(self.__buffer) as view, view[start + len(self.beg_symbol):i] as frame:
+            return bytes(frame)
+
+    def frames(self) -> Iterable[bytes]:
+        """Gibt nacheinander alle vollständige Nachrichten aus dem Buffer zurück."""
+
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
+
+    def flush(self) -> bytes:
+        """Gibt alle restliche (unvollständige) Daten zurück und leert den Buffer."""
+
+        rest = bytes(self.__buffer[self.__start:self.__end])
+        self.clear()
+        return rest
+
+    def clear(self):
+        """Löscht alle Daten aus dem Buffer."""
+
+        self.__start = self.__end = self.__search = 0
+
+    def __reserve(self, n: int):
+        """Sorgt dafür, dass am Ende des Buffers Platz für n Bytes gibt."""
+
+        if len(self.__buffer) - self.__end >= n:
+            return
+        length = self.__end - self.__start
+        if self.__start:
+            self.__buffer[:length] = self.__buffer[self.__start:self.__end]
+            self.__search -= self.__start
+            self.__start, self.__end = 0, length
+        if len(self.__buffer) - self.__end < n:
+            self.__buffer.extend(bytes(max(n, len(self.__buffer))))
+
+
 def com_list() -> List[str]:
     """Gibt eine Liste der verfügbaren COM-Ports"""
 
@@ -93,6 +193,13 @@ class SerialEmulator:
     def read_until(self, end_symbol: bytes) -> bytes:
         raise NotImplementedError
 
+    def read(self, size: int = 1) -> bytes:
+        raise NotImplementedError
+
+    @property
+    def in_waiting(self) -> int:
+        raise NotImplementedError
+
     # noinspection PyPep8Naming
     def flushInput(self):
         raise NotImplementedError
@@ -117,8 +224,10 @@ class SerialConnector(Connector):
             raise ValueError('Port muss angegeben werden!')
         else:
             self.ser = Serial(port, baudrate, timeout=timeout)
+        self.baudrate = baudrate
         self.beg_symbol = beg_symbol
         self.end_symbol = end_symbol
+        self.__decoder = FrameDecoder(beg_symbol, end_symbol)
 
     def send(self, message: bytes, clear_buffer=True):
         """Schickt ein Nachricht zum Controller."""
@@ -127,14 +236,33 @@ class SerialConnector(Connector):
             self.clear_buffer()
         self.ser.write(self.message_format(message))
 
+    def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten zum Controller mit einem einzigen Schreibvorgang."""
+
+        if clear_buffer:
+            self.clear_buffer()
+        self.ser.write(b''.join(map(self.message_format, messages)))
+
     def read(self) -> Union[bytes, None]:
-        """Liest ein Nachricht von dem Controller bis zum bestimmten End-Symbol und gibt das zurück."""
+        """Liest ein Nachricht von dem Controller bis zum bestimmten End-Symbol und gibt das zurück.
+
+        Es wird immer alles gelesen, was im Moment angekommen ist, und die weiteren Nachrichten
+        bleiben im Buffer für die nächsten Aufrufe.
+        """
 
-        return self.reply_format(self.ser.read_until(self.end_symbol))
+        frame = self.__decoder.next_frame()
+        while frame is None:
+            data = self.ser.read(max(1, self.ser.in_waiting))
+            if not data:
+                return self.reply_format(self.__decoder.flush())
+            self.__decoder.feed(data)
+            frame = self.__decoder.next_frame()
+        return frame
 
     def clear_buffer(self):
         """Löscht alle vorher empfangene information aus Buffer"""
 
+        self.__decoder.clear()
         self.ser.flushInput()
 
     def set_timeout(self, timeout: float):
@@ -153,36 +281,90 @@ class SerialConnector(Connector):
 
 
 class EthernetConnector(Connector):
-    """Connector Objekt für eine Verbindung durch Ethernet."""
+    """Connector Objekt für eine Verbindung durch Ethernet.
 
-    def __init__(self, ip: str, port: int, timeout: float = 1, reply_delay: float = 0.002,
+    Die Verbindung läuft über ein rohes TCP-Socket mit TCP_NODELAY, damit kurze Befehle sofort
+    verschickt werden. Die empfangene Daten werden blockweise direkt in den Buffer eines
+    FrameDecoder gelesen, aus dem die Nachrichten bis zum End-Symbol herausgeschnitten werden.
+    reply_delay wird nicht mehr gebraucht und nur noch aus Kompatibilität angenommen (veraltet).
+    """
+
+    def __init__(self, ip: str, port: int, timeout: float = 1, reply_delay: float = None,
                  beg_symbol: bytes = b'', end_symbol: bytes = b'\r\n'):
-        self.tn = telnetlib.Telnet(ip, port, timeout=timeout)
+        if reply_delay is not None:
+            warnings.warn('reply_delay wird ignoriert, die Antworten werden ohne Verzögerung gelesen.',
+                          DeprecationWarning, stacklevel=2)
+        self.ip = ip
+        self.port = int(port)
+        self.sock = socket.create_connection((ip, self.port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self.__timeout = timeout
-        self.reply_delay = reply_delay
         self.beg_symbol = beg_symbol
         self.end_symbol = end_symbol
+        self.__decoder = FrameDecoder(beg_symbol, end_symbol)
 
     def send(self, message: bytes, clear_buffer=True):
         """Schickt ein Nachricht zum Controller."""
         if clear_buffer:
             self.clear_buffer()
-        self.tn.write(self.message_format(message))
-        # print(self.message_format(message))
+        self.sock.sendall(self.message_format(message))
+
+    def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten zum Controller mit einem einzigen Schreibvorgang."""
+
+        if clear_buffer:
+            self.clear_buffer()
+        self.sock.sendall(b''.join(map(self.message_format, messages)))
+
+    def read(self) -> Union[bytes, None]:
+        """Liest ein Nachricht von dem Controller bis zum End-Symbol und gibt das zurück.
+        Wenn das End-Symbol bis zum Time-out nicht gekommen ist, wird alles bisher Empfangene zurückgegeben.
+        """
 
-    def read(self) -> bytes:
-        """Liest ein Nachricht von dem Controller und gibt das zurück."""
-        return self.reply_format(self.tn.read_until(self.end_symbol, self.__timeout))
+        frame = self.__decoder.next_frame()
+        if frame is not None:
+            return frame
+
+        deadline = time.monotonic() + self.__timeout
+        try:
+            while frame is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self.reply_format(self.__decoder.flush())
+                self.sock.settimeout(remaining)
+                try:
+                    n = self.__decoder.fill(self.sock.recv_into)
+                except socket.timeout:
+                    return self.reply_format(self.__decoder.flush())
+                if not n:
+                    raise ConnectError('Die Verbindung wurde vom Controller geschlossen.')
+                frame = self.__decoder.next_frame()
+            return frame
+        finally:
+            self.sock.settimeout(self.__timeout)
 
     def clear_buffer(self):
         """Löscht alle vorher empfangene information aus Buffer"""
-        time.sleep(self.reply_delay)
-        self.tn.read_very_eager()
+
+        timeout = self.sock.gettimeout()
+        self.sock.settimeout(0)
+        try:
+            while True:
+                self.__decoder.clear()
+                try:
+                    n = self.__decoder.fill(self.sock.recv_into)
+                except (BlockingIOError, InterruptedError, socket.timeout):
+                    break
+                if not n:
+                    break
+            self.__decoder.clear()
+        finally:
+            self.sock.settimeout(timeout)
 
     def set_timeout(self, timeout: float):
         """Stellt das Time-out ein"""
-        self.tn.timeout = timeout
         self.__timeout = timeout
+        self.sock.settimeout(timeout)
 
     def get_timeout(self) -> float:
         """Gibt den Wert des Time-outs zurück"""
@@ -190,7 +372,278 @@ class EthernetConnector(Connector):
 
     def close(self):
         """Führt alle nötige Aktivitäten am Ende der Arbeit durch."""
-        self.tn.close()
+        self.sock.close()
+
+
+class AsyncConnector:
+    """Asynchrones Gegenstück zu Connector: alle Ein-/Ausgabe-Methoden sind Koroutinen,
+    so dass eine Ereignisschleife viele Controller gleichzeitig bedienen kann.
+    """
+
+    beg_symbol: bytes
+    end_symbol: bytes
+
+    message_format = Connector.message_format
+    reply_format = Connector.reply_format
+
+    async def send(self, message: bytes, clear_buffer=True):
+        """Schickt ein Nachricht zum Controller."""
+        raise NotImplementedError
+
+    async def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten nacheinander zum Controller."""
+
+        for i, message in enumerate(messages):
+            await self.send(message, clear_buffer and i == 0)
+
+    async def read(self) -> Union[bytes, None]:
+        """Liest ein Nachricht von dem Controller bis zum End-Symbol und gibt das zurück."""
+        raise NotImplementedError
+
+    async def clear_buffer(self):
+        """Löscht alle vorher empfangene information aus Buffer"""
+        raise NotImplementedError
+
+    def set_timeout(self, timeout: float):
+        """Stellt das Time-out ein"""
+        raise NotImplementedError
+
+    def get_timeout(self) -> float:
+        """Gibt den Wert des Time-outs zurück"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Führt alle nötige Aktivitäten am Ende der Arbeit durch."""
+        raise NotImplementedError
+
+
+class AsyncSerialConnector(AsyncConnector):
+    """AsyncConnector Objekt für eine Verbindung durch Serial Port.
+
+    Der Port wird ohne Time-out (nicht blockierend) geöffnet. Wenn keine Daten da sind, wartet read auf
+    dem Dateideskriptor des Ports (loop.add_reader). Wo das nicht geht (Windows, Emulator), wird
+    der Port alle poll_interval Sekunden abgefragt.
+    """
+
+    poll_interval: float = 0.002
+
+    def __init__(self,
+                 port: str = '',
+                 beg_symbol: bytes = b'',
+                 end_symbol: bytes = b'\n',
+                 timeout: float = 0.2,
+                 baudrate: float = 115200,
+                 emulator: SerialEmulator = None):
+        if emulator is not None:
+            self.ser = emulator
+        elif not port:
+            raise ValueError('Port muss angegeben werden!')
+        else:
+            self.ser = Serial(port, baudrate, timeout=0)
+        self.baudrate = baudrate
+        self.beg_symbol = beg_symbol
+        self.end_symbol = end_symbol
+        self.__timeout = timeout
+        self.__decoder = FrameDecoder(beg_symbol, end_symbol)
+
+    async def send(self, message: bytes, clear_buffer=True):
+        """Schickt ein Nachricht zum Controller."""
+
+        if clear_buffer:
+            await self.clear_buffer()
+        self.ser.write(self.message_format(message))
+
+    async def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten zum Controller mit einem einzigen Schreibvorgang."""
+
+        if clear_buffer:
+            await self.clear_buffer()
+        self.ser.write(b''.join(map(self.message_format, messages)))
+
+    async def read(self) -> Union[bytes, None]:
+        """Liest ein Nachricht von dem Controller bis zum End-Symbol und gibt das zurück.
+        Wenn das End-Symbol bis zum Time-out nicht gekommen ist, wird alles bisher Empfangene zurückgegeben.
+        """
+
+        frame = self.__decoder.next_frame()
+        if frame is not None:
+            return frame
+
+        deadline = time.monotonic() + self.__timeout
+        while frame is None:
+            n = self.ser.in_waiting
+            if n:
+                self.__decoder.feed(self.ser.read(n))
+                frame = self.__decoder.next_frame()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return self.reply_format(self.__decoder.flush())
+            await self.__wait_readable(remaining)
+        return frame
+
+    async def __wait_readable(self, timeout: float):
+        """Wartet, bis im Port neue Daten ankommen, aber nicht länger als timeout."""
+
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, OSError):
+            await asyncio.sleep(min(timeout, self.poll_interval))
+            return
+
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        try:
+            loop.add_reader(fd, readable.set_result, None)
+        except NotImplementedError:
+            await asyncio.sleep(min(timeout, self.poll_interval))
+            return
+        try:
+            await asyncio.wait_for(readable, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(fd)
+
+    async def clear_buffer(self):
+        """Löscht alle vorher empfangene information aus Buffer"""
+
+        self.__decoder.clear()
+        self.ser.flushInput()
+
+    def set_timeout(self, timeout: float):
+        """Stellt das Time-out ein"""
+
+        self.__timeout = timeout
+
+    def get_timeout(self) -> float:
+        """Gibt den Wert des Time-outs zurück"""
+
+        return self.__timeout
+
+    async def close(self):
+        """Führt alle nötige Aktivitäten am Ende der Arbeit durch."""
+        self.ser.close()
+
+
+class _FrameProtocol(asyncio.Protocol):
+    """asyncio-Protokoll, das die empfangene Daten direkt in einen FrameDecoder schreibt."""
+
+    def __init__(self, decoder: FrameDecoder):
+        self.decoder = decoder
+        self.received = asyncio.Event()
+        self.closed = False
+
+    def data_received(self, data: bytes):
+        self.decoder.feed(data)
+        self.received.set()
+
+    def connection_lost(self, exc: Union[Exception, None]):
+        self.closed = True
+        self.received.set()
+
+
+class AsyncEthernetConnector(AsyncConnector):
+    """AsyncConnector Objekt für eine Verbindung durch Ethernet.
+
+    Die TCP-Verbindung wird beim ersten Senden oder Lesen geöffnet, damit das Objekt auch
+    außerhalb der Ereignisschleife erstellt werden kann. Die empfangene Daten landen über ein
+    asyncio-Protokoll direkt im FrameDecoder.
+    """
+
+    def __init__(self, ip: str, port: int, timeout: float = 1,
+                 beg_symbol: bytes = b'', end_symbol: bytes = b'\r\n'):
+        self.ip = ip
+        self.port = int(port)
+        self.__timeout = timeout
+        self.beg_symbol = beg_symbol
+        self.end_symbol = end_symbol
+        self.__decoder = FrameDecoder(beg_symbol, end_symbol)
+        self.__transport: Union[asyncio.Transport, None] = None
+        self.__protocol: Union[_FrameProtocol, None] = None
+
+    async def connect(self):
+        """Öffnet die Verbindung, falls sie noch nicht offen ist."""
+
+        if self.__transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            self.__transport, self.__protocol = await asyncio.wait_for(
+                loop.create_connection(lambda: _FrameProtocol(self.__decoder), self.ip, self.port),
+                self.__timeout)
+        except (OSError, asyncio.TimeoutError) as err:
+            raise ConnectError(f'Keine Verbindung mit {self.ip}:{self.port}: {err}')
+        sock = self.__transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    async def send(self, message: bytes, clear_buffer=True):
+        """Schickt ein Nachricht zum Controller."""
+
+        await self.send_many([message], clear_buffer)
+
+    async def send_many(self, messages: List[bytes], clear_buffer=True):
+        """Schickt mehrere Nachrichten zum Controller mit einem einzigen Schreibvorgang."""
+
+        await self.connect()
+        if clear_buffer:
+            await self.clear_buffer()
+        self.__transport.write(b''.join(map(self.message_format, messages)))
+
+    async def read(self) -> Union[bytes, None]:
+        """Liest ein Nachricht von dem Controller bis zum End-Symbol und gibt das zurück.
+        Wenn das End-Symbol bis zum Time-out nicht gekommen ist, wird alles bisher Empfangene zurückgegeben.
+        """
+
+        frame = self.__decoder.next_frame()
+        if frame is not None:
+            return frame
+
+        await self.connect()
+        deadline = time.monotonic() + self.__timeout
+        while frame is None:
+            if self.__protocol.closed:
+                raise ConnectError('Die Verbindung wurde vom Controller geschlossen.')
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return self.reply_format(self.__decoder.flush())
+            self.__protocol.received.clear()
+            try:
+                await asyncio.wait_for(self.__protocol.received.wait(), remaining)
+            except asyncio.TimeoutError:
+                return self.reply_format(self.__decoder.flush())
+            frame = self.__decoder.next_frame()
+        return frame
+
+    async def clear_buffer(self):
+        """Löscht alle vorher empfangene information aus Buffer"""
+
+        self.__decoder.clear()
+
+    def set_timeout(self, timeout: float):
+        """Stellt das Time-out ein"""
+        self.__timeout = timeout
+
+    def get_timeout(self) -> float:
+        """Gibt den Wert des Time-outs zurück"""
+        return self.__timeout
+
+    async def close(self):
+        """Führt alle nötige Aktivitäten am Ende der Arbeit durch."""
+
+        if self.__transport is not None:
+            self.__transport.close()
+            self.__transport = self.__protocol = None
+
+
+_poller_creation_lock = threading.Lock()
+
+
+def _default_poll_interval(connector) -> float:
+    """Über eine serielle Schnittstelle wird wie früher alle 0.1 s abgefragt, sonst alle 5 ms."""
+
+    return 0.1 if isinstance(connector, (SerialConnector, AsyncSerialConnector)) else 0.005
 
 
 class ContrCommunicator:
@@ -200,6 +653,12 @@ class ContrCommunicator:
     PARAMETER_DEFAULT: Dict
     tolerance: float  # Für diese Controller akzeptabele Abweichung bei Positionierung der Motoren (in Controller Einheiten)
     calibration_shift: float
+    # Ohne geschätzte Fahrzeit wird der Status erst so viele Sekunden nach dem Fahrbefehl abgefragt,
+    # damit der Motor nicht als stehend gilt, bevor er überhaupt losgefahren ist.
+    settle_time: float = 0.1
+
+    __bus_list: Union[Tuple[int], None] = None  # Zwischenspeicher für cached_bus_list
+    __axes_lists: Union[Dict[int, Tuple[int]], None] = None  # Zwischenspeicher für cached_axes_list
 
     def go(self, shift: float, bus: int, axis: int):
         """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
@@ -213,10 +672,46 @@ class ContrCommunicator:
         """Stoppt den angegebenen Motor."""
         raise NotImplementedError
 
+    def cached_bus_list(self) -> Tuple[int]:
+        """Wie bus_list, aber der Controller wird nur einmal pro Sitzung (bis invalidate_topology) abgefragt."""
+
+        if self.__bus_list is None:
+            self.__bus_list = tuple(self.bus_list())
+        return self.__bus_list
+
+    def cached_axes_list(self, bus: int) -> Tuple[int]:
+        """Wie axes_list, aber jeder Controller wird nur einmal pro Sitzung (bis invalidate_topology) abgefragt."""
+
+        if self.__axes_lists is None:
+            self.__axes_lists = {}
+        if bus not in self.__axes_lists:
+            self.__axes_lists[bus] = tuple(self.axes_list(bus))
+        return self.__axes_lists[bus]
+
+    def invalidate_topology(self):
+        """Vergisst die gespeicherten Bus- und Achsenlisten, z.B. nach dem Anschließen eines Controllers.
+        Die nächsten cached_bus_list und cached_axes_list fragen die Controller wieder ab."""
+
+        self.__bus_list = None
+        self.__axes_lists = None
+
+    def stop_motors(self, coords: List[Tuple[int, int]]):
+        """Stoppt alle Motoren aus der Liste [(bus, Achse), …].
+        Die Communicators, deren Controller es erlauben, schicken alle Stop-Befehle auf einmal."""
+
+        for bus, axis in coords:
+            self.stop(bus, axis)
+
     def get_position(self, bus: int, axis: int) -> float:
         """Gibt die Position des angegebenen Motors zurück."""
         raise NotImplementedError
 
+    def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] zurück.
+        Die Communicators, deren Controller es erlauben, fragen alle Motoren auf einmal ab."""
+
+        return [self.get_position(bus, axis) for bus, axis in coords]
+
     def set_position(self, new_position: float, bus: int, axis: int):
         """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
         raise NotImplementedError
@@ -233,6 +728,41 @@ class ContrCommunicator:
         """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
         raise NotImplementedError
 
+    def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …], ob er im Moment steht(True) oder fährt(False).
+        Die Communicators, deren Controller es erlauben, fragen alle Motoren auf einmal ab."""
+
+        return [self.motor_stand(bus, axis) for bus, axis in coords]
+
+    @property
+    def poll_interval(self) -> float:
+        """Abstand (s) der Statusabfragen beim Warten auf den Stop (s. StatusPoller)."""
+        return _default_poll_interval(getattr(self, 'connector', None))
+
+    def status_poller(self) -> 'StatusPoller':
+        """Gibt den (einzigen) StatusPoller dieses Communicators zurück."""
+
+        with _poller_creation_lock:
+            poller = getattr(self, '_status_poller', None)
+            if poller is None:
+                poller = self._status_poller = StatusPoller(self)
+        return poller
+
+    def estimate_move_time(self, distance: float, parameters: Dict[str, float]) -> Union[float, None]:
+        """Schätzt, wie viele Sekunden ein Motor mit den angegebenen Parametern für die Strecke distance
+        (in Controller Einheiten) braucht. None, wenn sich das nicht schätzen lässt."""
+
+        return None
+
+    def stream_trajectory(self, frames: List[Dict[Tuple[int, int], float]], rate: float = None,
+                          stop_indicator: 'StopIndicator' = None) -> bool:
+        """Übergibt die Punkte frames [{(bus, Achse): Position}, …] (in Controller Einheiten) als Trajektorie
+        an den Controller, der sie selbst im Takt von rate Punkten/s abfährt (None = eingestellter Takt),
+        und wartet bis zum Ende. Gibt False zurück, wenn das durch stop_indicator abgebrochen wurde.
+        Nur die Communicators, deren Controller Trajektorien unterstützen, implementieren das."""
+
+        raise NotSupportedError('Der Controller unterstützt keine Trajektorien.')
+
     def motor_at_the_beg(self, bus: int, axis: int) -> bool:
         """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
         raise NotImplementedError
@@ -245,7 +775,7 @@ class ContrCommunicator:
         """Prüft ob ein Modul mit angegebenen Bus-Nummer vorhanden/verbunden ist. Gibt ein bool-Wert
         und ein Nachricht zurück, falls kein Modul gefunden wurde."""
 
-        if bus in self.bus_list():
+        if bus in self.cached_bus_list():
             return True, ""
         else:
             return False, f"Bus {bus} ist nicht vorhanden."
@@ -274,6 +804,23 @@ class ContrCommunicator:
         """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
         raise NotImplementedError
 
+    def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Ausführt mehrere Befehle im Format [(Befehl, Bus, Achse), …] und gibt die Antworten
+        in derselben Reihenfolge zurück. Wenn Achse None ist, wird der Befehl zum Modul adressiert.
+
+        Hier werden die Befehle einfach nacheinander ausgeführt. Die Communicators, deren Controller es erlauben,
+        schicken alle Befehle auf einmal und lesen danach die Antworten (Pipelining).
+        """
+
+        replies = []
+        for command, bus, axis in commands:
+            if axis is None:
+                replies.append(self.command_to_modul(command, bus))
+            else:
+                replies.append(self.command_to_motor(command, bus, axis))
+        return replies
+
     def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
         """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
         raise NotImplementedError
@@ -283,6 +830,209 @@ class ContrCommunicator:
         pass
 
 
+class AsyncContrCommunicator:
+    """Asynchrones Gegenstück zu ContrCommunicator. Alle Methoden, die mit dem Controller kommunizieren,
+    sind Koroutinen und blockieren die Ereignisschleife nicht, während auf die Antwort gewartet wird."""
+
+    PARAMETER_DEFAULT: Dict
+    tolerance: float  # Für diese Controller akzeptabele Abweichung bei Positionierung der Motoren (in Controller Einheiten)
+    calibration_shift: float
+    settle_time: float = ContrCommunicator.settle_time  # s. ContrCommunicator.settle_time
+
+    async def go(self, shift: float, bus: int, axis: int):
+        """Verschiebt den angegeben Motor um die angegebene Verschiebung."""
+        raise NotImplementedError
+
+    async def go_to(self, destination: float, bus: int, axis: int):
+        """Schickt den angegeben Motor zur angegebene absolute Position."""
+        raise NotImplementedError
+
+    async def stop(self, bus: int, axis: int):
+        """Stoppt den angegebenen Motor."""
+        raise NotImplementedError
+
+    async def stop_motors(self, coords: List[Tuple[int, int]]):
+        """Stoppt alle Motoren aus der Liste [(bus, Achse), …]."""
+
+        for bus, axis in coords:
+            await self.stop(bus, axis)
+
+    async def get_position(self, bus: int, axis: int) -> float:
+        """Gibt die Position des angegebenen Motors zurück."""
+        raise NotImplementedError
+
+    async def get_positions(self, coords: List[Tuple[int, int]]) -> List[float]:
+        """Gibt die Positionen aller Motoren aus der Liste [(bus, Achse), …] zurück."""
+
+        return [await self.get_position(bus, axis) for bus, axis in coords]
+
+    async def set_position(self, new_position: float, bus: int, axis: int):
+        """Ändert den Wert des Positionzählers im Controller für die angegebene Achse."""
+        raise NotImplementedError
+
+    async def get_parameter(self, parameter_name: str, bus: int, axis: int) -> float:
+        """Liest den Wert des angegebenen Parameters."""
+        raise NotImplementedError
+
+    async def set_parameter(self, parameter_name: str, neu_value: float, bus: int, axis: int):
+        """Ändert den Wert des angegebenen Parameters."""
+        raise NotImplementedError
+
+    async def motor_stand(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Motor im Moment steht(True) oder fährt(False)."""
+        raise NotImplementedError
+
+    async def motors_stand(self, coords: List[Tuple[int, int]]) -> List[bool]:
+        """Zeigt für jeden Motor aus der Liste [(bus, Achse), …], ob er im Moment steht(True) oder fährt(False)."""
+
+        return [await self.motor_stand(bus, axis) for bus, axis in coords]
+
+    @property
+    def poll_interval(self) -> float:
+        """Abstand (s) der Statusabfragen beim Warten auf den Stop (s. AsyncStatusPoller)."""
+        return _default_poll_interval(getattr(self, 'connector', None))
+
+    def status_poller(self) -> 'AsyncStatusPoller':
+        """Gibt den (einzigen) AsyncStatusPoller dieses Communicators zurück."""
+
+        poller = getattr(self, '_status_poller', None)
+        if poller is None:
+            poller = self._status_poller = AsyncStatusPoller(self)
+        return poller
+
+    async def motor_at_the_beg(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der Anfang-Initiator im Moment aktiviert ist."""
+        raise NotImplementedError
+
+    async def motor_at_the_end(self, bus: int, axis: int) -> bool:
+        """Zeigt, ob der End-Initiator im Moment aktiviert ist."""
+        raise NotImplementedError
+
+    async def bus_check(self, bus: int) -> (bool, str):
+        """Prüft ob ein Modul mit angegebenen Bus-Nummer vorhanden/verbunden ist. Gibt ein bool-Wert
+        und ein Nachricht zurück, falls kein Modul gefunden wurde."""
+
+        if bus in await self.bus_list():
+            return True, ""
+        else:
+            return False, f"Bus {bus} ist nicht vorhanden."
+
+    async def bus_list(self) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Bus-Nummern zurück."""
+        raise NotImplementedError
+
+    async def axes_list(self, bus: int) -> Tuple[int]:
+        """Gibt die Liste der allen verfügbaren Achsen zurück."""
+        raise NotImplementedError
+
+    async def check_connection(self) -> (bool, bytes):
+        """Prüft ob es bei dem Port tatsächlich ein Controller gibt, und gibt die Version davon zurück."""
+        raise NotImplementedError
+
+    async def command_to_box(self, command: bytes) -> (bool, Union[bytes, None]):
+        """Ausführt ein Befehl ohne Adressieren und gibt die Antwort zurück."""
+        raise NotImplementedError
+
+    async def command_to_modul(self, command: bytes, bus: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Modul adressierte Befehl und gibt die Antwort zurück."""
+        raise NotImplementedError
+
+    async def command_to_motor(self, command: bytes, bus: int, axis: int) -> (bool, Union[bytes, None]):
+        """Ausführt ein zum Motor adressierte Befehl und gibt die Antwort zurück."""
+        raise NotImplementedError
+
+    async def execute_many(self, commands: List[Tuple[bytes, int, Union[int, None]]]) \
+            -> List[Tuple[bool, Union[bytes, None]]]:
+        """Ausführt mehrere Befehle im Format [(Befehl, Bus, Achse), …] und gibt die Antworten
+        in derselben Reihenfolge zurück. Wenn Achse None ist, wird der Befehl zum Modul adressiert.
+        """
+
+        replies = []
+        for command, bus, axis in commands:
+            if axis is None:
+                replies.append(await self.command_to_modul(command, bus))
+            else:
+                replies.append(await self.command_to_motor(command, bus, axis))
+        return replies
+
+    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
+        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
+        raise NotImplementedError
+
+    async def calibrate(self, bus: int, axis: int):
+        """Die standarte Justierungmaßnahmen durchführen, wenn der Kontroller welche unterstützt."""
+        pass
+
+
+def _in_thread(method_name: str):
+    """Macht eine Koroutine, die die gleichnamige Methode des synchronen Communicators in einem Thread ausführt."""
+
+    async def method(self, *args):
+        return await asyncio.to_thread(getattr(self.communicator, method_name), *args)
+
+    method.__name__ = method_name
+    method.__doc__ = getattr(ContrCommunicator, method_name).__doc__
+    return method
+
+
+class ThreadedAsyncCommunicator(AsyncContrCommunicator):
+    """AsyncContrCommunicator, der die Befehle über einen synchronen ContrCommunicator in einem Thread ausführt.
+
+    Wird benutzt, wenn für einen Controller kein nativer asynchroner Communicator angegeben ist,
+    damit die asynchrone API von Motor und MotorsCluster mit jedem Controller funktioniert.
+    """
+
+    def __init__(self, communicator: ContrCommunicator):
+        self.communicator = communicator
+
+    @property
+    def PARAMETER_DEFAULT(self) -> Dict:
+        return self.communicator.PARAMETER_DEFAULT
+
+    @property
+    def tolerance(self) -> float:
+        return self.communicator.tolerance
+
+    @property
+    def calibration_shift(self) -> float:
+        return self.communicator.calibration_shift
+
+    @property
+    def settle_time(self) -> float:
+        return self.communicator.settle_time
+
+    @property
+    def poll_interval(self) -> float:
+        return self.communicator.poll_interval
+
+    go = _in_thread('go')
+    go_to = _in_thread('go_to')
+    stop = _in_thread('stop')
+    stop_motors = _in_thread('stop_motors')
+    get_position = _in_thread('get_position')
+    get_positions = _in_thread('get_positions')
+    set_position = _in_thread('set_position')
+    get_parameter = _in_thread('get_parameter')
+    set_parameter = _in_thread('set_parameter')
+    motor_stand = _in_thread('motor_stand')
+    motors_stand = _in_thread('motors_stand')
+    motor_at_the_beg = _in_thread('motor_at_the_beg')
+    motor_at_the_end = _in_thread('motor_at_the_end')
+    bus_check = _in_thread('bus_check')
+    bus_list = _in_thread('bus_list')
+    axes_list = _in_thread('axes_list')
+    check_connection = _in_thread('check_connection')
+    command_to_box = _in_thread('command_to_box')
+    command_to_modul = _in_thread('command_to_modul')
+    command_to_motor = _in_thread('command_to_motor')
+    execute_many = _in_thread('execute_many')
+    calibrate = _in_thread('calibrate')
+
+    def check_raw_input_data(self, raw_input_data: List[dict]) -> (bool, str):
+        """Prüft ob die rohe Daten aus der input-Datei kompatibel sind."""
+        return self.communicator.check_raw_input_data(raw_input_data)
+
+
 M_Coord = Tuple[int, int]
 Param_Val = Dict[str, float]
 
@@ -493,58 +1243,758 @@ def read_input_config_from_file(communicator: ContrCommunicator, input_file: str
                         'displ_per_contr': motor_line['Umrechnungsfaktor']}
         motors_config[motor_coord] = motor_config
 
-        motor_parameters = {}
-        for parameter_name in communicator.PARAMETER_DEFAULT.keys():
-            if parameter_name in motor_line.keys():
-                motor_parameters[parameter_name] = motor_line[parameter_name]
-        motors_parameters[motor_coord] = motor_parameters
+        motor_parameters = {}
+        for parameter_name in communicator.PARAMETER_DEFAULT.keys():
+            if parameter_name in motor_line.keys():
+                motor_parameters[parameter_name] = motor_line[parameter_name]
+        motors_parameters[motor_coord] = motor_parameters
+
+    return controllers_to_init, motors_to_init, motors_config, motors_parameters
+
+
+BOX_SNAPSHOT_VERSION = 1
+
+
+def read_box_snapshot_from_file(address: str = 'data/box_snapshot.json') -> dict:
+    """Liest einen mit Box.save_snapshot gesicherten Zustand und gibt ihn in Format
+    {'communicator': Klassenname, 'controllers': {bus: {Achse: Motordaten}}} zurück,
+    Motordaten mit den Schlüsseln 'name', 'config', 'parameters' und 'soft_limits'."""
+
+    defect_error = FileReadError(f'Der Snapshot "{address}" ist defekt oder inkompatibel!')
+    with open(address) as snapshot_file:
+        try:
+            raw_data = json.load(snapshot_file)
+        except ValueError:
+            raise defect_error
+
+    try:
+        if raw_data['version'] != BOX_SNAPSHOT_VERSION:
+            raise defect_error
+        controllers = {}
+        for controller_data in raw_data['controllers']:
+            motors = {}
+            for motor_data in controller_data['motors']:
+                if not set(motor_data['config'].keys()) <= set(Motor.DEFAULT_MOTOR_CONFIG.keys()):
+                    raise defect_error
+                if len(motor_data['soft_limits']) != 2:
+                    raise defect_error
+                motors[int(motor_data['axis'])] = {'name': str(motor_data['name']),
+                                                   'config': dict(motor_data['config']),
+                                                   'parameters': {str(name): float(value) for name, value
+                                                                  in motor_data['parameters'].items()},
+                                                   'soft_limits': tuple(motor_data['soft_limits'])}
+            controllers[int(controller_data['bus'])] = motors
+        return {'communicator': str(raw_data['communicator']), 'controllers': controllers}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise defect_error
+
+
+class StopIndicator:
+    """Durch dieses Objekt kann man Erwartung von dem Stop von allen Motoren abbrechen.
+    Es wird als argument für PBox.wait_all_motors_stop() verwendet."""
+
+    def has_stop_requested(self) -> bool:
+        raise NotImplementedError
+
+    def add_stop_callback(self, callback: Callable[[], None]) -> Union[Callable[[], None], None]:
+        """Meldet callback an, das beim Abbruch aufgerufen wird, und gibt eine Funktion zum Abmelden zurück.
+        Ein Indikator, der das nicht kann, gibt None zurück und wird dann regelmäßig abgefragt."""
+        return None
+
+    def register(self, motors: Iterable['Motor']):
+        """Meldet die Motoren an, die beim Abbruch gestoppt werden sollen."""
+        pass
+
+    def unregister(self, motors: Iterable['Motor']):
+        """Meldet die Motoren wieder ab."""
+        pass
+
+    @contextlib.contextmanager
+    def watching(self, motors: Iterable['Motor']):
+        """Die Motoren sind innerhalb des with-Blocks angemeldet."""
+
+        motors = list(motors)
+        self.register(motors)
+        try:
+            yield self
+        finally:
+            self.unregister(motors)
+
+
+class StandardStopIndicator(StopIndicator):
+    """Durch dieses Objekt kann man Erwartung von dem Stop von allen Motoren abbrechen.
+    Es wird als argument für PBox.wait_all_motors_stop() verwendet.
+
+    Der Zustand liegt in einem threading.Event. stop() weckt sofort alle Wartenden über die angemeldeten
+    Callbacks und schickt gleichzeitig den Stop-Befehl an alle angemeldeten Motoren: pro Communicator
+    ein einziges stop_motors, die Communicators parallel. Die Dauer davon (vom Aufruf bis der letzte
+    Stop-Befehl quittiert ist) steht danach in abort_latency.
+    """
+
+    def __init__(self):
+        self.__event = threading.Event()
+        self.__lock = threading.Lock()
+        self.__callbacks: Dict[int, Callable[[], None]] = {}
+        self.__tokens = itertools.count()  # ein Schlüssel pro Anmeldung, auch für dasselbe callback
+        self.__motors: Dict['Motor', int] = {}
+        self.abort_latency: Union[float, None] = None
+
+    @property
+    def stop_requested(self) -> bool:
+        return self.__event.is_set()
+
+    def stop(self):
+        start = time.monotonic()
+        self.__event.set()
+        with self.__lock:
+            callbacks = list(self.__callbacks.values())
+            motors = list(self.__motors)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as err:
+                logging.exception(err)
+
+        by_communicator: Dict[ContrCommunicator, List[Tuple[int, int]]] = {}
+        for motor in motors:
+            by_communicator.setdefault(motor.communicator, []).append(motor.coord())
+        if len(by_communicator) == 1:
+            for communicator, coords in by_communicator.items():
+                communicator.stop_motors(coords)
+        elif by_communicator:
+            with concurrent.futures.ThreadPoolExecutor(len(by_communicator)) as executor:
+                for future in [executor.submit(communicator.stop_motors, coords)
+                               for communicator, coords in by_communicator.items()]:
+                    future.result()
+        self.abort_latency = time.monotonic() - start
+        if motors:
+            logging.info(f'{len(motors)} Motoren wurden in {self.abort_latency * 1000:.1f} ms gestoppt.')
+
+    def restore(self):
+        self.__event.clear()
+
+    def has_stop_requested(self) -> bool:
+        return self.__event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wartet bis zum Abbruch, aber nicht länger als timeout. Gibt zurück, ob der Abbruch angefordert ist."""
+        return self.__event.wait(timeout)
+
+    def add_stop_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Meldet callback an, das beim Abbruch aufgerufen wird, und gibt eine Funktion zum Abmelden zurück."""
+
+        with self.__lock:
+            key = next(self.__tokens)
+            self.__callbacks[key] = callback
+
+        def remove():
+            with self.__lock:
+                self.__callbacks.pop(key, None)
+
+        return remove
+
+    def register(self, motors: Iterable['Motor']):
+        """Meldet die Motoren an, die beim Abbruch gestoppt werden sollen."""
+
+        with self.__lock:
+            for motor in motors:
+                self.__motors[motor] = self.__motors.get(motor, 0) + 1
+
+    def unregister(self, motors: Iterable['Motor']):
+        """Meldet die Motoren wieder ab."""
+
+        with self.__lock:
+            for motor in motors:
+                count = self.__motors.get(motor, 0) - 1
+                if count > 0:
+                    self.__motors[motor] = count
+                else:
+                    self.__motors.pop(motor, None)
+
+
+class WaitReporter:
+    """Durch dieses Objekt kann man die Liste der im Moment laufenden Motoren bekommen.
+        Es wird als argument für PBox.wait_all_motors_stop() und andere Funktionen verwendet."""
+
+    def set_wait_list(self, wait_list: Set[str]):
+        """Wird am Anfang angerufen. und es wird dadurch """
+        raise NotImplementedError
+
+    def motor_is_done(self, motor_name: str):
+        raise NotImplementedError
+
+
+def trapezoid_move_time(distance: float, velocity: Union[float, None],
+                        acceleration: Union[float, None]) -> Union[float, None]:
+    """Fahrzeit (in s) für eine Strecke bei einem Trapezprofil: beschleunigen, mit velocity fahren, bremsen.
+    acceleration = 0 bedeutet, dass die Geschwindigkeit sofort erreicht wird.
+    Ohne (positive) Geschwindigkeit lässt sich die Fahrzeit nicht schätzen, dann wird None zurückgegeben.
+    """
+
+    if not velocity or velocity <= 0:
+        return None
+    distance = abs(distance)
+    if not acceleration or acceleration <= 0:
+        return distance / velocity
+    if distance >= velocity**2 / acceleration:
+        return distance / velocity + velocity / acceleration
+    return 2 * sqrt(distance / acceleration)
+
+
+def _poll_delay(remaining: Union[float, None], interval: float, max_interval: float) -> float:
+    """Abstand bis zur nächsten Statusabfrage einer Achse, die voraussichtlich in remaining Sekunden ankommt."""
+
+    if remaining is None or remaining <= 0:
+        return interval
+    return min(max(remaining / 2, interval), max_interval)
+
+
+def _settle(future: concurrent.futures.Future, err: Exception = None):
+    """Erfüllt das Future mit True bzw. err. Ein Future, das inzwischen (z.B. von wait_futures in einem
+    anderen Thread) abgesagt wurde, wird übergangen."""
+
+    try:
+        if err is None:
+            future.set_result(True)
+        else:
+            future.set_exception(err)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
+class StatusPoller:
+    """Fragt in einem eigenen Thread den Status der Achsen ab, auf deren Stop gerade gewartet wird.
+
+    Pro Communicator gibt es nur einen StatusPoller (ContrCommunicator.status_poller()). Es werden nur
+    die beobachteten Achsen abgefragt, die gerade fälligen in einer Runde durch motors_stand. Die Wartenden
+    bekommen ein Future, das erfüllt wird, sobald der Motor steht. Der Thread läuft nur so lange,
+    wie es etwas zu beobachten gibt.
+
+    Ist bekannt, wie lange die Bewegung voraussichtlich noch dauert (duration bei watch), wird die Achse
+    am Anfang selten und gegen das erwartete Ende immer öfter abgefragt: die nächste Abfrage folgt nach
+    der Hälfte der Restzeit, aber frühestens nach interval und spätestens nach max_interval.
+    Ohne Schätzung wird zum ersten Mal nach settle_time abgefragt, danach und nach dem erwarteten Ende
+    alle interval Sekunden. interval und settle_time kommen vom Communicator (poll_interval, settle_time).
+    """
+
+    max_interval: float = 1.0
+
+    def __init__(self, communicator: ContrCommunicator):
+        self.communicator = communicator
+        self.interval = communicator.poll_interval
+        self.settle_time = communicator.settle_time
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__waiters: Dict[Tuple[int, int], List[concurrent.futures.Future]] = {}
+        self.__expected_end: Dict[Tuple[int, int], Union[float, None]] = {}
+        self.__next_poll: Dict[Tuple[int, int], float] = {}
+        self.__thread: Union[threading.Thread, None] = None
+
+    def watch(self, bus: int, axis: int, duration: float = None) -> concurrent.futures.Future:
+        """Gibt ein Future zurück, das erfüllt wird, wenn der Motor steht.
+        duration: wie viele Sekunden die Bewegung voraussichtlich noch dauert (None = unbekannt)."""
+
+        future = concurrent.futures.Future()
+        coord = (bus, axis)
+        now = time.monotonic()
+        with self.__lock:
+            self.__waiters.setdefault(coord, []).append(future)
+            if duration is None:
+                self.__expected_end[coord] = None
+                self.__next_poll[coord] = now + self.settle_time
+            else:
+                self.__expected_end[coord] = now + duration
+                self.__next_poll[coord] = now + _poll_delay(duration, self.interval, self.max_interval)
+            self.__wakeup.set()
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name='StatusPoller', daemon=True)
+                self.__thread.start()
+        return future
+
+    def wait_stop(self, coords: Iterable[Tuple[int, int]], stop_indicator: StopIndicator = None,
+                  durations: Iterable[Union[float, None]] = None) -> bool:
+        """Wartet, bis alle angegebene Motoren stehen. Gibt False zurück, wenn das Warten
+        durch stop_indicator abgebrochen wurde. durations sind die erwarteten Restfahrzeiten (s. watch)."""
+
+        coords = list(coords)
+        durations = [None] * len(coords) if durations is None else list(durations)
+        futures = [self.watch(bus, axis, duration) for (bus, axis), duration in zip(coords, durations)]
+        return wait_futures(futures, stop_indicator)
+
+    def __forget(self, coord: Tuple[int, int]) -> List[concurrent.futures.Future]:
+        self.__expected_end.pop(coord, None)
+        self.__next_poll.pop(coord, None)
+        return self.__waiters.pop(coord, [])
+
+    def __run(self):
+        try:
+            self.__poll_loop()
+        except Exception as err:
+            # Unerwarteter Fehler: Die Wartenden bekommen ihn, statt ewig zu warten.
+            logging.exception(err)
+            with self.__lock:
+                futures = [future for coord in list(self.__waiters) for future in self.__forget(coord)]
+            for future in futures:
+                _settle(future, err)
+        finally:
+            with self.__lock:
+                if self.__thread is threading.current_thread():
+                    self.__thread = None
+
+    def __poll_loop(self):
+        while True:
+            with self.__lock:
+                for coord in [coord for coord, futures in self.__waiters.items()
+                              if all(future.done() for future in futures)]:
+                    self.__forget(coord)
+                if not self.__waiters:
+                    self.__thread = None
+                    return
+                now = time.monotonic()
+                coords = [coord for coord in self.__waiters if self.__next_poll[coord] <= now]
+                if not coords:
+                    timeout = min(self.__next_poll.values()) - now
+                    self.__wakeup.clear()
+            if not coords:
+                self.__wakeup.wait(timeout)
+                continue
+
+            try:
+                stand = self.communicator.motors_stand(coords)
+            except Exception as err:
+                with self.__lock:
+                    for coord in coords:
+                        for future in self.__forget(coord):
+                            _settle(future, err)
+                continue
+
+            with self.__lock:
+                now = time.monotonic()
+                for coord, coord_stand in zip(coords, stand):
+                    if coord_stand:
+                        for future in self.__forget(coord):
+                            _settle(future)
+                    elif coord in self.__waiters:
+                        end = self.__expected_end[coord]
+                        remaining = None if end is None else end - now
+                        self.__next_poll[coord] = now + _poll_delay(remaining, self.interval, self.max_interval)
+
+
+def wait_futures(futures: List[concurrent.futures.Future], stop_indicator: StopIndicator = None) -> bool:
+    """Wartet, bis alle Futures erfüllt sind. Gibt False zurück, wenn das Warten
+    durch stop_indicator abgebrochen wurde. Die nicht erfüllten Futures werden dann abgesagt."""
+
+    if stop_indicator is None:
+        for future in futures:
+            future.result()
+        return True
+
+    wake = threading.Event()
+    for future in futures:
+        future.add_done_callback(lambda _: wake.set())
+    remove_callback = stop_indicator.add_stop_callback(wake.set)
+    poll_interval = 0.01 if remove_callback is None else None
+    try:
+        while True:
+            if stop_indicator.has_stop_requested():
+                for future in futures:
+                    future.cancel()
+                return False
+            if all(future.done() for future in futures):
+                for future in futures:
+                    future.result()
+                return True
+            wake.wait(poll_interval)
+            wake.clear()
+    finally:
+        if remove_callback is not None:
+            remove_callback()
+
+
+class CompletionWatcher:
+    """Grundklasse für das Warten auf den Stop der Achsen anhand der Meldungen des Controllers über das Ende
+    einer Bewegung, statt den Status regelmäßig abzufragen. Die Schnittstelle ist dieselbe wie bei StatusPoller.
+
+    Bei watch wird der Status einmal abgefragt (die Bewegung kann schon vorbei sein), danach nur noch, wenn die
+    Unterklasse eine Meldung für die Achse bekommt (_completed, danach _check). Gibt _fallback einen StatusPoller
+    zurück, bedient er die weiteren Wartenden.
+    """
+
+    def __init__(self, communicator: ContrCommunicator):
+        self.communicator = communicator
+        self._lock = threading.Lock()
+        self.__waiters: Dict[Tuple[int, int], List[concurrent.futures.Future]] = {}
+        self.__completions = 0
+
+    @property
+    def completions_received(self) -> int:
+        """Anzahl der bisher empfangenen Meldungen über das Ende einer Bewegung."""
+        with self._lock:
+            return self.__completions
+
+    def watch(self, bus: int, axis: int, duration: float = None) -> concurrent.futures.Future:
+        """Gibt ein Future zurück, das erfüllt wird, wenn der Motor steht.
+        duration wird nur vom StatusPoller gebraucht, falls es keine Meldungen gibt."""
+
+        return self.watch_many([(bus, axis)], [duration])[0]
+
+    def watch_many(self, coords: Iterable[Tuple[int, int]], durations: Iterable[Union[float, None]] = None) \
+            -> List[concurrent.futures.Future]:
+        """Wie watch für mehrere Motoren, der Status wird dabei mit einer Abfrage geprüft."""
+
+        coords = list(coords)
+        durations = [None] * len(coords) if durations is None else list(durations)
+        self._start()
+        with self._lock:
+            fallback = self._fallback()
+            if fallback is not None:
+                return [fallback.watch(bus, axis, duration) for (bus, axis), duration in zip(coords, durations)]
+            futures = []
+            for coord in coords:
+                future = concurrent.futures.Future()
+                pending = [waiter for waiter in self.__waiters.get(coord, []) if not waiter.done()]
+                self.__waiters[coord] = pending + [future]
+                futures.append(future)
+        self._check(coords)
+        return futures
+
+    def wait_stop(self, coords: Iterable[Tuple[int, int]], stop_indicator: StopIndicator = None,
+                  durations: Iterable[Union[float, None]] = None) -> bool:
+        """Wartet, bis alle angegebene Motoren stehen. Gibt False zurück, wenn das Warten
+        durch stop_indicator abgebrochen wurde."""
+
+        return wait_futures(self.watch_many(coords, durations), stop_indicator)
+
+    def fail_all(self, err: Exception):
+        """Meldet allen Wartenden den Fehler (z.B. wenn die Verbindung für die Meldungen weg ist)."""
+
+        with self._lock:
+            coords = list(self.__waiters)
+        self._resolve(coords, err)
+
+    def _start(self):
+        """Wird vor jedem watch aufgerufen, z.B. um die Meldungen zu abonnieren."""
+
+    def _fallback(self) -> Union[StatusPoller, None]:
+        """Gibt den StatusPoller zurück, wenn es keine Meldungen gibt. Wird mit gehaltenem _lock aufgerufen."""
+        return None
+
+    def _completed(self, coord: Tuple[int, int]) -> bool:
+        """Zählt eine Meldung über das Ende einer Bewegung und zeigt, ob auf die Achse gewartet wird."""
+
+        with self._lock:
+            self.__completions += 1
+            return coord in self.__waiters
+
+    def _take_waiters(self) -> Dict[Tuple[int, int], List[concurrent.futures.Future]]:
+        """Nimmt alle Wartenden heraus (um sie dem StatusPoller zu übergeben). Mit gehaltenem _lock aufrufen."""
+
+        waiters, self.__waiters = self.__waiters, {}
+        return waiters
+
+    def _check(self, coords: List[Tuple[int, int]]):
+        """Fragt den Status der angegebenen Achsen ab und erfüllt die Futures der stehenden."""
+
+        try:
+            stand = self.communicator.motors_stand(coords)
+        except Exception as err:
+            self._resolve(coords, err)
+            return
+        self._resolve([coord for coord, coord_stand in zip(coords, stand) if coord_stand])
+
+    def _resolve(self, coords: List[Tuple[int, int]], err: Exception = None):
+        with self._lock:
+            futures = [future for coord in coords for future in self.__waiters.pop(coord, [])]
+        for future in futures:
+            _settle(future, err)
+
+
+class AsyncStatusPoller:
+    """Asynchrones Gegenstück zu StatusPoller: die Abfrage läuft als Task in der Ereignisschleife
+    und die Wartenden bekommen asyncio.Future. Die Abfragen werden wie bei StatusPoller geplant."""
+
+    max_interval: float = StatusPoller.max_interval
+
+    def __init__(self, communicator: AsyncContrCommunicator):
+        self.communicator = communicator
+        self.interval = communicator.poll_interval
+        self.settle_time = communicator.settle_time
+        self.__waiters: Dict[Tuple[int, int], List[asyncio.Future]] = {}
+        self.__expected_end: Dict[Tuple[int, int], Union[float, None]] = {}
+        self.__next_poll: Dict[Tuple[int, int], float] = {}
+        self.__wakeup: Union[asyncio.Event, None] = None
+        self.__task: Union[asyncio.Task, None] = None
+
+    def watch(self, bus: int, axis: int, duration: float = None) -> asyncio.Future:
+        """Gibt ein Future zurück, das erfüllt wird, wenn der Motor steht.
+        duration: wie viele Sekunden die Bewegung voraussichtlich noch dauert (None = unbekannt)."""
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        coord = (bus, axis)
+        now = time.monotonic()
+        self.__waiters.setdefault(coord, []).append(future)
+        if duration is None:
+            self.__expected_end[coord] = None
+            self.__next_poll[coord] = now + self.settle_time
+        else:
+            self.__expected_end[coord] = now + duration
+            self.__next_poll[coord] = now + _poll_delay(duration, self.interval, self.max_interval)
+        if self.__task is None or self.__task.done():
+            self.__wakeup = asyncio.Event()
+            self.__task = loop.create_task(self.__run())
+        self.__wakeup.set()
+        return future
+
+    async def wait_stop(self, coords: Iterable[Tuple[int, int]], stop_indicator: StopIndicator = None,
+                        durations: Iterable[Union[float, None]] = None) -> bool:
+        """Wartet, bis alle angegebene Motoren stehen. Gibt False zurück, wenn das Warten
+        durch stop_indicator abgebrochen wurde. durations sind die erwarteten Restfahrzeiten (s. watch)."""
+
+        coords = list(coords)
+        durations = [None] * len(coords) if durations is None else list(durations)
+        futures = [self.watch(bus, axis, duration) for (bus, axis), duration in zip(coords, durations)]
+        return await wait_futures_async(futures, stop_indicator)
+
+    def __forget(self, coord: Tuple[int, int]) -> List[asyncio.Future]:
+        self.__expected_end.pop(coord, None)
+        self.__next_poll.pop(coord, None)
+        return self.__waiters.pop(coord, [])
+
+    async def __run(self):
+        while True:
+            for coord in [coord for coord, futures in self.__waiters.items()
+                          if all(future.done() for future in futures)]:
+                self.__forget(coord)
+            if not self.__waiters:
+                return
+            now = time.monotonic()
+            coords = [coord for coord in self.__waiters if self.__next_poll[coord] <= now]
+            if not coords:
+                self.__wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.__wakeup.wait(), min(self.__next_poll.values()) - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                stand = await self.communicator.motors_stand(coords)
+            except Exception as err:
+                for coord in coords:
+                    for future in self.__forget(coord):
+                        if not future.done():
+                            future.set_exception(err)
+                continue
+
+            now = time.monotonic()
+            for coord, coord_stand in zip(coords, stand):
+                if coord_stand:
+                    for future in self.__forget(coord):
+                        if not future.done():
+                            future.set_result(True)
+                elif coord in self.__waiters:
+                    end = self.__expected_end[coord]
+                    remaining = None if end is None else end - now
+                    self.__next_poll[coord] = now + _poll_delay(remaining, self.interval, self.max_interval)
+
+
+async def wait_futures_async(futures: List[asyncio.Future], stop_indicator: StopIndicator = None) -> bool:
+    """Asynchrone Version von wait_futures."""
+
+    if stop_indicator is None:
+        await asyncio.gather(*futures)
+        return True
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    for future in futures:
+        future.add_done_callback(lambda _: wake.set())
+
+    def wake_up():
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:  # die Ereignisschleife ist schon geschlossen
+            pass
+
+    remove_callback = stop_indicator.add_stop_callback(wake_up)
+    poll_interval = 0.01 if remove_callback is None else None
+    try:
+        while True:
+            if stop_indicator.has_stop_requested():
+                for future in futures:
+                    future.cancel()
+                return False
+            if all(future.done() for future in futures):
+                for future in futures:
+                    future.result()
+                return True
+            try:
+                await asyncio.wait_for(wake.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+    finally:
+        if remove_callback is not None:
+            remove_callback()
+
+
+class MoveHandle:
+    """Handle einer nicht blockierenden Bewegung, die Motor.start_go_to und Motor.start_go zurückgeben.
+
+    Das Ergebnis (Erfolg, Nachricht) steht fest, sobald der StatusPoller meldet, dass der Motor steht.
+    Wenn bei der Bewegung check=True war, wird dann auch geprüft, ob der Zielpunkt erreicht wurde.
+    Der Motor wird erst beobachtet, wenn jemand nach dem Ergebnis fragt (done, result, add_done_callback),
+    eine Bewegung, auf die niemand wartet, belastet den Bus also nicht mit Statusabfragen.
+    """
 
-    return controllers_to_init, motors_to_init, motors_config, motors_parameters
+    def __init__(self, motor: 'Motor', destination: float = None, reporter: WaitReporter = None,
+                 result: Tuple[bool, str] = None):
+        self.motor = motor
+        self.__destination = destination  # in normierten Einheiten, None = ohne Prüfung
+        self.__reporter = reporter
+        self.__future = concurrent.futures.Future()
+        self.__stand_future = None
+        self.__lock = threading.Lock()
+        if result is not None:
+            self.__future.set_result(result)
+
+    def __watch(self):
+        """Fängt beim ersten Aufruf an, auf den Stop des Motors zu warten."""
+
+        with self.__lock:
+            if self.__stand_future is not None or self.__future.done():
+                return
+            motor = self.motor
+            self.__stand_future = motor.communicator.status_poller().watch(*motor.coord(),
+                                                                           motor.expected_move_time())
+        self.__stand_future.add_done_callback(self.__on_stand)
+
+    def done(self) -> bool:
+        """Zeigt, ob die Bewegung beendet ist."""
+        self.__watch()
+        return self.__future.done()
+
+    def result(self, timeout: float = None) -> Tuple[bool, str]:
+        """Wartet auf das Ende der Bewegung und gibt (Erfolg, Nachricht) zurück."""
+        self.__watch()
+        return self.__future.result(timeout)
+
+    def add_done_callback(self, fn: Callable[['MoveHandle'], None]):
+        """fn(handle) wird aufgerufen, wenn die Bewegung beendet ist (sofort, wenn sie schon beendet ist)."""
+        self.__watch()
+        self.__future.add_done_callback(lambda _: fn(self))
+
+    def cancel(self) -> bool:
+        """Stoppt den Motor. Gibt False zurück, wenn die Bewegung schon beendet war."""
+
+        if self.__future.done():
+            return False
+        self.motor.stop()
+        self.__set_result((False, "Der Vorgang wurde vom Benutzer abgebrochen."))
+        with self.__lock:
+            stand_future = self.__stand_future
+        if stand_future is not None:
+            stand_future.cancel()
+        return True
 
+    def __set_result(self, result: Tuple[bool, str]):
+        try:
+            self.__future.set_result(result)
+        except concurrent.futures.InvalidStateError:
+            pass
 
-class StopIndicator:
-    """Durch dieses Objekt kann man Erwartung von dem Stop von allen Motoren abbrechen.
-    Es wird als argument für PBox.wait_all_motors_stop() verwendet."""
+    def __on_stand(self, stand_future: concurrent.futures.Future):
+        if stand_future.cancelled() or self.__future.done():
+            return
+        try:
+            stand_future.result()
+            if self.__destination is not None:
+                motor = self.motor
+                tolerance_n = motor.transform_units(motor.communicator.tolerance, 'contr', to='norm', rel=True)
+                if abs(motor.position('norm') - self.__destination) > tolerance_n:
+                    self.__set_result((False, f'Der Zielpunkt des Motors "{motor.name}" wurde nicht erreicht.'))
+                    return
+        except Exception as err:
+            try:
+                self.__future.set_exception(err)
+            except concurrent.futures.InvalidStateError:
+                pass
+            return
+        if self.__reporter is not None:
+            self.__reporter.motor_is_done(self.motor.name)
+        self.__set_result((True, ""))
 
-    def has_stop_requested(self) -> bool:
-        raise NotImplementedError
 
+class ClusterMoveHandle:
+    """Handle einer nicht blockierenden Bewegung mehrerer Motoren, das MotorsCluster.start_go_to und start_go
+    zurückgeben."""
 
-class StandardStopIndicator(StopIndicator):
-    """Durch dieses Objekt kann man Erwartung von dem Stop von allen Motoren abbrechen.
-    Es wird als argument für PBox.wait_all_motors_stop() verwendet."""
+    def __init__(self, handles: Dict[str, MoveHandle]):
+        self.handles = handles
 
-    def __init__(self):
-        self.stop_requested = False
+    def done(self) -> bool:
+        """Zeigt, ob alle Bewegungen beendet sind."""
+        return all(handle.done() for handle in self.handles.values())
 
-    def stop(self):
-        self.stop_requested = True
+    def results(self, timeout: float = None) -> Dict[str, Tuple[bool, str]]:
+        """Wartet auf das Ende aller Bewegungen und gibt {Motorname: (Erfolg, Nachricht), …} zurück."""
 
-    def restore(self):
-        self.stop_requested = False
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        results = {}
+        for name, handle in self.handles.items():
+            remaining = None if timeout is None else max(0.0, deadline - time.monotonic())
+            results[name] = handle.result(remaining)
+        return results
 
-    def has_stop_requested(self) -> bool:
-        return self.stop_requested
+    def result(self, timeout: float = None) -> Tuple[bool, str]:
+        """Wartet auf das Ende aller Bewegungen und gibt (Erfolg, Nachrichten) zurück."""
 
+        success = True
+        message = ""
+        for result in self.results(timeout).values():
+            if not result[0]:
+                success = False
+                message += result[1] + '\n'
+        return success, message
 
-class WaitReporter:
-    """Durch dieses Objekt kann man die Liste der im Moment laufenden Motoren bekommen.
-        Es wird als argument für PBox.wait_all_motors_stop() und andere Funktionen verwendet."""
+    def add_done_callback(self, fn: Callable[['ClusterMoveHandle'], None]):
+        """fn(handle) wird aufgerufen, wenn alle Bewegungen beendet sind."""
 
-    def set_wait_list(self, wait_list: Set[str]):
-        """Wird am Anfang angerufen. und es wird dadurch """
-        raise NotImplementedError
+        lock = threading.Lock()
+        remaining = [len(self.handles)]
 
-    def motor_is_done(self, motor_name: str):
-        raise NotImplementedError
+        def one_done(_):
+            with lock:
+                remaining[0] -= 1
+                all_done = remaining[0] == 0
+            if all_done:
+                fn(self)
+
+        if not self.handles:
+            fn(self)
+        for handle in self.handles.values():
+            handle.add_done_callback(one_done)
+
+    def cancel(self) -> bool:
+        """Stoppt alle noch fahrende Motoren. Gibt False zurück, wenn alle Bewegungen schon beendet waren."""
+
+        cancelled = False
+        for handle in self.handles.values():
+            cancelled = handle.cancel() or cancelled
+        return cancelled
 
 
 class Controller:
     """Diese Klasse entspricht einem Controller-Modul mit Busnummer 'bus' innerhalb eines Boxes."""
 
-    def __init__(self, communicator: ContrCommunicator, bus: int):
+    def __init__(self, communicator: ContrCommunicator, bus: int, async_communicator: AsyncContrCommunicator = None):
 
         self.communicator = communicator
+        if async_communicator is None:
+            async_communicator = ThreadedAsyncCommunicator(communicator)
+        self.async_communicator = async_communicator
         self.bus = bus
         self.motor: Dict[int, Motor] = {}
 
@@ -559,24 +2009,22 @@ class Controller:
     def motors_stand(self) -> bool:
         """Gibt zurück der Status der Motoren, ob die Motoren in Lauf sind."""
 
-        for motor in self:
-            if not motor.stand():
-                return False
-        return True
+        return all(self.communicator.motors_stand([motor.coord() for motor in self]))
 
     def wait_stop(self):
         """Haltet die programme, bis die Motoren stoppen."""
 
-        while not self.motors_stand():
-            time.sleep(0.5)
+        self.communicator.status_poller().wait_stop([motor.coord() for motor in self], None,
+                                                    [motor.expected_move_time() for motor in self])
 
-    def make_motors(self):
-        """Erstellt Objekten für alle verfügbare Motoren"""
+    def make_motors(self, apply_parameters: bool = True):
+        """Erstellt Objekten für alle verfügbare Motoren. Mit apply_parameters=False bleiben die Standardwerte
+        der Parameter in Motor.pending_parameters und werden erst beim nächsten set_parameters geschickt."""
 
-        axes_list = self.communicator.axes_list(self.bus)
+        axes_list = self.communicator.cached_axes_list(self.bus)
         self.motor = {}
         for i in axes_list:
-            self.motor[i] = Motor(self, i)
+            self.motor[i] = Motor(self, i, apply_parameters)
         logging.info(
             f'Controller hat {len(axes_list)} Motor Objekten für alle verfügbare Achsen erstellt, nämlich {axes_list}.')
 
@@ -587,6 +2035,156 @@ class Controller:
             motor.stop()
 
 
+class MotorStateTable:
+    """Spaltenweise Tabelle der Umrechnungsdaten und Soft Limits von Motoren, eine Zeile pro Motor.
+
+    Jede Spalte ist ein numpy-Array, so dass Umrechnungen und Prüfungen für viele Motoren auf einmal laufen.
+    'inversion' wird als 0.0/1.0 gespeichert, fehlende Soft Limits als NaN. Ein Motor liest und schreibt
+    seine Zeile über Motor.config und Motor.soft_limits.
+    """
+
+    COLUMNS = ('norm_per_contr', 'null_position', 'displ_null', 'displ_per_contr', 'inversion',
+               'min_limit', 'max_limit')
+
+    def __init__(self, capacity: int = 16):
+        self.columns: Dict[str, np.ndarray] = {name: np.full(max(capacity, 1), np.nan) for name in self.COLUMNS}
+        # wird bei jeder Änderung einer Zeile erhöht, damit ihr Motor die Umrechnungskoeffizienten neu berechnet
+        self.__versions: List[int] = []
+        self.__free_rows: List[int] = []  # Zeilen der Motoren, die in eine andere Tabelle umgezogen sind
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__versions) - len(self.__free_rows)
+
+    def add_row(self, values: Dict[str, float]) -> int:
+        """Fügt eine Zeile hinzu (eine freigegebene wird wiederverwendet) und gibt ihre Nummer zurück."""
+
+        with self.__lock:
+            if self.__free_rows:
+                row = self.__free_rows.pop()
+            else:
+                row = len(self.__versions)
+                self.__versions.append(0)
+                if row == len(self.columns['inversion']):
+                    self.columns = {name: np.concatenate([column, np.full(len(column), np.nan)])
+                                    for name, column in self.columns.items()}
+            for name in self.COLUMNS:
+                self.columns[name][row] = values[name]
+            self.__versions[row] += 1
+            return row
+
+    def free_row(self, row: int):
+        """Gibt die Zeile für add_row frei."""
+
+        with self.__lock:
+            for column in self.columns.values():
+                column[row] = np.nan
+            self.__versions[row] += 1
+            self.__free_rows.append(row)
+
+    def row_values(self, row: int) -> Dict[str, float]:
+        with self.__lock:
+            return {name: float(column[row]) for name, column in self.columns.items()}
+
+    def row_version(self, row: int) -> int:
+        return self.__versions[row]
+
+    def set(self, row: int, column: str, value: float):
+        """Ändert einen Wert. Die Spalten sollen nur hierüber geändert werden (siehe row_version)."""
+        with self.__lock:
+            self.columns[column][row] = value
+            self.__versions[row] += 1
+
+    def adopt(self, motors: Iterable['Motor']):
+        """Übernimmt die Zeilen der Motoren aus ihren bisherigen Tabellen in diese Tabelle.
+        Die bisherigen Zeilen werden dort freigegeben."""
+
+        for motor in motors:
+            if motor.state_table is not self:
+                table, row = motor.state_table, motor.state_row
+                motor.bind_state(self, self.add_row(table.row_values(row)))
+                table.free_row(row)
+
+    @staticmethod
+    def gather(motors: List['Motor']) -> Dict[str, np.ndarray]:
+        """Gibt die Spalten für die angegebenen Motoren (in dieser Reihenfolge) zurück.
+        Liegen alle Motoren in einer Tabelle, ist das ein einziger Indexzugriff pro Spalte."""
+
+        tables = {id(motor.state_table): motor.state_table for motor in motors}
+        if len(tables) == 1:
+            table = next(iter(tables.values()))
+            rows = np.fromiter((motor.state_row for motor in motors), dtype=np.intp, count=len(motors))
+            with table.__lock:
+                return {name: column[rows] for name, column in table.columns.items()}
+        values = [motor.state_table.row_values(motor.state_row) for motor in motors]
+        return {name: np.array([row[name] for row in values], dtype=float) for name in MotorStateTable.COLUMNS}
+
+    @staticmethod
+    def to_contr_coefficients(columns: Dict[str, np.ndarray], units: str) -> (np.ndarray, np.ndarray):
+        """Gibt (per, null) zurück, mit denen ein Wert in units als Wert/per + null in Controller-Einheiten
+        umgerechnet wird (wie in Motor.transform_units)."""
+
+        if units == 'contr':
+            return np.ones_like(columns['norm_per_contr']), np.zeros_like(columns['norm_per_contr'])
+        elif units == 'norm':
+            return columns['norm_per_contr'], columns['null_position']
+        elif units in ('displ', 'displ_centr'):
+            displ_null = 500 if units == 'displ_centr' else columns['displ_null']
+            return columns['displ_per_contr'], displ_null / columns['norm_per_contr'] + columns['null_position']
+        raise ValueError(f'Unbekante Einheiten! {list(Motor.UNITS)} wurde erwartet und kein: "{units}".')
+
+    @staticmethod
+    def transform(columns: Dict[str, np.ndarray], values: np.ndarray, current_u: str, to: str,
+                  rel: bool = False) -> np.ndarray:
+        """Vektorisierte Form von Motor.transform_units. Die letzte Achse von values entspricht den Motoren."""
+
+        values = np.asarray(values, dtype=float)
+        per_from, null_from = MotorStateTable.to_contr_coefficients(columns, current_u)
+        per_to, null_to = MotorStateTable.to_contr_coefficients(columns, to)
+        if current_u == to:
+            return values.copy()
+        if rel:
+            return values / per_from * per_to
+        return (values / per_from + null_from - null_to) * per_to
+
+
+class MotorConfig(MutableMapping):
+    """Motor.config: die Umrechnungsdaten liegen in der Zeile des Motors in seiner MotorStateTable,
+    die übrigen Einträge in einem gewöhnlichen Dict."""
+
+    def __init__(self, motor: 'Motor', values: dict):
+        self.__motor = motor
+        self.__other: dict = {}
+        self.update(values)
+
+    def __getitem__(self, key: str):
+        if key in MotorStateTable.COLUMNS:
+            value = self.__motor.state_table.columns[key][self.__motor.state_row]
+            return bool(value) if key == 'inversion' else float(value)
+        return self.__other[key]
+
+    def __setitem__(self, key: str, value):
+        if key in MotorStateTable.COLUMNS:
+            self.__motor.state_table.set(self.__motor.state_row, key, float(value))
+        else:
+            self.__other[key] = value
+
+    def __delitem__(self, key: str):
+        if key in MotorStateTable.COLUMNS:
+            raise KeyError(f'"{key}" kann nicht entfernt werden.')
+        del self.__other[key]
+
+    def __iter__(self):
+        yield from self.__other
+        yield from (key for key in MotorStateTable.COLUMNS if key not in ('min_limit', 'max_limit'))
+
+    def __len__(self) -> int:
+        return len(self.__other) + len(MotorStateTable.COLUMNS) - 2
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
 class Motor:
     """Diese Klasse entspricht einem Motor, der mit einem Controller verbunden ist."""
 
@@ -600,16 +2198,53 @@ class Motor:
                             'null_position': 0.0  # Position von Anfang in Controller Einheiten
                             }
 
-    def __init__(self, controller: Controller, axis: int):
+    def __init__(self, controller: Controller, axis: int, apply_parameters: bool = True):
         self.controller = controller
         self.communicator = self.controller.communicator
+        self.async_communicator = self.controller.async_communicator
         self.axis = axis
 
         self.name = f'Motor{self.controller.bus}.{self.axis}'
-        self.config = deepcopy(self.DEFAULT_MOTOR_CONFIG)
-        self.set_parameters()
-
-        self.soft_limits: Tuple[Union[None, float], Union[None, float]] = (None, None)
+        self.state_table = MotorStateTable(capacity=1)
+        self.state_row = self.state_table.add_row({**self.DEFAULT_MOTOR_CONFIG, 'min_limit': np.nan,
+                                                   'max_limit': np.nan})
+        self.__config = MotorConfig(self, self.DEFAULT_MOTOR_CONFIG)
+        self.__coefficients_cache: Dict[Tuple[str, str, bool], Tuple[float, float, float, float]] = {}
+        self.__coefficients_version = None
+        self.parameters: Dict[str, float] = {}  # zuletzt gelesene oder eingestellte Parameterwerte
+        self.__dirty_parameters: Set[str] = set()  # Parameter, deren Wert im Controller unbekannt ist
+        # noch nicht geschickte Parameterwerte, die beim nächsten set_parameters mitgeschickt werden
+        self.pending_parameters: Dict[str, float] = deepcopy(self.communicator.PARAMETER_DEFAULT)
+        self.__move_end: Union[float, None] = None  # erwartetes Ende der aktuellen Bewegung (time.monotonic)
+        # Zielpunkt (in Controller Einheiten) der aktuellen Bewegung, deren Fahrzeit noch nicht geschätzt wurde
+        self.__move_target: Union[float, None] = None
+        if apply_parameters:
+            self.set_parameters({})
+
+    @property
+    def config(self) -> MotorConfig:
+        return self.__config
+
+    @config.setter
+    def config(self, motor_config: dict):
+        self.__config.update(motor_config)
+
+    @property
+    def soft_limits(self) -> Tuple[Union[None, float], Union[None, float]]:
+        columns = self.state_table.columns
+        return tuple(None if np.isnan(value) else float(value)
+                     for value in (columns['min_limit'][self.state_row], columns['max_limit'][self.state_row]))
+
+    @soft_limits.setter
+    def soft_limits(self, soft_limits: Tuple[Union[None, float], Union[None, float]]):
+        bottom, top = soft_limits
+        self.state_table.set(self.state_row, 'min_limit', np.nan if bottom is None else bottom)
+        self.state_table.set(self.state_row, 'max_limit', np.nan if top is None else top)
+
+    def bind_state(self, table: MotorStateTable, row: int):
+        """Legt fest, in welcher Zeile welcher MotorStateTable die Daten des Motors liegen."""
+
+        self.state_table, self.state_row = table, row
 
     def tol(self):
         """Gibt die für diese Controller akzeptabele Abweichung bei Positionierung der Motoren (in displ Einheiten)"""
@@ -626,7 +2261,8 @@ class Motor:
               check: bool = False,
               stop_indicator: StopIndicator = None,
               reporter: WaitReporter = None) -> (bool, str):
-        """Bewegt den motor zur absoluten Position, die als destination gegeben wird."""
+        """Bewegt den motor zur absoluten Position, die als destination gegeben wird.
+        Mit wait=False wird nicht auf das Ende der Bewegung gewartet (s. start_go_to)."""
 
         destination = float(destination)
 
@@ -634,6 +2270,114 @@ class Motor:
         destination = self.transform_units(destination, units, to='norm')
 
         # Soft Limits prüfen
+        in_limits, destination = self.__apply_soft_limits(destination, check)
+        if not in_limits:
+            return False, destination
+
+        if not wait:
+            self.__go_to(destination, 'norm')
+            return True, ""
+        elif stop_indicator is not None:
+            with stop_indicator.watching([self]):
+                return self.__go_to_and_wait(destination, check, stop_indicator, reporter)
+        else:
+            return self.__go_to_and_wait(destination, check, stop_indicator, reporter)
+
+    def __go_to_and_wait(self, destination: float,
+                         check: bool,
+                         stop_indicator: Union[StopIndicator, None],
+                         reporter: Union[WaitReporter, None]) -> (bool, str):
+        """Schickt den Motor zum Zielpunkt (in normierten Einheiten) und wartet, bis er steht."""
+
+        for _ in range(3):
+            if stop_indicator is not None:
+                if stop_indicator.has_stop_requested():
+                    return False, "Der Vorgang wurde vom Benutzer abgebrochen."
+            self.__go_to(destination, 'norm')
+            self.wait_motor_stop(stop_indicator)
+            if stop_indicator is not None:
+                if stop_indicator.has_stop_requested():
+                    self.stop()
+                    return False, "Der Vorgang wurde vom Benutzer abgebrochen."
+
+            if not check:
+                if reporter is not None:
+                    reporter.motor_is_done(self.name)
+                return True, ""
+            else:
+                tolerance_n = self.transform_units(self.communicator.tolerance, 'contr', to='norm', rel=True)
+                if abs(self.position('norm') - destination) <= tolerance_n:
+                    if reporter is not None:
+                        reporter.motor_is_done(self.name)
+                    return True, ""
+        return False, f'Der Zielpunkt des Motors "{self.name}" wurde nicht erreicht.'
+
+    def start_go_to(self, destination: float,
+                    units: str = 'norm',
+                    check: bool = False,
+                    reporter: WaitReporter = None) -> MoveHandle:
+        """Wie go_to ohne wait, gibt aber ein MoveHandle zurück, mit dem man auf das Ende der Bewegung
+        warten, sie abbrechen oder eine Callback-Funktion anhängen kann."""
+
+        destination = self.transform_units(float(destination), units, to='norm')
+        in_limits, destination = self.__apply_soft_limits(destination, check)
+        if not in_limits:
+            return MoveHandle(self, result=(False, destination))
+        self.__go_to(destination, 'norm')
+        return MoveHandle(self, destination if check else None, reporter)
+
+    def __go_to(self, destination: float, units: str = 'norm'):
+        destination = self.transform_units(destination, units, to='contr')
+        contr_destination = self.__invert()*destination
+        self.communicator.go_to(contr_destination, *self.coord())
+        self.__target_sent(contr_destination)
+        logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde zu {destination} geschickt.')
+
+    def __can_estimate_move_time(self) -> bool:
+        return self.__estimate_move_time(0.0) is not None
+
+    def __estimate_move_time(self, shift: float) -> Union[float, None]:
+        return self.communicator.estimate_move_time(abs(shift), self.parameters)
+
+    def __move_started(self, duration: Union[float, None]):
+        self.__move_end = None if duration is None else time.monotonic() + duration
+        self.__move_target = None
+
+    def __target_sent(self, contr_destination: float):
+        """Merkt sich den Zielpunkt. Die Fahrzeit wird erst geschätzt, wenn jemand auf den Stop wartet
+        (expected_move_time), so kostet eine Bewegung ohne Warten keine Positionsabfrage."""
+
+        self.__move_started(None)
+        if self.__can_estimate_move_time():
+            self.__move_target = contr_destination
+
+    def __estimate_remaining(self, position: float):
+        target = self.__move_target
+        if target is not None:
+            self.__move_started(self.__estimate_move_time(target - position))
+
+    def expected_move_time(self) -> Union[float, None]:
+        """Gibt zurück, wie viele Sekunden die zuletzt gestartete Bewegung voraussichtlich noch dauert
+        (None, wenn unbekannt). Nach go_to wird dafür einmal die aktuelle Position abgefragt."""
+
+        if self.__move_target is not None:
+            self.__estimate_remaining(self.communicator.get_position(*self.coord()))
+        if self.__move_end is None:
+            return None
+        return max(self.__move_end - time.monotonic(), 0.0)
+
+    async def expected_move_time_async(self) -> Union[float, None]:
+        """Asynchrone Version von expected_move_time."""
+
+        if self.__move_target is not None:
+            self.__estimate_remaining(await self.async_communicator.get_position(*self.coord()))
+        return self.expected_move_time()
+
+    def __apply_soft_limits(self, destination: float, check: bool) -> (bool, Union[float, str]):
+        """Schränkt den Zielpunkt (in normierten Einheiten) auf die Soft Limits ein.
+        Gibt (True, Zielpunkt) zurück, oder (False, Fehlermeldung), wenn die Bewegung nicht stattfinden soll.
+        """
+
         bottom, top = self.soft_limits
         if bottom is not None and top is not None:
             if top - bottom < 0:
@@ -651,34 +2395,65 @@ class Motor:
                 destination = top
                 if check:
                     return False, f'Der Zielpunkt des Motors "{self.name}" liegt außerhalb der Soft Limits!'
+        return True, destination
+
+    async def go_to_async(self, destination: float,
+                          units: str = 'norm',
+                          wait: bool = False,
+                          check: bool = False,
+                          stop_indicator: StopIndicator = None,
+                          reporter: WaitReporter = None) -> (bool, str):
+        """Asynchrone Version von go_to: während auf den Stop gewartet wird, bleibt die Ereignisschleife frei."""
+
+        destination = self.transform_units(float(destination), units, to='norm')
+
+        in_limits, destination = self.__apply_soft_limits(destination, check)
+        if not in_limits:
+            return False, destination
 
         if not wait:
-            self.__go_to(destination, 'norm')
+            await self.__go_to_async(destination)
             return True, ""
+        elif stop_indicator is not None:
+            with stop_indicator.watching([self]):
+                return await self.__go_to_and_wait_async(destination, check, stop_indicator, reporter)
         else:
-            for _ in range(3):
-                self.__go_to(destination, 'norm')
-                self.wait_motor_stop(stop_indicator)
-                if stop_indicator is not None:
-                    if stop_indicator.has_stop_requested():
-                        self.stop()
-                        return False, "Der Vorgang wurde vom Benutzer abgebrochen."
+            return await self.__go_to_and_wait_async(destination, check, stop_indicator, reporter)
+
+    async def __go_to_and_wait_async(self, destination: float,
+                                     check: bool,
+                                     stop_indicator: Union[StopIndicator, None],
+                                     reporter: Union[WaitReporter, None]) -> (bool, str):
+        """Asynchrone Version von __go_to_and_wait."""
+
+        for _ in range(3):
+            if stop_indicator is not None:
+                if stop_indicator.has_stop_requested():
+                    return False, "Der Vorgang wurde vom Benutzer abgebrochen."
+            await self.__go_to_async(destination)
+            await self.wait_motor_stop_async(stop_indicator)
+            if stop_indicator is not None:
+                if stop_indicator.has_stop_requested():
+                    await self.stop_async()
+                    return False, "Der Vorgang wurde vom Benutzer abgebrochen."
 
-                if not check:
+            if not check:
+                if reporter is not None:
+                    reporter.motor_is_done(self.name)
+                return True, ""
+            else:
+                tolerance_n = self.transform_units(self.communicator.tolerance, 'contr', to='norm', rel=True)
+                if abs(await self.position_async('norm') - destination) <= tolerance_n:
                     if reporter is not None:
                         reporter.motor_is_done(self.name)
                     return True, ""
-                else:
-                    tolerance_n = self.transform_units(self.communicator.tolerance, 'contr', to='norm', rel=True)
-                    if abs(self.position('norm') - destination) <= tolerance_n:
-                        if reporter is not None:
-                            reporter.motor_is_done(self.name)
-                        return True, ""
-            return False, f'Der Zielpunkt des Motors "{self.name}" wurde nicht erreicht.'
+        return False, f'Der Zielpunkt des Motors "{self.name}" wurde nicht erreicht.'
 
-    def __go_to(self, destination: float, units: str = 'norm'):
-        destination = self.transform_units(destination, units, to='contr')
-        self.communicator.go_to(self.__invert()*destination, *self.coord())
+    async def __go_to_async(self, destination: float):
+        destination = self.transform_units(destination, 'norm', to='contr')
+        contr_destination = self.__invert()*destination
+        await self.async_communicator.go_to(contr_destination, *self.coord())
+        self.__target_sent(contr_destination)
         logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde zu {destination} geschickt.')
 
     def go(self, shift: float,
@@ -688,7 +2463,8 @@ class Motor:
            stop_indicator: StopIndicator = None,
            reporter: WaitReporter = None,
            calibrate: bool = False) -> (bool, str):
-        """Bewegt den motor relativ um gegebener Verschiebung."""
+        """Bewegt den motor relativ um gegebener Verschiebung.
+        Mit wait=False wird nicht auf das Ende der Bewegung gewartet (s. start_go)."""
 
         shift = float(shift)
         if shift == 0:
@@ -700,15 +2476,92 @@ class Motor:
             destination = position + shift
             return self.go_to(destination, 'norm', wait, check, stop_indicator, reporter)
 
+        self.__go(shift, units)
+        return True, ""
+
+    def start_go(self, shift: float,
+                 units: str = 'norm',
+                 check: bool = False,
+                 reporter: WaitReporter = None,
+                 calibrate: bool = False) -> MoveHandle:
+        """Wie go ohne wait, gibt aber ein MoveHandle zurück (s. start_go_to)."""
+
+        shift = float(shift)
+        if shift == 0:
+            return MoveHandle(self, result=(True, ""))
+
+        if (self.soft_limits != (None, None) and not calibrate) or check:
+            destination = self.position('norm') + self.transform_units(shift, units, to='norm', rel=True)
+            return self.start_go_to(destination, 'norm', check, reporter)
+
+        self.__go(shift, units)
+        return MoveHandle(self, reporter=reporter)
+
+    def __go(self, shift: float, units: str):
         shift = self.__invert()*self.transform_units(shift, units, to='contr', rel=True)
         self.communicator.go(shift, *self.coord())
+        self.__move_started(self.__estimate_move_time(shift))
+        logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde um {shift} verschoben. ')
+
+    async def go_async(self, shift: float,
+                       units: str = 'norm',
+                       wait: bool = False,
+                       check: bool = False,
+                       stop_indicator: StopIndicator = None,
+                       reporter: WaitReporter = None,
+                       calibrate: bool = False) -> (bool, str):
+        """Asynchrone Version von go."""
+
+        shift = float(shift)
+        if shift == 0:
+            return True, ""
+
+        if (self.soft_limits != (None, None) and not calibrate) or wait or check:
+            shift = self.transform_units(shift, units, to='norm', rel=True)
+            destination = await self.position_async('norm') + shift
+            return await self.go_to_async(destination, 'norm', wait, check, stop_indicator, reporter)
+
+        shift = self.__invert()*self.transform_units(shift, units, to='contr', rel=True)
+        await self.async_communicator.go(shift, *self.coord())
+        self.__move_started(self.__estimate_move_time(shift))
         logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde um {shift} verschoben. ')
         return True, ""
 
+    async def stop_async(self):
+        """Stoppt die Achse"""
+
+        await self.async_communicator.stop(*self.coord())
+        self.__move_started(None)
+        logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde gestoppt.')
+
+    async def stand_async(self) -> bool:
+        """Gibt zurück bool Wert ob Motor steht"""
+
+        return await self.async_communicator.motor_stand(*self.coord())
+
+    async def position_async(self, units: str = 'norm') -> float:
+        """Gibt die aktuelle Position zurück"""
+
+        return self.position_from_controller(await self.async_communicator.get_position(*self.coord()), units)
+
+    async def position_stream(self, units: str = 'norm', interval: float = 0.1,
+                              until_stand: bool = False) -> AsyncIterator[float]:
+        """Liefert alle interval Sekunden die aktuelle Position (für 'async for').
+        Wenn until_stand=True, endet der Strom mit der ersten Position, bei der der Motor steht.
+        """
+
+        while True:
+            stand = until_stand and await self.stand_async()
+            yield await self.position_async(units)
+            if stand:
+                return
+            await asyncio.sleep(interval)
+
     def stop(self):
         """Stoppt die Achse"""
 
         self.communicator.stop(*self.coord())
+        self.__move_started(None)
         logging.info(f'Motor {self.axis} beim Controller {self.controller.bus} wurde gestoppt.')
 
     def stand(self):
@@ -724,18 +2577,52 @@ class Motor:
     def read_parameter(self, parameter_name: str) -> float:
         """Liest einen Parameter Nummer number für die Achse"""
 
-        return self.communicator.get_parameter(parameter_name, *self.coord())
+        value = self.communicator.get_parameter(parameter_name, *self.coord())
+        self.parameters[parameter_name] = value
+        self.__dirty_parameters.discard(parameter_name)
+        return value
 
     def set_parameter(self, parameter_name: str, new_value: float):
         """Ändert einen Parameter Nummer number für die Achse"""
 
+        self.pending_parameters.pop(parameter_name, None)
+        self.__dirty_parameters.add(parameter_name)
         self.communicator.set_parameter(parameter_name, new_value, *self.coord())
+        self.parameters[parameter_name] = new_value
+        self.__dirty_parameters.discard(parameter_name)
+
+    def parameter_is_cached(self, parameter_name: str) -> bool:
+        """Zeigt, ob der Wert des Parameters im Controller bekannt ist und ohne Abfrage gelesen werden kann."""
+
+        return parameter_name in self.parameters and parameter_name not in self.__dirty_parameters
+
+    def invalidate_parameters(self, parameter_names: Iterable[str] = None):
+        """Markiert die angegebenen (ohne Angabe: alle) Parameter als veraltet, z.B. nach einem Neustart
+        des Controllers. Sie werden beim nächsten get_parameters gelesen und von set_parameters neu geschrieben."""
+
+        if parameter_names is None:
+            parameter_names = self.communicator.PARAMETER_DEFAULT.keys()
+        self.__dirty_parameters.update(parameter_names)
 
     def position(self, units: str = 'norm') -> float:
         """Gibt die aktuelle __position zurück"""
 
-        position = self.__invert() * self.communicator.get_position(*self.coord())
-        return self.transform_units(position, 'contr', to=units)
+        return self.position_from_controller(self.communicator.get_position(*self.coord()), units)
+
+    def position_from_controller(self, value: float, units: str = 'norm') -> float:
+        """Rechnet eine vom Controller gelesene Position in die angegebenen Einheiten um."""
+
+        return self.transform_units(self.__invert() * value, 'contr', to=units)
+
+    def position_to_controller(self, destination: float, units: str = 'norm') -> float:
+        """Rechnet einen Zielpunkt in die Position für den Controller um, wie go_to mit check=True.
+        TravelError, wenn der Zielpunkt außerhalb der Soft Limits liegt."""
+
+        destination = self.transform_units(float(destination), units, to='norm')
+        in_limits, destination = self.__apply_soft_limits(destination, True)
+        if not in_limits:
+            raise TravelError(destination)
+        return self.__invert() * self.transform_units(destination, 'norm', to='contr')
 
     def __invert(self):
 
@@ -815,6 +2702,15 @@ class Motor:
 
     def calibrate(self, stop_indicator: StopIndicator = None, reporter: WaitReporter = None, go_to_middle: bool = True):
         """Kalibrierung von den gegebenen Motoren"""
+
+        if stop_indicator is not None:
+            with stop_indicator.watching([self]):
+                return self.__calibrate(stop_indicator, reporter, go_to_middle)
+        else:
+            return self.__calibrate(stop_indicator, reporter, go_to_middle)
+
+    def __calibrate(self, stop_indicator: Union[StopIndicator, None], reporter: Union[WaitReporter, None],
+                    go_to_middle: bool):
         if self.with_initiators() or self.with_encoder():
             logging.info(f'Kalibrierung vom Motor {self.name} wurde angefangen.')
 
@@ -878,14 +2774,15 @@ class Motor:
         self.soft_limits = tuple(map(transform, soft_limits))
 
     def wait_motor_stop(self, stop_indicator: Union[StopIndicator, None] = None):
-        """Haltet die programme, bis alle Motoren stoppen."""
+        """Haltet die programme, bis der Motor stoppt."""
 
-        time.sleep(0.1)
-        while not self.stand():
-            if stop_indicator is not None:
-                if stop_indicator.has_stop_requested():
-                    return
-            time.sleep(0.2)
+        self.communicator.status_poller().wait_stop([self.coord()], stop_indicator, [self.expected_move_time()])
+
+    async def wait_motor_stop_async(self, stop_indicator: Union[StopIndicator, None] = None):
+        """Wartet, bis der Motor stoppt, ohne die Ereignisschleife zu blockieren."""
+
+        await self.async_communicator.status_poller().wait_stop([self.coord()], stop_indicator,
+                                                                [await self.expected_move_time_async()])
 
     def set_display_null(self, displ_null: float = None):
         """Anzeiger Null in normierte Einheiten einstellen"""
@@ -916,7 +2813,7 @@ class Motor:
         """Einstellt Name, Initiatoren Status, display_units, display_u_per_step anhand angegebene Dict"""
 
         if motor_config is None:
-            self.config = deepcopy(self.DEFAULT_MOTOR_CONFIG)
+            self.config.update(self.DEFAULT_MOTOR_CONFIG)
         else:
             for key, value in motor_config.items():
                 if key == 'name':
@@ -927,27 +2824,38 @@ class Motor:
                     raise ValueError(f'Falsche config-key: "{key}"')
 
     def get_parameters(self) -> Dict[str, float]:
-        """Liest die Parametern aus Controller und gibt zurück Dict mit Parameterwerten"""
+        """Gibt zurück Dict mit Parameterwerten. Nur die nicht bekannten oder veralteten Parameter
+        werden aus dem Controller gelesen."""
 
         parameters_values = {}
         for par_name in self.communicator.PARAMETER_DEFAULT.keys():
-            parameter_value = self.read_parameter(par_name)
-            parameters_values[par_name] = parameter_value
+            if self.parameter_is_cached(par_name):
+                parameters_values[par_name] = self.parameters[par_name]
+            else:
+                parameters_values[par_name] = self.read_parameter(par_name)
         return parameters_values
 
     def set_parameters(self, parameters_values: Dict[str, float] = None):
-        """Die Parametern einstellen laut angegebene Dict mit Parameterwerten"""
+        """Die Parametern einstellen laut angegebene Dict mit Parameterwerten, zusammen mit den noch nicht
+        geschickten pending_parameters. Es werden nur die Werte geschickt, die sich vom bekannten Stand
+        des Controllers unterscheiden."""
 
         # Parameter_Werte = {'Lauffrequenz': 4000, 'Stoppstrom': 5, 'Laufstrom': 11, 'Booststrom': 18}
 
         if parameters_values is None:
             parameters_values = deepcopy(self.communicator.PARAMETER_DEFAULT)
+        parameters_values = {**self.pending_parameters, **parameters_values}
+        self.pending_parameters = {}
 
         for name, value in parameters_values.items():
-            self.set_parameter(name, value)
+            if not self.parameter_is_cached(name) or self.parameters[name] != value:
+                self.set_parameter(name, value)
+
+    UNITS = ("norm", "displ", "displ_centr", "contr")
 
-    def transform_units(self, value: float, current_u: str, to: str, rel: bool = False) -> float:
-        """Transformiert einen Wert in andere Einheiten.
+    def transform_units(self, value: Union[float, np.ndarray], current_u: str, to: str,
+                        rel: bool = False) -> Union[float, np.ndarray]:
+        """Transformiert einen Wert (oder ein numpy-Array von Werten, z.B. einen ganzen Pfad) in andere Einheiten.
 
         Durch diese Funktion erfolgt die Transformation zwischen 4 Einheiten:
         'contr' - Einheiten des Controllers
@@ -960,79 +2868,95 @@ class Motor:
         und des durch Benutzer eingestellten Anzeiger-Systems.
         """
 
-        units_list = ["norm", "displ", "displ_centr", "contr"]
-        if current_u not in units_list:
-            raise ValueError(f'Unbekante Einheiten! {units_list} wurde erwartet und kein: "{current_u}".')
-        elif to not in units_list:
-            raise ValueError(f'Unbekante Einheiten! {units_list} wurde erwartet und kein: "{to}".')
+        if current_u not in self.UNITS:
+            raise ValueError(f'Unbekante Einheiten! {list(self.UNITS)} wurde erwartet und kein: "{current_u}".')
+        elif to not in self.UNITS:
+            raise ValueError(f'Unbekante Einheiten! {list(self.UNITS)} wurde erwartet und kein: "{to}".')
         if current_u == to:
             return value
+        if isinstance(value, (list, tuple)):
+            value = np.asarray(value, dtype=float)
+
+        per_from, null_from, null_to, per_to = self.__coefficients(current_u, to, rel)
+        return (value / per_from + null_from - null_to) * per_to
+
+    def __coefficients(self, current_u: str, to: str, rel: bool) -> Tuple[float, float, float, float]:
+        """Koeffizienten der Umrechnung über Controller-Einheiten: contr = Wert/per_from + null_from,
+        Ergebnis = (contr - null_to)*per_to. Sie werden zwischengespeichert, bis sich die Zeile des Motors
+        in der MotorStateTable ändert."""
+
+        version = (id(self.state_table), self.state_row, self.state_table.row_version(self.state_row))
+        if self.__coefficients_version != version:
+            self.__coefficients_cache = {}
+            self.__coefficients_version = version
+
+        key = (current_u, to, rel)
+        coefficients = self.__coefficients_cache.get(key)
+        if coefficients is None:
+            per_from, null_from = self.__to_contr(current_u)
+            per_to, null_to = self.__to_contr(to)
+            if rel:
+                null_from = null_to = 0.0
+            coefficients = self.__coefficients_cache[key] = (per_from, null_from, null_to, per_to)
+        return coefficients
+
+    def __to_contr(self, units: str) -> Tuple[float, float]:
+        """Gibt (per, null) zurück, mit contr = Wert/per + null."""
+
+        if units == 'contr':
+            return 1.0, 0.0
+        norm_per_contr, null_position = self.config['norm_per_contr'], self.config['null_position']
+        if units == 'norm':
+            return norm_per_contr, null_position
+        displ_null = 500 if units == 'displ_centr' else self.config['displ_null']
+        return self.config['displ_per_contr'], displ_null / norm_per_contr + null_position
+
+
+class LaneExecutor:
+    """Dauerhafter Thread-Pool eines MotorsCluster mit einer Spur (lane) pro Communicator-Leitung.
+
+    Jede Spur ist ein eigener ThreadPoolExecutor mit höchstens so vielen Threads, wie Motoren dieser Leitung
+    gleichzeitig beschäftigt werden. Die Threads werden zwischen den Aufrufen wiederverwendet, so dass z.B.
+    path_travel nicht in jedem Punkt einen neuen Pool aufbaut, und eine hängende Leitung belegt keine Threads
+    der anderen.
+    """
 
-        if current_u == "displ_centr":
-            current_u = "displ"
-            curr_centered = True
-        else:
-            curr_centered = False
-
-        if to == "displ_centr":
-            to = "displ"
-            to_centered = True
-        else:
-            to_centered = False
-
-        if current_u == "contr" and to == "norm":
-            return self.__contr_to_norm(value, rel)
-        elif current_u == "norm" and to == "contr":
-            return self.__norm_to_contr(value, rel)
-        elif current_u == "norm" and to == "displ":
-            value = self.__norm_to_contr(value, rel)
-            return self.__contr_to_displ(value, rel, to_centered)
-        elif current_u == "displ" and to == "norm":
-            value = self.__displ_to_contr(value, rel, curr_centered)
-            return self.__contr_to_norm(value, rel)
-        elif current_u == "contr" and to == "displ":
-            return self.__contr_to_displ(value, rel, to_centered)
-        elif current_u == "displ" and to == "contr":
-            return self.__displ_to_contr(value, rel, curr_centered)
-        elif current_u == "displ" and to == "displ":
-            value = self.__displ_to_contr(value, rel, curr_centered)
-            return self.__contr_to_displ(value, rel, to_centered)
-
-    def __contr_to_norm(self, value: float, rel: bool = False) -> float:
-        if not rel:
-            value = value - self.config['null_position']
-        value *= self.config['norm_per_contr']
-        return value
-
-    def __norm_to_contr(self, value: float, rel: bool = False) -> float:
-        value /= self.config['norm_per_contr']
-        if not rel:
-            value = value + self.config['null_position']
-        return value
+    def __init__(self, name: str = 'MotorsCluster'):
+        self.name = name
+        self.__lock = threading.Lock()
+        self.__lanes: Dict[ContrCommunicator, Tuple[concurrent.futures.ThreadPoolExecutor, int]] = {}
 
-    def __contr_to_displ(self, value: float, rel: bool = False, centered: bool = False) -> float:
+    def map(self, fn: Callable, motors: Iterable['Motor'], *iterables: Iterable) -> List:
+        """Ruft fn(motor, *args) für jeden Motor in der Spur seines Communicators auf und gibt die Ergebnisse
+        in derselben Reihenfolge zurück. Die erste Ausnahme wird weitergegeben, wenn alle Aufrufe beendet sind."""
 
-        if centered:
-            displ_null = 500
-        else:
-            displ_null = self.config['displ_null']
+        calls = list(zip(motors, *iterables))
+        demand: Dict[ContrCommunicator, int] = {}
+        for motor, *_ in calls:
+            demand[motor.communicator] = demand.get(motor.communicator, 0) + 1
+        lanes = {communicator: self.__lane(communicator, n) for communicator, n in demand.items()}
 
-        if not rel:
-            value = value - self.__norm_to_contr(displ_null)
-        value *= self.config['displ_per_contr']
-        return value
+        futures = [lanes[motor.communicator].submit(fn, motor, *args) for motor, *args in calls]
+        concurrent.futures.wait(futures)
+        return [future.result() for future in futures]
 
-    def __displ_to_contr(self, value: float, rel: bool = False, centered: bool = False) -> float:
+    def __lane(self, communicator: ContrCommunicator, workers: int) -> concurrent.futures.ThreadPoolExecutor:
+        with self.__lock:
+            lane, size = self.__lanes.get(communicator, (None, 0))
+            if size < workers:
+                if lane is not None:
+                    lane.shutdown(wait=False)
+                lane = concurrent.futures.ThreadPoolExecutor(workers, f'{self.name}-{type(communicator).__name__}')
+                self.__lanes[communicator] = lane, workers
+            return lane
 
-        if centered:
-            displ_null = 500
-        else:
-            displ_null = self.config['displ_null']
+    def shutdown(self, wait: bool = True):
+        """Beendet alle Spuren."""
 
-        value /= self.config['displ_per_contr']
-        if not rel:
-            value = value + self.__norm_to_contr(displ_null)
-        return value
+        with self.__lock:
+            lanes, self.__lanes = list(self.__lanes.values()), {}
+        for lane, _ in lanes:
+            lane.shutdown(wait)
 
 
 class MotorsCluster:
@@ -1042,18 +2966,29 @@ class MotorsCluster:
     Wichtig: Namen der Motoren müssen einzigartig sein, da die Motoren mit ihren Namen identifiziert werden.
     """
 
-    def __init__(self, motors: List[Motor] = None):
+    def __init__(self, motors: List[Motor] = None, executor: LaneExecutor = None, state: MotorStateTable = None):
 
         if motors is None:
             motors = []
 
         self.motors: Dict[str, Motor] = {}
+        self.__names: Dict[Motor, str] = {}  # Name, unter dem jeder Motor in self.motors steht
+        self.__by_coord: Dict[M_Coord, List[Motor]] = {}  # (bus, Achse) kann sich in mehreren Boxen wiederholen
+        # Die Zustände der Motoren liegen in der Tabelle des Clusters; eine Ansicht übernimmt keine Motoren.
+        self.__owns_state = state is None
+        self.state = MotorStateTable(len(motors)) if state is None else state
         self.add_motors(motors)
         self.__mutex = threading.Lock()
+        # eine Ansicht (view) benutzt die Threads ihres Clusters und beendet sie nicht beim close
+        self.__owns_executor = executor is None
+        self.__executor = LaneExecutor(type(self).__name__) if executor is None else executor
 
     def __iter__(self):
         return self.motors.values().__iter__()
 
+    def __contains__(self, motor: Motor) -> bool:
+        return motor in self.__names
+
     def names(self) -> Tuple[str]:
         return tuple(self.motors.keys())
 
@@ -1063,6 +2998,10 @@ class MotorsCluster:
         for motor in motors:
             if motor.name not in self.motors.keys():
                 self.motors[motor.name] = motor
+                self.__names[motor] = motor.name
+                self.__by_coord.setdefault(motor.coord(), []).append(motor)
+                if self.__owns_state:
+                    self.state.adopt([motor])
             elif self.motors[motor.name] is not motor:
                 raise MotorNamesError(f'Es gibt die wiederholte Namen der Motoren! '
                                       f'Der Name "{motor.name}" ist mehrmals getroffen.')
@@ -1070,10 +3009,14 @@ class MotorsCluster:
     def remove_motors(self, motors: Iterable[Motor]):
         """Entfernt die eingegebene Motoren aus dem Cluster, wenn die da vorhanden sind."""
 
-        m_keys = {v: k for k, v in self.motors.items()}
         for motor in motors:
-            if motor in self.motors.values():
-                del self.motors[m_keys[motor]]
+            name = self.__names.pop(motor, None)
+            if name is not None:
+                del self.motors[name]
+                same_coord = self.__by_coord[motor.coord()]
+                same_coord.remove(motor)
+                if not same_coord:
+                    del self.__by_coord[motor.coord()]
 
     def get_motor(self, name: str) -> Motor:
         if name not in self.motors.keys():
@@ -1081,6 +3024,64 @@ class MotorsCluster:
         else:
             return self.motors[name]
 
+    def view(self, names: Iterable[str] = None, pattern: str = None, bus: int = None,
+             communicator: ContrCommunicator = None) -> 'MotorsCluster':
+        """Gibt einen Teil-Cluster mit denselben Motor-Objekten und denselben Threads zurück.
+        Die Motoren werden nach Namen, einem regulären Ausdruck für den Namen (re.search), der Bus-Nummer
+        und dem Communicator ausgewählt; ohne Angabe alle Motoren."""
+
+        motors = list(self) if names is None else self.get_motors(list(names))
+        if pattern is not None:
+            regex = re.compile(pattern)
+            motors = [motor for motor in motors if regex.search(motor.name)]
+        if bus is not None:
+            motors = [motor for motor in motors if motor.controller.bus == bus]
+        if communicator is not None:
+            motors = [motor for motor in motors if motor.communicator is communicator]
+        return MotorsCluster(motors, self.__executor, self.state)
+
+    def transform_units(self, values: Union[np.ndarray, List], current_u: str, to: str, rel: bool = False,
+                        names: List[str] = None) -> np.ndarray:
+        """Rechnet die Werte für viele Motoren auf einmal um (wie Motor.transform_units).
+        Die letzte Achse von values entspricht den Motoren names (ohne Angabe: names()),
+        so dass auch ganze Pfade der Form (Punkte, Motoren) umgerechnet werden."""
+
+        motors = list(self) if names is None else self.get_motors(names)
+        return MotorStateTable.transform(MotorStateTable.gather(motors), values, current_u, to, rel)
+
+    def out_of_soft_limits(self, values: Union[np.ndarray, List], units: str = 'norm',
+                           names: List[str] = None) -> np.ndarray:
+        """Gibt für jeden Wert zurück, ob er für seinen Motor außerhalb der Soft Limits liegt
+        (oder die Soft Limits des Motors widersprüchlich sind). NaN gilt als 'kein Wert' und liegt nie außerhalb."""
+
+        motors = list(self) if names is None else self.get_motors(names)
+        columns = MotorStateTable.gather(motors)
+        values = MotorStateTable.transform(columns, values, units, 'norm')
+        with np.errstate(invalid='ignore'):
+            return ~np.isnan(values) & ((values < columns['min_limit']) | (values > columns['max_limit']) |
+                                        (columns['max_limit'] < columns['min_limit']))
+
+    @staticmethod
+    def __from_controller(motors: List[Motor], readings: List[float], units: str) -> np.ndarray:
+        """Vektorisierte Form von Motor.position_from_controller."""
+
+        columns = MotorStateTable.gather(motors)
+        readings = np.where(columns['inversion'] != 0, -1.0, 1.0) * np.asarray(readings, dtype=float)
+        return MotorStateTable.transform(columns, readings, 'contr', units)
+
+    def get_motor_by_coord(self, coord: M_Coord, communicator: ContrCommunicator = None) -> Motor:
+        """Gibt den Motor mit den Koordinaten (bus, Achse) zurück. Gehören die Motoren des Clusters
+        zu mehreren Communicators, muss der Communicator angegeben werden."""
+
+        motors = self.__by_coord.get(tuple(coord), [])
+        if communicator is not None:
+            motors = [motor for motor in motors if motor.communicator is communicator]
+        if not motors:
+            raise ValueError(f"Es gibt kein Motor mit solchen Koordinaten: {coord}")
+        elif len(motors) > 1:
+            raise ValueError(f"Die Koordinaten {coord} sind nicht eindeutig, der Communicator muss angegeben werden.")
+        return motors[0]
+
     def get_motors(self, names: List[str]) -> List[Motor]:
         motors = []
         for name in names:
@@ -1096,6 +3097,11 @@ class MotorsCluster:
         for motor in self:
             motor.stop()
 
+    async def stop_async(self):
+        """Stoppt alle Motoren im Cluster."""
+
+        await asyncio.gather(*(motor.stop_async() for motor in self))
+
     def go_to(self, destinations: Dict[str, float],
               units: str = 'norm',
               wait: bool = False,
@@ -1104,7 +3110,7 @@ class MotorsCluster:
               reporter: WaitReporter = None
               ) -> (bool, str):
         """Schickt die angegebene Motoren zu den angegebenen Positionen. Nimmt neue Ziel-Koordinaten im Format von
-        Dict {Motorname: Zielposition, ...}
+        Dict {Motorname: Zielposition, ...}.
         """
 
         return self.__move(destinations, 'go_to', units, wait, check, stop_indicator, reporter)
@@ -1117,11 +3123,31 @@ class MotorsCluster:
            reporter: WaitReporter = None
            ) -> (bool, str):
         """Verschiebt die angegebene Motoren zu den angegebenen Verschiebungen im Format von
-        Dict {Motorname: Verschiebung, ...}
+        Dict {Motorname: Verschiebung, ...}.
         """
 
         return self.__move(shifts, 'go', units, wait, check, stop_indicator, reporter)
 
+    def start_go_to(self, destinations: Dict[str, float],
+                    units: str = 'norm',
+                    check: bool = True,
+                    reporter: WaitReporter = None) -> ClusterMoveHandle:
+        """Wie go_to ohne wait, gibt aber ein ClusterMoveHandle zurück."""
+
+        self.__check_names_list(destinations.keys())
+        return ClusterMoveHandle({name: self.motors[name].start_go_to(destination, units, check, reporter)
+                                  for name, destination in destinations.items()})
+
+    def start_go(self, shifts: Dict[str, float],
+                 units: str = 'norm',
+                 check: bool = True,
+                 reporter: WaitReporter = None) -> ClusterMoveHandle:
+        """Wie go ohne wait, gibt aber ein ClusterMoveHandle zurück."""
+
+        self.__check_names_list(shifts.keys())
+        return ClusterMoveHandle({name: self.motors[name].start_go(shift, units, check, reporter)
+                                  for name, shift in shifts.items()})
+
     def __move(self, values: Dict[str, float],
                m_type: str,
                units: str = 'norm',
@@ -1132,11 +3158,11 @@ class MotorsCluster:
                ) -> (bool, str):
         """Ruft go oder go_to Methode für die angegebene Motoren."""
 
-        def call_movement(name: str, value: float) -> (bool, str):
+        def call_movement(motor: Motor, value: float) -> (bool, str):
             if m_type == 'go_to':
-                return self.motors[name].go_to(value, units, wait, check, stop_indicator, reporter)
+                return motor.go_to(value, units, wait, check, stop_indicator, reporter)
             elif m_type == 'go':
-                return self.motors[name].go(value, units, wait, check, stop_indicator, reporter)
+                return motor.go(value, units, wait, check, stop_indicator, reporter)
             else:
                 raise ValueError
 
@@ -1146,19 +3172,67 @@ class MotorsCluster:
         # Motoren zu den Ziel-Koordinaten schicken
         if not wait:
             for name, destination in values.items():
-                call_movement(name, destination)
+                call_movement(self.motors[name], destination)
             return True, ""
         else:
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                results = executor.map(call_movement, values.keys(), values.values())
+            results = self.__executor.map(call_movement, self.get_motors(list(values.keys())), values.values())
+
+            success = True
+            message = ""
+            for result in results:
+                if not result[0]:
+                    success = False
+                    message += result[1] + '\n'
+            return success, message
+
+    async def go_to_async(self, destinations: Dict[str, float],
+                          units: str = 'norm',
+                          wait: bool = False,
+                          check: bool = True,
+                          stop_indicator: StopIndicator = None,
+                          reporter: WaitReporter = None
+                          ) -> (bool, str):
+        """Asynchrone Version von go_to. Alle Motoren werden gleichzeitig in derselben Ereignisschleife bewegt."""
+
+        return await self.__move_async(destinations, 'go_to', units, wait, check, stop_indicator, reporter)
+
+    async def go_async(self, shifts: Dict[str, float],
+                       units: str = 'norm',
+                       wait: bool = False,
+                       check: bool = True,
+                       stop_indicator: StopIndicator = None,
+                       reporter: WaitReporter = None
+                       ) -> (bool, str):
+        """Asynchrone Version von go."""
+
+        return await self.__move_async(shifts, 'go', units, wait, check, stop_indicator, reporter)
+
+    async def __move_async(self, values: Dict[str, float],
+                           m_type: str,
+                           units: str = 'norm',
+                           wait: bool = False,
+                           check: bool = True,
+                           stop_indicator: StopIndicator = None,
+                           reporter: WaitReporter = None
+                           ) -> (bool, str):
+        """Ruft go_async oder go_to_async Methode für die angegebene Motoren."""
+
+        if m_type not in ('go_to', 'go'):
+            raise ValueError
+
+        # Namen in Dict prüfen
+        self.__check_names_list(values.keys())
 
-                success = True
-                message = ""
-                for result in results:
-                    if not result[0]:
-                        success = False
-                        message += result[1] + '\n'
-                return success, message
+        results = await asyncio.gather(*(getattr(self.motors[name], m_type + '_async')(
+            value, units, wait, check, stop_indicator, reporter) for name, value in values.items()))
+
+        success = True
+        message = ""
+        for result in results:
+            if not result[0]:
+                success = False
+                message += result[1] + '\n'
+        return success, message
 
     def path_travel(self, path: List[Dict[str, float]],
                     action: Callable,
@@ -1180,6 +3254,65 @@ class MotorsCluster:
             res.append(action())
         return res
 
+    async def path_travel_async(self, path: List[Dict[str, float]],
+                                action: Callable,
+                                units: str = 'norm',
+                                stop_indicator: StopIndicator = None,
+                                reporter: WaitReporter = None) -> list:
+        """Asynchrone Version von path_travel. 'action' kann eine normale Funktion oder eine Koroutinefunktion sein."""
+
+        res = []
+        for point in path:
+            if reporter is not None:
+                reporter.set_wait_list(set(point.keys()))
+            success, mess = await self.go_to_async(point, units, True, True, stop_indicator, reporter)
+            if stop_indicator is not None:
+                if stop_indicator.has_stop_requested():
+                    return res
+            if not success:
+                raise TravelError(mess)
+            result = action()
+            if inspect.isawaitable(result):
+                result = await result
+            res.append(result)
+        return res
+
+    def stream_path(self, path: List[Dict[str, float]],
+                    units: str = 'norm',
+                    rate: float = None,
+                    stop_indicator: StopIndicator = None) -> bool:
+        """Fährt die Motoren ohne Halt durch die (dichten) Punkte in 'path'. Die Punkte werden dem Controller
+        als Trajektorie übergeben, der sie im Takt von rate Punkten/s selbst abfährt (None = eingestellter Takt).
+        Alle Motoren müssen an einem Controller hängen, der das unterstützt (sonst NotSupportedError).
+        Gibt False zurück, wenn der Vorgang durch stop_indicator abgebrochen wurde."""
+
+        names = list(dict.fromkeys(name for point in path for name in point))
+        self.__check_names_list(names)
+        motors = self.get_motors(names)
+        groups = self.__by_communicator(motors)
+        if len(groups) > 1:
+            raise NotSupportedError('Eine Trajektorie kann nur an einen einzigen Controller übergeben werden.')
+        if not groups:
+            return True
+
+        # alle Punkte vor dem Start auf einmal umrechnen und prüfen (NaN: Motor kommt im Punkt nicht vor)
+        values = np.array([[point.get(name, np.nan) for name in names] for point in path], dtype=float)
+        out_of_limits = self.out_of_soft_limits(values, units, names)
+        if out_of_limits.any():
+            name = names[np.argwhere(out_of_limits)[0][1]]
+            raise TravelError(f'Der Zielpunkt des Motors "{name}" liegt außerhalb der Soft Limits!')
+        columns = MotorStateTable.gather(motors)
+        contr_values = np.where(columns['inversion'] != 0, -1.0, 1.0) * \
+            MotorStateTable.transform(columns, values, units, 'contr')
+        coords = [motor.coord() for motor in motors]
+        frames = [{coord: float(value) for coord, value, point_value in zip(coords, row, point_row)
+                   if not np.isnan(point_value)} for row, point_row in zip(contr_values, values)]
+        communicator = next(iter(groups))
+        if stop_indicator is None:
+            return communicator.stream_trajectory(frames, rate)
+        with stop_indicator.watching(motors):
+            return communicator.stream_trajectory(frames, rate, stop_indicator)
+
     def positions(self, units: str = 'norm', motors_list: List[str] = None) -> Dict[str, float]:
         """Gibt zurück die Posotionen der angegebene Motoren. Wenn nichts angegeben wird, dann von allen Motoren."""
 
@@ -1189,10 +3322,55 @@ class MotorsCluster:
             # Namen in der Liste prüfen
             self.__check_names_list(motors_list)
 
+        # pro Communicator eine Abfrage für alle seine Motoren
+        positions = {}
+        for communicator, motors in self.__by_communicator(self.get_motors(list(motors_list))).items():
+            readings = communicator.get_positions([motor.coord() for motor in motors])
+            for motor, position in zip(motors, self.__from_controller(motors, readings, units)):
+                positions[motor.name] = float(position)
+        return {name: positions[name] for name in motors_list}
+
+    async def positions_async(self, units: str = 'norm', motors_list: List[str] = None) -> Dict[str, float]:
+        """Asynchrone Version von positions."""
+
+        if motors_list is None:
+            motors_list = list(self.motors.keys())
+        else:
+            # Namen in der Liste prüfen
+            self.__check_names_list(motors_list)
+
+        groups = list(self.__by_communicator(self.get_motors(motors_list), asynchronous=True).items())
+        readings = await asyncio.gather(*(communicator.get_positions([motor.coord() for motor in motors])
+                                          for communicator, motors in groups))
         positions = {}
-        for motor_name in motors_list:
-            positions[motor_name] = self.motors[motor_name].position(units)
-        return positions
+        for (_, motors), group_readings in zip(groups, readings):
+            for motor, position in zip(motors, self.__from_controller(motors, group_readings, units)):
+                positions[motor.name] = float(position)
+        return {name: positions[name] for name in motors_list}
+
+    async def positions_stream(self, units: str = 'norm', interval: float = 0.1, motors_list: List[str] = None,
+                               until_stand: bool = False) -> AsyncIterator[Dict[str, float]]:
+        """Liefert alle interval Sekunden die Positionen der angegebenen Motoren (für 'async for').
+        Wenn until_stand=True, endet der Strom mit den ersten Positionen, bei denen alle Motoren stehen.
+        """
+
+        while True:
+            stand = until_stand and await self.all_motors_stand_async()
+            yield await self.positions_async(units, motors_list)
+            if stand:
+                return
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def __by_communicator(motors: Iterable[Motor], asynchronous: bool = False) \
+            -> Dict[Union[ContrCommunicator, AsyncContrCommunicator], List[Motor]]:
+        """Teilt die Motoren nach ihren (asynchronen) Communicators auf."""
+
+        groups = {}
+        for motor in motors:
+            communicator = motor.async_communicator if asynchronous else motor.communicator
+            groups.setdefault(communicator, []).append(motor)
+        return groups
 
     def __check_names_list(self, motors_list: List[str]):
         """Prüft ob die Motoren mit angegebenen Namen vorhanden sind."""
@@ -1251,19 +3429,33 @@ class MotorsCluster:
     def all_motors_stand(self) -> bool:
         """Gibt bool Wert zurück, ob alle Motoren stehen."""
 
-        for motor in self:
-            if not motor.stand():
+        for communicator, motors in self.__by_communicator(self).items():
+            if not all(communicator.motors_stand([motor.coord() for motor in motors])):
                 return False
         return True
 
     def wait_all_motors_stop(self, stop_indicator: Union[StopIndicator, None] = None):
         """Haltet die programme, bis alle Motoren stoppen."""
 
-        while not self.all_motors_stand():
-            if stop_indicator is not None:
-                if stop_indicator.has_stop_requested():
-                    return
-            time.sleep(0.5)
+        futures = [motor.communicator.status_poller().watch(*motor.coord(), motor.expected_move_time())
+                   for motor in self]
+        wait_futures(futures, stop_indicator)
+
+    async def all_motors_stand_async(self) -> bool:
+        """Gibt bool Wert zurück, ob alle Motoren stehen."""
+
+        groups = self.__by_communicator(self, asynchronous=True).items()
+        stands = await asyncio.gather(*(communicator.motors_stand([motor.coord() for motor in motors])
+                                        for communicator, motors in groups))
+        return all(all(group_stands) for group_stands in stands)
+
+    async def wait_all_motors_stop_async(self, stop_indicator: Union[StopIndicator, None] = None):
+        """Wartet, bis alle Motoren stoppen, ohne die Ereignisschleife zu blockieren."""
+
+        durations = await asyncio.gather(*(motor.expected_move_time_async() for motor in self))
+        futures = [motor.async_communicator.status_poller().watch(*motor.coord(), duration)
+                   for motor, duration in zip(self, durations)]
+        await wait_futures_async(futures, stop_indicator)
 
     def calibratable_motors(self) -> List[Motor]:
         """Gibt zurück eine Liste der allen Motoren, die kalibriert werden können,
@@ -1320,9 +3512,8 @@ class MotorsCluster:
             reporter.set_wait_list(wait_list)
 
         if parallel:
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                executor.map(lambda motor: motor.calibrate(stop_indicator, reporter, go_to_middle), motors_to_calibration)
-                executor.shutdown(wait=True)
+            self.__executor.map(lambda motor: motor.calibrate(stop_indicator, reporter, go_to_middle),
+                                motors_to_calibration)
         else:
             for motor in motors_to_calibration:
                 motor.calibrate(stop_indicator, reporter, go_to_middle)
@@ -1405,6 +3596,8 @@ class MotorsCluster:
         """Alle nötige am Ende der Arbeit Operationen ausführen."""
 
         self.stop()
+        if self.__owns_executor:
+            self.__executor.shutdown()
         del self
 
 
@@ -1439,24 +3632,30 @@ def make_empty_input_file(communicator: ContrCommunicator,
 class Box:
     """Diese Klasse entspricht einer Box, die mehrere Controller-Modulen im Busbetrieb enthaltet."""
 
-    def __init__(self, communicator: ContrCommunicator, input_file: str | Tuple[str, str] = None, tolerance: float = None):
+    def __init__(self, communicator: ContrCommunicator, input_file: str | Tuple[str, str] = None, tolerance: float = None,
+                 async_communicator: AsyncContrCommunicator = None, snapshot: str = None):
         self.communicator = communicator
+        if async_communicator is None:
+            async_communicator = ThreadedAsyncCommunicator(communicator)
+        self.async_communicator = async_communicator
 
         self.report = ""
         self.controller: Dict[int, Controller] = {}
-
+        self.__executor = LaneExecutor(type(self).__name__)
 
         if tolerance is None:
             self.tolerance = communicator.tolerance
         else:
             self.tolerance = tolerance
 
-        if input_file is not None:
+        if snapshot is not None and self.__restore_snapshot(snapshot):
+            pass
+        elif input_file is not None:
             self.initialize_with_input_file(input_file)
         else:
             self.initialize()
 
-        self.motors_cluster = MotorsCluster(list(self.motors()))
+        self.motors_cluster = MotorsCluster(list(self.motors()), self.__executor)
 
     def __iter__(self):
         return (controller for controller in self.controller.values())
@@ -1471,8 +3670,9 @@ class Box:
             for motor in controller:
                 yield motor
 
-    def get_motors_cluster(self):
-        return deepcopy(self.motors_cluster)
+    def get_motors_cluster(self) -> MotorsCluster:
+        """Gibt einen Cluster mit allen Motoren der Box zurück, der dieselben Motor-Objekte benutzt."""
+        return self.motors_cluster.view()
 
     def command(self, text: bytes) -> bytes:
         """Befehl für die Box ausführen"""
@@ -1488,15 +3688,16 @@ class Box:
         n_axes = 0
 
         self.controller = {}
-        for i in self.communicator.bus_list():
-            self.controller[i] = Controller(self.communicator, i)
+        for i in self.communicator.cached_bus_list():
+            self.controller[i] = Controller(self.communicator, i, self.async_communicator)
 
         for controller in self:
-            controller.make_motors()
+            controller.make_motors(apply_parameters=False)
             axes_in_controller = len(controller.motor)
             n_axes += axes_in_controller
 
             report += f"Controller {controller.bus} ({axes_in_controller} Achsen)\n"
+        self.set_parameters({coord: {} for coord in self.motors_list()})
 
         report = f"Box wurde initialisiert. {len(self.controller)} Controller und {n_axes} Achsen gefunden:\n" + report
         logging.info(report)
@@ -1525,7 +3726,7 @@ class Box:
         for bus in controllers_to_init:
             bus_is_available, massage = self.communicator.bus_check(bus)
             if bus_is_available:
-                self.controller[bus] = Controller(self.communicator, bus)
+                self.controller[bus] = Controller(self.communicator, bus, self.async_communicator)
                 n_controllers += 1
             else:
                 if bus not in absent_bus:
@@ -1542,16 +3743,17 @@ class Box:
             if bus in absent_bus:
                 del_motor_from_init(bus, axis)
             else:
-                if axis in self.communicator.axes_list(bus):
-                    self.controller[bus].motor[axis] = Motor(self.controller[bus], axis)
+                if axis in self.communicator.cached_axes_list(bus):
+                    self.controller[bus].motor[axis] = Motor(self.controller[bus], axis, apply_parameters=False)
                     n_motors += 1
                 else:
                     del_motor_from_init(bus, axis)
                     report += f"Achse {axis} ist beim Controller {bus} nicht vorhanden, " \
                               f"der Motor wurde nicht initialisiert.\n"
 
+        # Standardwerte und Werte aus der Datei werden zusammen mit einem set_parameters pro Motor geschickt
         self.set_motors_config(motors_config)
-        self.set_parameters(motors_parameters)
+        self.set_parameters({coord: motors_parameters.get(coord, {}) for coord in self.motors_list()})
 
         report = f"{n_controllers} Controller und {n_motors} Motoren wurde initialisiert:\n" + report
         for controller in self:
@@ -1567,12 +3769,108 @@ class Box:
         self.report = report
         return report
 
+    def save_snapshot(self, address: str = 'data/box_snapshot.json'):
+        """Sichert Topologie, Konfiguration, Parameter und Kalibrierung aller Motoren in einer JSON-Datei,
+        aus der die Box später mit Box(communicator, snapshot=address) schnell wiederhergestellt wird.
+        Es wird der volle Parametersatz gesichert, die nicht bekannten oder veralteten Parameter
+        werden dafür aus dem Controller gelesen."""
+
+        controllers = []
+        for controller in self:
+            motors = []
+            for motor in controller:
+                motors.append({'axis': motor.axis,
+                               'name': motor.name,
+                               'config': dict(motor.config),
+                               'parameters': motor.get_parameters(),
+                               'soft_limits': list(motor.soft_limits)})
+            controllers.append({'bus': controller.bus, 'motors': motors})
+        snapshot = {'version': BOX_SNAPSHOT_VERSION,
+                    'communicator': type(self.communicator).__name__,
+                    'controllers': controllers}
+
+        with open(address, 'wt') as snapshot_file:
+            json.dump(snapshot, snapshot_file, indent=1)
+        logging.info(f'Der Zustand der Box wurde in "{address}" gespeichert.')
+
+    def initialize_with_snapshot(self, address: str = 'data/box_snapshot.json') -> str:
+        """Stellt Controller und Motoren aus einem mit save_snapshot gesicherten Zustand wieder her.
+        Pro Controller wird nur die Achsenliste abgefragt, Parameter werden nicht neu geschrieben.
+        Passt der Snapshot nicht zur angeschlossenen Hardware, wird FileReadError ausgelöst.
+
+        Die Kalibrierung bleibt nur gültig, wenn die Controller seit dem Sichern nicht ausgeschaltet wurden.
+        Die gesicherten Parameter gelten als veraltet (invalidate_parameters): Das nächste set_parameters
+        schreibt sie neu, get_parameters liest sie vom Controller.
+        """
+
+        snapshot = read_box_snapshot_from_file(address)
+        if snapshot['communicator'] != type(self.communicator).__name__:
+            raise FileReadError(f'Der Snapshot wurde mit {snapshot["communicator"]} gesichert, '
+                                f'nicht mit {type(self.communicator).__name__}.')
+
+        # zuerst gegen die schon bekannte Topologie, der Communicator kann von anderen Boxen benutzt werden;
+        # nur wenn sie nicht passt, wird sie neu abgefragt
+        absent = self.__absent_axes(snapshot)
+        if absent is not None:
+            self.communicator.invalidate_topology()
+            absent = self.__absent_axes(snapshot)
+        if absent is not None:
+            bus, absent_axes = absent
+            raise FileReadError(f'Achsen {absent_axes} aus dem Snapshot sind beim Controller {bus} '
+                                f'nicht vorhanden.')
+
+        self.controller = {}
+        n_motors = 0
+        for bus, motors_data in snapshot['controllers'].items():
+            controller = Controller(self.communicator, bus, self.async_communicator)
+            for axis, motor_data in motors_data.items():
+                motor = Motor(controller, axis, apply_parameters=False)
+                motor.set_config({'name': motor_data['name'], **motor_data['config']})
+                motor.parameters = motor_data['parameters']
+                motor.pending_parameters = {}
+                motor.invalidate_parameters()  # die Controller können seitdem anders eingestellt worden sein
+                motor.soft_limits = motor_data['soft_limits']
+                controller.motor[axis] = motor
+                n_motors += 1
+            self.controller[bus] = controller
+
+        report = f"Box wurde aus dem Snapshot \"{address}\" wiederhergestellt. " \
+                 f"{len(self.controller)} Controller und {n_motors} Motoren.\n"
+        logging.info(report)
+        self.report = report
+        return report
+
+    def __absent_axes(self, snapshot: dict) -> Union[Tuple[int, List[int]], None]:
+        """Gibt (bus, Achsen) für den ersten Controller zurück, bei dem Achsen aus dem Snapshot fehlen."""
+
+        for bus, motors_data in snapshot['controllers'].items():
+            try:
+                axes = self.communicator.cached_axes_list(bus)
+            except (ReplyError, ConnectError) as err:
+                raise FileReadError(f'Controller {bus} aus dem Snapshot antwortet nicht: {err}')
+            absent_axes = set(motors_data.keys()) - set(axes)
+            if absent_axes:
+                return bus, sorted(absent_axes)
+        return None
+
+    def __restore_snapshot(self, address: str) -> bool:
+        try:
+            self.initialize_with_snapshot(address)
+        except FileNotFoundError:
+            logging.info(f'Snapshot "{address}" nicht gefunden, die Box wird neu initialisiert.')
+            return False
+        except FileReadError as err:
+            logging.warning(f'{err} Die Box wird neu initialisiert.')
+            return False
+        return True
+
     def get_motor(self, coordinates: (int, int) = None) -> Motor:
         """Gibt den Motor objekt zurück aus Koordinaten in Format (bus, Achse)"""
-        if coordinates not in self.motors_list():
+        try:
+            bus, axis = coordinates
+            return self.controller[bus].motor[axis]
+        except (KeyError, TypeError, ValueError):
             raise ValueError(f"Es gibt kein Motor mit solchen Koordinaten: {coordinates}")
-        bus, axis = coordinates
-        return self.controller[bus].motor[axis]
 
     def get_motor_by_name(self, name: str) -> Motor:
         """Gibt den Motor objekt zurück aus dem Name davon."""
@@ -1593,17 +3891,25 @@ class Box:
             motor.set_config(motor_config)
 
     def set_parameters(self, motors_config: Dict[M_Coord, Param_Val]):
-        """Die Parametern einstellen laut angegebene Dict in Format {(bus, Achse) : Parameterwerte,}"""
+        """Die Parametern einstellen laut angegebene Dict in Format {(bus, Achse) : Parameterwerte,}.
+        Alle Controller der Box hängen an demselben Communicator, sie werden daher nacheinander konfiguriert;
+        geschrieben werden nur die geänderten Werte."""
 
-        available_motors = self.motors_list()
+        available_motors = set(self.motors_list())
         for motor_coord, param_values in motors_config.items():
             if motor_coord in available_motors:
                 self.get_motor(motor_coord).set_parameters(param_values)
             else:
                 logging.warning(f"Motor {motor_coord} ist nicht verbunden und kann nicht konfiguriert werden.")
 
+    def invalidate_parameters(self):
+        """Markiert die Parameter aller Motoren als veraltet, z.B. nach einem Neustart der Controller."""
+
+        for motor in self.motors():
+            motor.invalidate_parameters()
+
     def get_parameters(self) -> Dict[M_Coord, Param_Val]:
-        """Liest die Parametern aus Controller und gibt zurück Dict mit Parameterwerten"""
+        """Gibt zurück Dict mit Parameterwerten, die bekannten Werte ohne Abfrage des Controllers"""
 
         motors_parameters = {}
 
@@ -1653,6 +3959,7 @@ class Box:
         """Alle nötige am Ende der Arbeit Operationen ausführen."""
 
         self.motors_cluster.stop()
+        self.__executor.shutdown()
         del self
 
 
@@ -1675,6 +3982,7 @@ class BoxesCluster(MotorsCluster):
             self.boxes = {}
         else:
             self.boxes = boxes
+        self.__box_names: Dict[Box, str] = {}
 
         for name, box in self.boxes.items():
             self.add_box(box, name, box_prefix_is_needed)
@@ -1685,15 +3993,31 @@ class BoxesCluster(MotorsCluster):
         if box_prefix_is_needed:
             add_box_prefix({name: box})
         self.boxes[name] = box
+        self.__box_names[box] = name
         self.add_motors(box.motors())
 
     def remove_box(self, box: Box):
         """Entfernt die eingegebene Box und die Motoren davon aus dem Cluster, wenn die da vorhanden sind."""
 
-        b_keys = {v: k for k, v in self.boxes.items()}
-        if box in self.boxes.values():
+        name = self.__box_names.pop(box, None)
+        if name is not None:
             self.remove_motors(box.motors())
-            del self.boxes[b_keys[box]]
+            del self.boxes[name]
+
+    def get_motor_by_coord(self, coord: M_Coord, communicator: ContrCommunicator = None, box: str = None) -> Motor:
+        """Gibt den Motor mit den Koordinaten (bus, Achse) zurück, bei mehreren Boxen aus der Box mit dem Namen box."""
+
+        if box is not None:
+            communicator = self.boxes[box].communicator
+        return super().get_motor_by_coord(coord, communicator)
+
+    def view(self, names: Iterable[str] = None, pattern: str = None, bus: int = None,
+             communicator: ContrCommunicator = None, box: str = None) -> MotorsCluster:
+        """Wie MotorsCluster.view, zusätzlich mit Auswahl der Motoren der Box mit dem Namen box."""
+
+        if box is not None:
+            communicator = self.boxes[box].communicator
+        return super().view(names, pattern, bus, communicator)
 
 
 class SerialError(Exception):
@@ -0,0 +1,68 @@
+"""Durchsatz von MotorsCluster.path_travel (Punkte/s) mit dem MCC2BoxEmulator.
+
+Verglichen wird der dauerhafte LaneExecutor des Clusters mit dem früheren Vorgehen,
+bei dem für jeden Punkt ein neuer ThreadPoolExecutor aufgebaut wurde. Dazu die Laufzeit
+von Motor.transform_units für einen Pfad mit 10**6 Punkten auf einmal.
+
+    python -m tests.benchmark_path_travel [Anzahl der Punkte]
+"""
+import concurrent.futures
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from motor_controller.interface import Box, MotorsCluster, Motor
+from motor_controller.Phytron_MCC2 import MCC2BoxEmulator
+
+
+def make_path(cluster: MotorsCluster, n_points: int) -> List[Dict[str, float]]:
+    return [{name: float(i % 100 + j) for j, name in enumerate(cluster.names())} for i in range(n_points)]
+
+
+def travel_with_pool_per_point(cluster: MotorsCluster, path: List[Dict[str, float]]):
+    for point in path:
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            results = executor.map(lambda name: cluster.get_motor(name).go_to(point[name], 'contr', True, True),
+                                   point.keys())
+            assert all(success for success, _ in results)
+
+
+def travel_with_cluster(cluster: MotorsCluster, path: List[Dict[str, float]]):
+    cluster.path_travel(path, lambda: None, 'contr')
+
+
+def measure(travel, cluster: MotorsCluster, path: List[Dict[str, float]]) -> float:
+    start = time.perf_counter()
+    travel(cluster, path)
+    return len(path) / (time.perf_counter() - start)
+
+
+def measure_transform_units(motor: Motor, n_points: int = 10**6) -> float:
+    """Gibt die Laufzeit (in s) der Umrechnung eines Pfades norm -> displ zurück."""
+
+    path = np.random.default_rng(0).uniform(0, 1000, n_points)
+    motor.transform_units(path[:10], 'norm', 'displ')  # Koeffizienten zwischenspeichern
+    start = time.perf_counter()
+    motor.transform_units(path, 'norm', 'displ')
+    return time.perf_counter() - start
+
+
+def main(n_points: int = 2000):
+    cluster = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False)).motors_cluster
+    path = make_path(cluster, n_points)
+    travel_with_cluster(cluster, path[:50])  # aufwärmen
+
+    before = measure(travel_with_pool_per_point, cluster, path)
+    after = measure(travel_with_cluster, cluster, path)
+    print(f'{len(cluster.names())} Motoren, {n_points} Punkte')
+    print(f'neuer Pool pro Punkt: {before:8.0f} Punkte/s')
+    print(f'LaneExecutor:         {after:8.0f} Punkte/s  (x{after / before:.2f})')
+    duration = measure_transform_units(next(iter(cluster)))
+    print(f'transform_units, 10**6 Punkte: {duration * 1000:.1f} ms')
+    cluster.close()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
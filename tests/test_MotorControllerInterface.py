@@ -1,17 +1,22 @@
+import asyncio
 import concurrent.futures
 import os
 import socket
 import threading
 from copy import deepcopy
 from threading import Thread
-from time import sleep
+from time import sleep, monotonic
 from typing import Set
-from unittest import TestCase, main
+from unittest import TestCase, IsolatedAsyncioTestCase, main
+
+import numpy as np
 
 # from MotorController.MotorControllerInterface import *
 from motor_controller.interface import Connector, ReplyError, Controller, Motor, CalibrationError, Box, \
     read_input_config_from_file, read_saved_session_data_from_file, read_csv, EthernetConnector, MotorNamesError, \
-    BoxesCluster, StopIndicator, WaitReporter, FileReadError, NotSupportedError
+    BoxesCluster, StopIndicator, WaitReporter, FileReadError, NotSupportedError, FrameDecoder, SerialConnector, \
+    AsyncEthernetConnector, ConnectError, StatusPoller, MoveHandle, ClusterMoveHandle, \
+    StandardStopIndicator, trapezoid_move_time, LaneExecutor, read_box_snapshot_from_file, MotorsCluster
 from motor_controller.Phytron_MCC2 import MCC2BoxEmulator, MCC2Communicator
 
 
@@ -21,6 +26,7 @@ class TCPServerEmulator(threading.Thread):
         super().__init__()
         self.s_out = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.s_out.bind((ip, port))
+        self.s_out.listen(1)
         self.__stop_signal = False
         self.last_message = b''
         self.conn = None
@@ -28,7 +34,6 @@ class TCPServerEmulator(threading.Thread):
         self.start()
 
     def run(self) -> None:
-        self.s_out.listen(1)
         self.conn, addr = self.s_out.accept()
         self.s_out.settimeout(0.01)
         while not self.__stop_signal:
@@ -88,6 +93,73 @@ class TestConnector(TestCase):
             self.connector.reply_format(b'bgg hello! eg')
 
 
+class TestFrameDecoder(TestCase):
+    def test_next_frame(self):
+        decoder = FrameDecoder(b'\x02', b'\x03')
+        self.assertEqual(None, decoder.next_frame())
+
+        decoder.feed(b'\x02hel')
+        self.assertEqual(None, decoder.next_frame())
+        decoder.feed(b'lo!\x03\x02\x03\x02next')
+        self.assertEqual(b'hello!', decoder.next_frame())
+        self.assertEqual(b'', decoder.next_frame())
+        self.assertEqual(None, decoder.next_frame())
+        decoder.feed(b'\x03')
+        self.assertEqual(b'next', decoder.next_frame())
+        self.assertEqual(0, len(decoder))
+
+    def test_split_end_symbol(self):
+        decoder = FrameDecoder(b'', b'\r\n')
+        decoder.feed(b'one\r')
+        self.assertEqual(None, decoder.next_frame())
+        decoder.feed(b'\ntwo\r\nthr')
+        self.assertEqual([b'one', b'two'], list(decoder.frames()))
+        self.assertEqual(b'thr', decoder.flush())
+        self.assertEqual(0, len(decoder))
+
+    def test_wrong_beg_symbol(self):
+        decoder = FrameDecoder(b':', b'\n')
+        decoder.feed(b'junk\n:OK\n')
+        with self.assertRaises(ReplyError):
+            decoder.next_frame()
+        self.assertEqual(b'OK', decoder.next_frame())
+
+    def test_fill(self):
+        decoder = FrameDecoder(b'', b'\n', size=8)
+        data = b''.join(f'message {i}\n'.encode() for i in range(100))
+        position = 0
+
+        def read_into(buffer: memoryview) -> int:
+            nonlocal position
+            chunk = data[position:position + min(len(buffer), 13)]
+            buffer[:len(chunk)] = chunk
+            position += len(chunk)
+            return len(chunk)
+
+        frames = []
+        while position < len(data):
+            decoder.fill(read_into)
+            frames += list(decoder.frames())
+        self.assertEqual([f'message {i}'.encode() for i in range(100)], frames)
+
+
+class TestSerialConnector(TestCase):
+    def test_read(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+
+        emulator.buffer = b'\x02\x06first\x03\x02\x06second\x03\x02\x06thi'
+        self.assertEqual(b'\x06first', connector.read())
+        self.assertEqual(b'', emulator.buffer)
+        self.assertEqual(b'\x06second', connector.read())
+        with self.assertRaises(ReplyError):
+            connector.read()
+        self.assertEqual(None, connector.read())
+
+        connector.send(b'1IVR')
+        self.assertEqual(b'\x06MCC2 Emulator v1.0', connector.read())
+
+
 class TestEthernetConnector(TestCase):
     def test_read(self):
         port = 8005
@@ -124,8 +196,45 @@ class TestEthernetConnector(TestCase):
             server.send(b'junk')
             sleep(0.01)
             connector.clear_buffer()
+            # das Time-out des Sockets bleibt erhalten
+            self.assertEqual(0.01, connector.sock.gettimeout())
             server.send(b'hello!\r\n')
             self.assertEqual(b'hello!', connector.read())
+            self.assertEqual(0.01, connector.sock.gettimeout())
+        finally:
+            connector.close()
+            server.close()
+
+    def test_read_split_message(self):
+        port = 8006
+        server = TCPServerEmulator(port=port, listen=False)
+        connector = EthernetConnector('localhost', port, 0.1, end_symbol=b'\r\n')
+        try:
+            self.assertEqual(1, connector.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            sleep(0.01)
+            # Die Nachricht kommt in mehreren Stücken, das End-Symbol ist auch geteilt.
+            server.send(b'hel')
+            sleep(0.01)
+            server.send(b'lo!\r')
+            sleep(0.01)
+            server.send(b'\nnext\r\n')
+            self.assertEqual(b'hello!', connector.read())
+            self.assertEqual(b'next', connector.read())
+        finally:
+            connector.close()
+            server.close()
+
+    def test_reply_delay_deprecated(self):
+        port = 8006
+        server = TCPServerEmulator(port=port, listen=False)
+        # die alte Reihenfolge der Argumente gilt weiter
+        with self.assertWarns(DeprecationWarning):
+            connector = EthernetConnector('localhost', port, 0.1, 0.002, b'', b'\r\n')
+        try:
+            sleep(0.01)
+            server.send(b'hello!\r\n')
+            self.assertEqual(b'hello!', connector.read())
+            self.assertEqual(b'\r\n', connector.end_symbol)
         finally:
             connector.close()
             server.close()
@@ -145,6 +254,51 @@ class TestEthernetConnector(TestCase):
             server.close()
 
 
+class TestAsyncEthernetConnector(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            self.writer = writer
+            try:
+                while True:
+                    writer.write(b'Reply to:' + await reader.readuntil(b'\r\n'))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+
+        self.server = await asyncio.start_server(echo, 'localhost', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.connector = AsyncEthernetConnector('localhost', port, 0.05, end_symbol=b'\r\n')
+
+    async def asyncTearDown(self):
+        await self.connector.close()
+        self.server.close()
+
+    async def test_send_read(self):
+        await self.connector.send(b'hello')
+        self.assertEqual(b'Reply to:hello', await self.connector.read())
+        self.assertEqual(None, await self.connector.read())
+
+        await self.connector.send_many([b'hello1', b'hello2'])
+        self.assertEqual(b'Reply to:hello1', await self.connector.read())
+        self.assertEqual(b'Reply to:hello2', await self.connector.read())
+
+    async def test_clear_buffer(self):
+        await self.connector.send(b'junk')
+        await asyncio.sleep(0.01)
+        await self.connector.send(b'hello')
+        self.assertEqual(b'Reply to:hello', await self.connector.read())
+
+        self.writer.write(b'hel')
+        with self.assertRaises(ReplyError):
+            await self.connector.read()
+
+    async def test_closed_connection(self):
+        await self.connector.send(b'hello', clear_buffer=False)
+        self.assertEqual(b'Reply to:hello', await self.connector.read())
+        self.writer.close()
+        with self.assertRaises(ConnectError):
+            await self.connector.read()
+
+
 class TestController(TestCase):
     def test_make_motors(self):
         emulator_box = MCC2BoxEmulator(n_bus=16, n_axes=5, realtime=False)
@@ -222,6 +376,120 @@ class TrevelTestReporter(WaitReporter):
         self.history.append(deepcopy(self.wait_list))
 
 
+class TestStatusPoller(TestCase):
+    def test_watch(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        calls = []
+        motors_stand = emulator.motors_stand
+        emulator.motors_stand = lambda coords: (calls.append(coords), motors_stand(coords))[1]
+        poller = emulator.status_poller()
+        self.assertIs(poller, emulator.status_poller())
+
+        emulator.set_parameter('Lauffrequenz', 1000, 0, 1)
+        emulator.set_parameter('Lauffrequenz', 1000, 1, 2)
+        emulator.go_to(20, 0, 1)
+        emulator.go_to(50, 1, 2)
+        future1 = poller.watch(0, 1)
+        future2 = poller.watch(1, 2)
+        self.assertFalse(future2.done())
+
+        self.assertTrue(future1.result(timeout=1))
+        self.assertTrue(future2.result(timeout=1))
+        self.assertAlmostEqual(50, emulator.get_position(1, 2), delta=1)
+        # beide Achsen werden in einer Runde abgefragt
+        self.assertIn([(0, 1), (1, 2)], calls)
+
+    def test_wait_stop_with_stop_indicator(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        poller = StatusPoller(emulator)
+        stoper = StopTestIndicator()
+
+        emulator.go_to(1000, 1, 1)
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            res = executor.submit(poller.wait_stop, [(1, 1)], stoper)
+            sleep(0.05)
+            self.assertFalse(res.done())
+            stoper.stop = True
+            self.assertFalse(res.result(timeout=1))
+        emulator.stop(1, 1)
+        self.assertTrue(poller.wait_stop([(1, 1)]))
+
+    def test_error(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        poller = StatusPoller(emulator)
+        with self.assertRaises(KeyError):
+            poller.watch(7, 1).result(timeout=1)
+
+    def test_cancel_during_resolve(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        poller = StatusPoller(emulator)
+        gate = threading.Event()
+        motors_stand = emulator.motors_stand
+
+        def stand_and_cancel(coords):
+            gate.wait(1)
+            # wait_futures sagt das Future ab, unmittelbar bevor der Poller es erfüllt
+            cancelled.set_result = lambda result: (concurrent.futures.Future.cancel(cancelled),
+                                                   concurrent.futures.Future.set_result(cancelled, result))
+            return motors_stand(coords)
+
+        emulator.motors_stand = stand_and_cancel
+        cancelled = poller.watch(0, 1)
+        other = poller.watch(0, 1)
+        gate.set()
+        self.assertTrue(other.result(timeout=1))
+        self.assertTrue(cancelled.cancelled())
+
+        # der Poller-Thread lebt weiter bzw. wird neu gestartet
+        emulator.motors_stand = motors_stand
+        self.assertTrue(poller.watch(1, 1).result(timeout=1))
+
+    def test_watch_with_expected_duration(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        calls = []
+        motors_stand = emulator.motors_stand
+        emulator.motors_stand = lambda coords: (calls.append(monotonic()), motors_stand(coords))[1]
+        poller = StatusPoller(emulator)
+
+        emulator.set_parameter('Lauffrequenz', 1000, 0, 1)
+        duration = emulator.estimate_move_time(300, {'Lauffrequenz': 1000, 'Umrechnungsfaktor(Contr)': 1})
+        self.assertAlmostEqual(0.3, duration)
+        emulator.go_to(300, 0, 1)
+        expected_end = monotonic() + duration
+        self.assertTrue(poller.watch(0, 1, duration).result(timeout=5))
+        self.assertAlmostEqual(300, emulator.get_position(0, 1), delta=1)
+        # bis zum erwarteten Ende wird selten abgefragt: weit weniger als 0.3 s / interval Abfragen
+        self.assertLess(len([t for t in calls if t < expected_end]), 15)
+
+    def test_settle_time(self):
+        # ohne realtime ist der Motor sofort am Ziel
+        self.assertEqual(0, MCC2BoxEmulator(n_bus=2, n_axes=2).settle_time)
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        calls = []
+        motors_stand = emulator.motors_stand
+        emulator.motors_stand = lambda coords: (calls.append(monotonic()), motors_stand(coords))[1]
+        poller = StatusPoller(emulator)
+        self.assertEqual(0.005, poller.interval)
+
+        # ohne geschätzte Fahrzeit wird erst nach settle_time abgefragt
+        start = monotonic()
+        self.assertTrue(poller.watch(0, 1).result(timeout=1))
+        self.assertGreaterEqual(calls[0] - start, 0.1)
+
+        # über eine serielle Schnittstelle wird wie früher alle 0.1 s abgefragt
+        # (ohne Port öffnen: nur der Typ des Connectors zählt)
+        communicator = MCC2Communicator(SerialConnector.__new__(SerialConnector))
+        self.assertEqual(0.1, StatusPoller(communicator).interval)
+
+    def test_trapezoid_move_time(self):
+        self.assertIsNone(trapezoid_move_time(100, 0, 10))
+        self.assertAlmostEqual(10, trapezoid_move_time(-100, 10, 0))
+        # beschleunigen und bremsen je 1 s (je 5 Einheiten), 90 Einheiten mit voller Geschwindigkeit
+        self.assertAlmostEqual(11, trapezoid_move_time(100, 10, 10))
+        # die volle Geschwindigkeit wird nicht erreicht
+        self.assertAlmostEqual(1, trapezoid_move_time(2.5, 10, 10))
+
+
 class TestMotor(TestCase):
     def test_set_config(self):
         emulator_box = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False)
@@ -302,6 +570,31 @@ class TestMotor(TestCase):
         self.assertEqual(round(9 / 5, 4), round(motor.transform_units(1, 'norm', to='displ', rel=True), 4))
         self.assertEqual(1, round(motor.transform_units(round(9 / 5, 4), 'displ', to='norm', rel=True), 4))
 
+    def test_transform_units_arrays(self):
+        motor = Motor(Controller(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False), 1), 2)
+        motor.set_config({'norm_per_contr': 1 / 0.123, 'displ_per_contr': (9 / 5) / 0.123,
+                          'displ_null': -17.7778, 'null_position': 273.15 * 0.123})
+
+        path = np.linspace(-1000, 1000, 1001)
+        for current_u in Motor.UNITS:
+            for to in Motor.UNITS:
+                for rel in (False, True):
+                    expected = [motor.transform_units(float(value), current_u, to, rel) for value in path]
+                    self.assertEqual(expected, motor.transform_units(path, current_u, to, rel).tolist())
+
+        # die zwischengespeicherten Koeffizienten folgen der Konfiguration und der Kalibrierung
+        self.assertEqual(100, round(motor.transform_units(100 * 0.123 + 273.15 * 0.123, 'contr', 'norm'), 4))
+        motor.config['null_position'] = 0
+        self.assertEqual(100, round(motor.transform_units(100 * 0.123, 'contr', 'norm'), 4))
+        motor.set_config({'norm_per_contr': 1.0})
+        self.assertEqual([0.0, 10.0], motor.transform_units([0, 10], 'contr', 'norm').tolist())
+
+        # nach der Änderung stimmen Array und einzelne Werte weiterhin überein (die Laufzeit misst
+        # benchmark_path_travel)
+        path = np.random.default_rng(0).uniform(0, 1000, 50)
+        expected = [motor.transform_units(float(value), 'norm', 'displ') for value in path]
+        self.assertEqual(expected, motor.transform_units(path, 'norm', 'displ').tolist())
+
     def test_get_set_position(self):
         motor = preparation_to_test()[0]
 
@@ -475,6 +768,28 @@ class TestMotor(TestCase):
         for param_name in MCC2Communicator.PARAMETER_DEFAULT.keys():
             motor.set_parameter(param_name, 134.5)
             self.assertEqual(134.5, motor_emulator.box.get_parameter(param_name, 1, 2))
+            self.assertEqual(134.5, motor.parameters[param_name])
+
+    def test_expected_move_time(self):
+        motor, step, motor_emulator = preparation_to_test(realtime=True)
+        motor.set_parameter('Umrechnungsfaktor(Contr)', step)
+        motor.set_parameter('Lauffrequenz', 1000)
+        motor_emulator.set_position(0)
+        self.assertIsNone(motor.expected_move_time())
+
+        # die Position wird erst abgefragt, wenn die Fahrzeit gebraucht wird
+        positions = []
+        get_position = motor_emulator.box.get_position
+        motor_emulator.box.get_position = lambda *coord: (positions.append(coord), get_position(*coord))[1]
+        # 50 Controller Einheiten = 500 Schritte bei 1000 Hz
+        motor.go_to(50, 'contr')
+        self.assertEqual([], positions)
+        self.assertAlmostEqual(0.5, motor.expected_move_time(), delta=0.05)
+        self.assertEqual(1, len(positions))
+        self.assertAlmostEqual(0.5, motor.expected_move_time(), delta=0.05)
+        self.assertEqual(1, len(positions))
+        motor.stop()
+        self.assertIsNone(motor.expected_move_time())
 
     def test_at_the_end(self):
         motor, step, motor_emulator = preparation_to_test()
@@ -657,6 +972,246 @@ class TestMotor(TestCase):
         for key, value in new_parameters.items():
             self.assertEqual(value, parameters[key])
 
+    def test_parameters_cache(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        motor = Motor(Controller(emulator, 1), 2)
+        commands = []
+        set_parameter, get_parameter = emulator.set_parameter, emulator.get_parameter
+        emulator.set_parameter = lambda name, value, bus, axis: commands.append(name) or set_parameter(name, value, bus, axis)
+        emulator.get_parameter = lambda name, bus, axis: commands.append(name) or get_parameter(name, bus, axis)
+
+        # bekannte Werte werden weder geschickt noch gelesen
+        motor.set_parameters({'Lauffrequenz': 1234, 'Laufstrom': MCC2Communicator.PARAMETER_DEFAULT['Laufstrom']})
+        self.assertEqual(['Lauffrequenz'], commands)
+        self.assertEqual(1234, motor.get_parameters()['Lauffrequenz'])
+        self.assertEqual(['Lauffrequenz'], commands)
+
+        # nach dem Neustart des Controllers sind die Werte veraltet
+        emulator.set_parameter('Lauffrequenz', 4000, 1, 2)
+        motor.invalidate_parameters(['Lauffrequenz'])
+        commands.clear()
+        self.assertEqual(4000, motor.get_parameters()['Lauffrequenz'])
+        self.assertEqual(['Lauffrequenz'], commands)
+        motor.invalidate_parameters()
+        commands.clear()
+        motor.set_parameters({'Lauffrequenz': 4000})
+        self.assertEqual(['Lauffrequenz'], commands)
+
+        # ohne apply_parameters werden die Standardwerte erst mit dem nächsten set_parameters geschickt
+        commands.clear()
+        motor = Motor(Controller(emulator, 1), 1, apply_parameters=False)
+        self.assertEqual([], commands)
+        motor.set_parameters({'Lauffrequenz': 1000})
+        self.assertEqual(sorted(MCC2Communicator.PARAMETER_DEFAULT), sorted(commands))
+        self.assertEqual(1000, emulator.get_parameter('Lauffrequenz', 1, 1))
+
+
+class TestStandardStopIndicator(TestCase):
+    def test_stop(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        cluster = Box(emulator).motors_cluster
+        indicator = StandardStopIndicator()
+        woken = []
+        indicator.add_stop_callback(lambda: woken.append(True))
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            res = executor.submit(cluster.go_to, {'Motor0.1': 5000, 'Motor1.2': -5000}, 'contr', True, False,
+                                  indicator)
+            sleep(0.05)
+            self.assertFalse(res.done())
+            start = monotonic()
+            indicator.stop()
+            success, message = res.result(timeout=1)
+            latency = monotonic() - start
+
+        self.assertFalse(success)
+        self.assertIn('abgebrochen', message)
+        self.assertTrue(latency < 0.1, f'Abbruch hat {latency} s gedauert.')
+        self.assertEqual([True], woken)
+        self.assertIsNotNone(indicator.abort_latency)
+        emulator.controller[0].motor[1].wait_stop()
+        emulator.controller[1].motor[2].wait_stop()
+        self.assertTrue(abs(emulator.get_position(0, 1)) < 1000)
+        self.assertTrue(abs(emulator.get_position(1, 2)) < 1000)
+
+        # Nach dem Abbruch wird keine neue Bewegung gestartet
+        self.assertEqual((False, 'Der Vorgang wurde vom Benutzer abgebrochen.'),
+                         cluster.motors['Motor0.2'].go_to(1000, 'contr', True, False, indicator))
+        self.assertTrue(emulator.motor_stand(0, 2))
+
+        indicator.restore()
+        self.assertFalse(indicator.has_stop_requested())
+        self.assertFalse(indicator.wait(0.01))
+
+    def test_stop_callbacks(self):
+        indicator = StandardStopIndicator()
+        woken = []
+        # dasselbe callback zweimal angemeldet, jede Anmeldung wird einzeln abgemeldet
+        callback = lambda: woken.append(True)
+        remove_first = indicator.add_stop_callback(callback)
+        indicator.add_stop_callback(callback)
+        remove_first()
+        indicator.stop()
+        self.assertEqual([True], woken)
+
+
+class TestMoveHandle(TestCase):
+    def test_result(self):
+        motor, step, motor_emulator = preparation_to_test(realtime=True)
+        motor_emulator.box.set_parameter('Lauffrequenz', 1000, 1, 2)
+        reporter = WaitTestReporter()
+        motor_emulator.set_position(0)
+
+        calls = []
+        motors_stand = motor_emulator.box.motors_stand
+        motor_emulator.box.motors_stand = lambda coords: (calls.append(coords), motors_stand(coords))[1]
+        self.assertEqual((True, ''), motor.go_to(20, 'contr'))
+        handle = motor.start_go_to(0, 'contr', reporter=reporter)
+        self.assertIsInstance(handle, MoveHandle)
+        # ohne Frage nach dem Ergebnis wird der Status nicht abgefragt
+        sleep(0.05)
+        self.assertEqual([], calls)
+        self.assertFalse(handle.done())
+        callback_results = []
+        handle.add_done_callback(lambda h: callback_results.append(h.result()))
+
+        self.assertEqual((True, ''), handle.result(timeout=2))
+        self.assertTrue(handle.done())
+        self.assertEqual([(True, '')], callback_results)
+        self.assertEqual([motor.name], reporter.motors_done)
+        self.assertAlmostEqual(0, motor.position('contr'), delta=2 * step)
+
+        # Soft Limits mit check
+        motor.soft_limits_einstellen((0, 100), 'norm')
+        handle = motor.start_go_to(300, 'norm', check=True)
+        self.assertTrue(handle.done())
+        self.assertFalse(handle.result()[0])
+
+    def test_cancel(self):
+        motor, step, motor_emulator = preparation_to_test(realtime=True)
+        motor_emulator.set_position(0)
+
+        handle = motor.start_go(1000, 'contr')
+        sleep(0.02)
+        self.assertTrue(handle.cancel())
+        self.assertEqual((False, 'Der Vorgang wurde vom Benutzer abgebrochen.'), handle.result(timeout=1))
+        self.assertFalse(handle.cancel())
+        motor_emulator.wait_stop()
+        self.assertTrue(motor.position('contr') < 500)
+
+    def test_cluster_handle(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False)
+        cluster = Box(emulator).motors_cluster
+
+        handle = cluster.start_go_to({'Motor0.1': 100, 'Motor1.2': -50}, 'contr')
+        self.assertIsInstance(handle, ClusterMoveHandle)
+        done = []
+        handle.add_done_callback(done.append)
+        self.assertEqual({'Motor0.1': (True, ''), 'Motor1.2': (True, '')}, handle.results(timeout=2))
+        self.assertEqual((True, ''), handle.result())
+        self.assertEqual([handle], done)
+        self.assertEqual({'Motor0.1': 100, 'Motor1.2': -50}, cluster.positions('contr', ['Motor0.1', 'Motor1.2']))
+
+
+class TestMotorAsync(IsolatedAsyncioTestCase):
+    async def test_go_to_async(self):
+        motor, step, motor_emulator = preparation_to_test()
+
+        motor_emulator.set_position(-1000)
+        self.assertEqual((True, ''), await motor.go_to_async(373.15, 'contr', wait=True))
+        self.assertAlmostEqual(100, await motor.position_async('norm'), delta=2 * step)
+
+        self.assertEqual((True, ''), await motor.go_async(-50, 'norm', wait=True))
+        self.assertAlmostEqual(50, await motor.position_async('norm'), delta=2 * step)
+
+    async def test_go_to_async_soft_limits(self):
+        motor, step, motor_emulator = preparation_to_test()
+        motor.soft_limits_einstellen((0, 200), 'norm')
+
+        self.assertEqual((False, f'Der Zielpunkt des Motors "{motor.name}" liegt außerhalb der Soft Limits!'),
+                         await motor.go_to_async(300, 'norm', wait=True, check=True))
+        self.assertEqual((True, ''), await motor.go_to_async(300, 'norm', wait=True))
+        self.assertAlmostEqual(200, await motor.position_async('norm'), delta=2 * step)
+
+    async def test_go_to_async_stop(self):
+        motor, step, motor_emulator = preparation_to_test(realtime=True)
+        stoper = StopTestIndicator()
+        reporter = WaitTestReporter()
+        motor_emulator.set_position(0)
+
+        task = asyncio.create_task(motor.go_to_async(373.15, 'contr', True, False, stoper, reporter))
+        await asyncio.sleep(0.05)
+        self.assertFalse(task.done())
+        stoper.stop = True
+        self.assertEqual((False, 'Der Vorgang wurde vom Benutzer abgebrochen.'), await task)
+        self.assertEqual([], reporter.motors_done)
+        self.assertTrue(await motor.position_async('contr') < 200)
+
+    async def test_position_stream(self):
+        motor, step, motor_emulator = preparation_to_test(realtime=True)
+        motor_emulator.set_position(0)
+        await motor.go_to_async(2, 'contr')
+
+        positions = [position async for position in motor.position_stream('contr', 0.01, until_stand=True)]
+        self.assertTrue(len(positions) > 1)
+        self.assertAlmostEqual(2, positions[-1], delta=2 * step)
+
+
+class TestLaneExecutor(TestCase):
+    def test_map(self):
+        box1 = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False))
+        box2 = Box(MCC2BoxEmulator(n_bus=1, n_axes=2, realtime=False))
+        motors = list(box1.motors()) + list(box2.motors())
+        executor = LaneExecutor()
+
+        def thread_of(motor: Motor, shift: int):
+            sleep(0.01)
+            return motor.communicator, threading.get_ident(), shift
+
+        results = executor.map(thread_of, motors, range(len(motors)))
+        self.assertEqual(list(range(len(motors))), [shift for _, _, shift in results])
+        threads1 = {ident for communicator, ident, _ in results if communicator is box1.communicator}
+        threads2 = {ident for communicator, ident, _ in results if communicator is box2.communicator}
+        # jede Leitung hat eigene Threads, und es sind nicht mehr als Motoren darauf
+        self.assertFalse(threads1 & threads2)
+        self.assertLessEqual(len(threads1), 4)
+        self.assertLessEqual(len(threads2), 2)
+
+        # die Threads werden beim nächsten Aufruf wiederverwendet
+        results = executor.map(thread_of, motors, range(len(motors)))
+        self.assertLessEqual({ident for _, ident, _ in results}, threads1 | threads2)
+
+        with self.assertRaises(ZeroDivisionError):
+            executor.map(lambda motor: 1 / 0, motors)
+        executor.shutdown()
+
+
+class TestMotorsClusterAsync(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False)
+        self.cluster = Box(self.emulator).motors_cluster
+
+    async def test_go_to_async(self):
+        destinations = {'Motor0.1': 100, 'Motor0.2': -50, 'Motor1.1': 30, 'Motor1.2': 500}
+        self.assertEqual((True, ''), await self.cluster.go_to_async(destinations, 'contr', wait=True))
+        self.assertEqual(destinations, await self.cluster.positions_async('contr'))
+        self.assertTrue(await self.cluster.all_motors_stand_async())
+
+        with self.assertRaises(ValueError):
+            await self.cluster.go_to_async({'Unsinn': 1})
+
+    async def test_path_travel_async(self):
+        path = [{'Motor0.1': 100, 'Motor1.2': 50}, {'Motor0.1': -20, 'Motor1.2': 70}]
+        reporter = TrevelTestReporter()
+
+        async def action():
+            return await self.cluster.positions_async('contr', ['Motor0.1', 'Motor1.2'])
+
+        self.assertEqual(path, await self.cluster.path_travel_async(path, action, 'contr', reporter=reporter))
+        self.assertEqual([2, 1, 0] * 2, list(map(len, reporter.history)))
+
+        self.assertEqual([1, 1], await self.cluster.path_travel_async(path, lambda: 1, 'contr'))
+
 
 class TestBox(TestCase):
     def test_initialize(self):
@@ -726,6 +1281,11 @@ class TestBox(TestCase):
         self.assertEqual(34567.34, box.get_parameters()[(2, 4)]['Lauffrequenz'])
         self.assertEqual(MCC2Communicator.PARAMETER_DEFAULT, box.get_parameters()[(0, 2)])
 
+        emulator.set_parameter('Lauffrequenz', 123, 0, 2)
+        self.assertEqual(MCC2Communicator.PARAMETER_DEFAULT, box.get_parameters()[(0, 2)])
+        box.invalidate_parameters()
+        self.assertEqual(123, box.get_parameters()[(0, 2)]['Lauffrequenz'])
+
     def test_set_parameters(self):
         emulator = MCC2BoxEmulator(n_bus=15, n_axes=9)
         box = Box(emulator)
@@ -742,6 +1302,15 @@ class TestBox(TestCase):
             for name, value in param_line.items():
                 self.assertEqual(value, param_line_from_box[name])
 
+        # die Controller hängen an einem Communicator, es werden dafür keine Threads gestartet
+        def box_threads() -> int:
+            return sum(thread.name.startswith('Box-') for thread in threading.enumerate())
+        n_threads = box_threads()
+        box.set_parameters({coord: {'Lauffrequenz': 500} for coord in parameters})
+        self.assertEqual(500, box.get_motor((3, 6)).get_parameters()['Lauffrequenz'])
+        self.assertEqual(n_threads, box_threads())
+        box.close()
+
         emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
         box = Box(emulator)
 
@@ -1031,6 +1600,120 @@ class TestBox(TestCase):
         box.save_session_data('test_data/test_saved_motors_data2.txt')
         self.assertEqual(data, read_saved_session_data_from_file('test_data/test_saved_motors_data2.txt'))
 
+    def test_topology_cache(self):
+        emulator = MCC2BoxEmulator(n_bus=3, n_axes=2)
+        queries = []
+        bus_list, axes_list = emulator.bus_list, emulator.axes_list
+        emulator.bus_list = lambda: queries.append('bus_list') or bus_list()
+        emulator.axes_list = lambda bus: queries.append(bus) or axes_list(bus)
+
+        box = Box(emulator)
+        self.assertEqual(['bus_list', 0, 1, 2], queries)
+        queries.clear()
+        # weitere Boxen mit demselben Communicator fragen die Controller nicht mehr ab
+        self.assertEqual(box.motors_list(), Box(emulator).motors_list())
+        self.assertEqual([], queries)
+
+        del emulator.controller[2]
+        emulator.invalidate_topology()
+        self.assertEqual(((0, 1), (0, 2), (1, 1), (1, 2)), Box(emulator).motors_list())
+        self.assertEqual(['bus_list', 0, 1], queries)
+
+    def test_merged_parameters_on_initialization(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=3)
+        written = []
+        set_parameter = emulator.set_parameter
+        emulator.set_parameter = lambda name, value, bus, axis: written.append((bus, axis, name, value)) or \
+            set_parameter(name, value, bus, axis)
+        n_parameters = len(MCC2Communicator.PARAMETER_DEFAULT)
+
+        box = Box(emulator)
+        self.assertEqual(6 * n_parameters, len(written))
+        self.assertEqual(6 * n_parameters, len(set(written)))
+
+        address = 'test_input/test_merged_parameters.csv'
+        self.addCleanup(os.remove, address)
+        with open(address, 'wt') as f:
+            f.write('Motor Name;Bus;Achse;Mit Initiatoren(0/1);Mit Encoder(0/1);Einheiten;Umrechnungsfaktor;Lauffrequenz\n'
+                    'TestMotor0;0;1;1;0;mm;0.5;1234\n'
+                    'TestMotor1;1;3;0;0;mm;0.5;\n')
+        written.clear()
+        box = Box(emulator, input_file=address)
+        self.assertEqual(('TestMotor0', 'TestMotor1'), tuple(box.motors_cluster.names()))
+        # jeder Parameter genau einmal pro Motor, mit dem Wert aus der Datei statt dem Standardwert
+        self.assertEqual(2 * n_parameters, len(written))
+        self.assertIn((0, 1, 'Lauffrequenz', 1234.0), written)
+        self.assertEqual(1234.0, emulator.get_parameter('Lauffrequenz', 0, 1))
+        self.assertEqual({}, box.get_motor((0, 1)).pending_parameters)
+
+    def test_snapshot(self):
+        emulator = MCC2BoxEmulator(n_bus=3, n_axes=3)
+        box = Box(emulator)
+        # nur ein Teil der Achsen ist in Gebrauch
+        del box.controller[1].motor[3]
+        del box.controller[2]
+        motor = box.get_motor((0, 1))
+        motor.set_config({'name': 'TestMotor', 'with_initiators': 1, 'display_units': 'mm'})
+        motor.soft_limits = (10, 900)
+        motor.config['null_position'] = 123.0
+        motor.set_parameter('Lauffrequenz', 2000)
+        # am Controller geändert, der Motor kennt den Wert nicht mehr
+        emulator.set_parameter('Lauffrequenz', 777, 0, 2)
+        box.get_motor((0, 2)).invalidate_parameters()
+        address = 'test_data/test_box_snapshot.json'
+        self.addCleanup(os.remove, address)
+        box.save_snapshot(address)
+        # der volle Parametersatz, die veralteten werden dafür gelesen
+        parameters = read_box_snapshot_from_file(address)['controllers'][0][2]['parameters']
+        self.assertEqual(set(emulator.PARAMETER_DEFAULT), set(parameters))
+        self.assertEqual(777, parameters['Lauffrequenz'])
+        emulator.invalidate_topology()
+
+        calls = []
+
+        def count_calls(method_name: str):
+            method = getattr(emulator, method_name)
+
+            def counted(*args):
+                calls.append(method_name)
+                return method(*args)
+            setattr(emulator, method_name, counted)
+
+        for name in ['bus_list', 'bus_check', 'axes_list', 'set_parameter', 'get_parameter']:
+            count_calls(name)
+
+        restored = Box(emulator, snapshot=address)
+        # nur eine Abfrage pro Controller
+        self.assertEqual(['axes_list'] * len(box.controllers_list()), calls)
+        self.assertEqual(box.motors_list(), restored.motors_list())
+        motor = restored.get_motor_by_name(motor.name)
+        self.assertEqual((10, 900), motor.soft_limits)
+        self.assertEqual(123.0, motor.config['null_position'])
+        self.assertEqual(2000, motor.parameters['Lauffrequenz'])
+        for coord in box.motors_list():
+            self.assertEqual(box.get_motor(coord).config, restored.get_motor(coord).config)
+        # die bekannte Topologie passt, also wird sie nicht vergessen und nicht neu abgefragt
+        calls.clear()
+        Box(emulator, snapshot=address)
+        self.assertEqual([], calls)
+
+        # die gesicherten Parameter gelten als veraltet: set_parameters schreibt sie neu, get_parameters liest sie
+        self.assertFalse(motor.parameter_is_cached('Lauffrequenz'))
+        emulator.set_parameter('Lauffrequenz', 555, 0, 1)
+        emulator.set_parameter('Lauffrequenz', 666, 0, 2)
+        calls.clear()
+        restored.set_parameters({(0, 1): {'Lauffrequenz': 2000}})
+        self.assertEqual(['set_parameter'], calls)
+        self.assertEqual(2000, emulator.get_parameter('Lauffrequenz', 0, 1))
+        self.assertEqual(666, restored.get_parameters()[(0, 2)]['Lauffrequenz'])
+
+        # passt der Snapshot nicht zur Hardware, wird die Box normal initialisiert
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        restored = Box(emulator, snapshot=address)
+        self.assertEqual(((0, 1), (0, 2), (1, 1), (1, 2)), restored.motors_list())
+        self.assertEqual('Motor0.1', restored.get_motor((0, 1)).name)
+        self.assertEqual(Box(emulator, snapshot='test_data/nicht_vorhanden.json').motors_list(), restored.motors_list())
+
     def test_make_empty_input_file(self):
         emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
         box = Box(emulator)
@@ -1250,6 +1933,124 @@ class TestBoxCluster(TestCase):
             stoper.stop = True
             self.assertEqual([], res.result())
 
+    def test_stream_path_not_supported(self):
+        box1 = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False))
+        box2 = Box(MCC2BoxEmulator(n_bus=2, n_axes=1, realtime=False))
+        cluster = BoxesCluster({"box1": box1, "box2": box2}, box_prefix_is_needed=True)
+
+        self.assertTrue(cluster.stream_path([], 'contr'))
+        with self.assertRaises(NotSupportedError):
+            cluster.stream_path([{'box1|Motor0.1': 100}], 'contr')
+        # Motoren an verschiedenen Controllern
+        with self.assertRaises(NotSupportedError):
+            cluster.stream_path([{'box1|Motor0.1': 100, 'box2|Motor0.1': 100}], 'contr')
+        with self.assertRaises(ValueError):
+            cluster.stream_path([{'box1|Motor5.1': 100}], 'contr')
+
+    def test_motor_indexes(self):
+        box1 = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False))
+        box2 = Box(MCC2BoxEmulator(n_bus=2, n_axes=1, realtime=False))
+        cluster = BoxesCluster({"box1": box1}, box_prefix_is_needed=True)
+        cluster.add_box(box2, "box2", box_prefix_is_needed=True)
+
+        motor = box2.get_motor((1, 1))
+        self.assertIs(motor, cluster.get_motor('box2|Motor1.1'))
+        self.assertIs(motor, cluster.get_motor_by_coord((1, 1), box='box2'))
+        self.assertIs(motor, cluster.get_motor_by_coord((1, 1), box2.communicator))
+        self.assertIs(box1.get_motor((0, 2)), cluster.get_motor_by_coord((0, 2)))
+        with self.assertRaises(ValueError):
+            cluster.get_motor_by_coord((1, 1))  # in beiden Boxen vorhanden
+        with self.assertRaises(ValueError):
+            box1.get_motor((5, 1))
+
+        cluster.remove_motors([box1.get_motor((1, 1))])
+        self.assertNotIn(box1.get_motor((1, 1)), cluster)
+        self.assertIs(motor, cluster.get_motor_by_coord((1, 1)))
+        cluster.remove_box(box2)
+        self.assertEqual(('box1|Motor0.1', 'box1|Motor0.2', 'box1|Motor1.2'), cluster.names())
+        self.assertEqual({'box1': box1}, cluster.boxes)
+        with self.assertRaises(ValueError):
+            cluster.get_motor_by_coord((1, 1))
+
+    def test_views(self):
+        box1 = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False))
+        box2 = Box(MCC2BoxEmulator(n_bus=2, n_axes=1, realtime=False))
+        cluster = BoxesCluster({"box1": box1, "box2": box2}, box_prefix_is_needed=True)
+
+        view = cluster.view(['box1|Motor0.2', 'box2|Motor1.1'])
+        self.assertEqual(('box1|Motor0.2', 'box2|Motor1.1'), view.names())
+        self.assertIs(cluster.get_motor('box2|Motor1.1'), view.get_motor('box2|Motor1.1'))
+        self.assertEqual(('box1|Motor1.1', 'box2|Motor1.1'), cluster.view(pattern=r'Motor1\.1$').names())
+        self.assertEqual(('box1|Motor1.1', 'box1|Motor1.2', 'box2|Motor1.1'), cluster.view(bus=1).names())
+        self.assertEqual(('box2|Motor0.1', 'box2|Motor1.1'), cluster.view(box='box2').names())
+        self.assertEqual(('box1|Motor0.2',), cluster.view(pattern=r'\.2$', box='box1', bus=0).names())
+        with self.assertRaises(ValueError):
+            cluster.view(['box3|Motor0.1'])
+
+        # die Ansicht bewegt dieselben Motoren und beendet beim close nicht die Threads des Clusters
+        view.go_to({'box1|Motor0.2': 300, 'box2|Motor1.1': 200}, 'contr', wait=True)
+        self.assertEqual(300, cluster.get_motor('box1|Motor0.2').position('contr'))
+        view.close()
+        cluster.go_to({'box1|Motor0.1': 100, 'box2|Motor0.1': 100}, 'contr', wait=True)
+        self.assertEqual({'box1|Motor0.1': 100, 'box2|Motor0.1': 100},
+                         {name: cluster.get_motor(name).position('contr') for name in ['box1|Motor0.1', 'box2|Motor0.1']})
+
+        motors = box1.get_motors_cluster()
+        self.assertIsNot(box1.motors_cluster, motors)
+        self.assertIs(box1.get_motor((1, 2)), motors.get_motor('box1|Motor1.2'))
+
+    def test_state_table(self):
+        box1 = Box(MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False))
+        box2 = Box(MCC2BoxEmulator(n_bus=1, n_axes=1, realtime=False))
+        cluster = BoxesCluster({"box1": box1, "box2": box2}, box_prefix_is_needed=True)
+        for i, motor in enumerate(cluster):
+            motor.set_config({'norm_per_contr': 0.5 + i, 'null_position': 100.0 * i, 'displ_null': 10.0 * i,
+                              'displ_per_contr': 2.0 + i, 'inversion': i % 2 == 1})
+            motor.soft_limits = (100, None) if i != 2 else (None, 400)
+        # die Motoren sind Ansichten auf die Tabelle des Clusters
+        motor = cluster.get_motor('box1|Motor1.1')
+        self.assertIs(cluster.state, motor.state_table)
+        self.assertEqual(200.0, cluster.state.columns['null_position'][motor.state_row])
+        self.assertEqual((None, 400), motor.soft_limits)
+
+        names = list(cluster.names())
+        path = np.array([[10.0, 300.0, 500.0, -20.0, 1e6], [0.0, 1.0, 2.0, 3.0, 4.0]])
+        units = ['norm', 'displ', 'displ_centr', 'contr']
+        for current_u in units:
+            for to in units:
+                for rel in (False, True):
+                    expected = [[cluster.get_motor(name).transform_units(value, current_u, to, rel)
+                                 for name, value in zip(names, point)] for point in path]
+                    np.testing.assert_allclose(expected, cluster.transform_units(path, current_u, to, rel))
+        # der Cluster der Box liest die Zeilen, die jetzt in der Tabelle des BoxesCluster liegen
+        np.testing.assert_allclose([150, 1.5 * (1000 - 100)],
+                                   box1.motors_cluster.transform_units([300, 1000], 'contr', 'norm',
+                                                                       names=['Motor0.1', 'Motor0.2']))
+
+        self.assertEqual([[True, False, True, False, False], [True, True, False, True, True]],
+                         cluster.out_of_soft_limits([[50, 150, 500, 100, 100], [0, 0, 0, 0, 0]]).tolist())
+
+        for motor in cluster:
+            motor.set_position(123, 'norm')
+        for name, position in cluster.positions('displ').items():
+            self.assertAlmostEqual(cluster.get_motor(name).position('displ'), position)
+
+        # die Zeilen in den bisherigen Tabellen werden beim Umzug freigegeben und wiederverwendet
+        self.assertEqual(0, len(box1.motors_cluster.state))
+        self.assertEqual(5, len(cluster.state))
+        other = MotorsCluster([cluster.get_motor('box2|Motor0.1')])
+        self.assertEqual(4, len(cluster.state))
+        row = other.get_motor('box2|Motor0.1').state_row
+        cluster.state.adopt([other.get_motor('box2|Motor0.1')])
+        self.assertEqual(0, len(other.state))
+        self.assertEqual(row, other.state.add_row(cluster.state.row_values(0)))
+
+        # eine Änderung betrifft nur die Zeile ihres Motors
+        versions = [cluster.state.row_version(motor.state_row) for motor in cluster]
+        cluster.get_motor('box1|Motor1.1').config['null_position'] = 0.0
+        self.assertEqual(1, sum(cluster.state.row_version(motor.state_row) != version
+                                for motor, version in zip(cluster, versions)))
+
     def test_read_path_from_file(self):
         box_emulator1 = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=False)
         box_emulator2 = MCC2BoxEmulator(n_bus=2, n_axes=1, realtime=False)
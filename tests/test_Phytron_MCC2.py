@@ -1,4 +1,5 @@
-from unittest import TestCase, main
+import time
+from unittest import TestCase, IsolatedAsyncioTestCase, main
 import timeout_decorator
 
 from motor_controller.Phytron_MCC2 import *
@@ -313,6 +314,36 @@ class TestMCC2BoxEmulator(TestCase):
                                  f'Fehler beim Motor ({bus},{axis})')
 
 
+class SlowBusEmulator(MCC2BoxEmulator):
+    """Der Controller am Bus 1 antwortet erst nach delay Sekunden."""
+
+    delay = 0.03
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.late: List[Tuple[float, bytes]] = []  # (Zeitpunkt der Ankunft, Antwort)
+
+    def write(self, command: bytes):
+        super().write(command)
+        if command[1:2] == b'1':
+            self.late.append((time.monotonic() + self.delay, self.buffer))
+            self.buffer = b''
+
+    def read(self, size: int = 1) -> bytes:
+        if not self.buffer and self.late:
+            arrival, reply = self.late[0]
+            wait = arrival - time.monotonic()
+            if wait <= self.timeout:
+                time.sleep(max(wait, 0))
+                self.late.pop(0)
+                self.buffer += reply
+        return super().read(size)
+
+    def flushInput(self):
+        self.late = [(arrival, reply) for arrival, reply in self.late if arrival > time.monotonic()]
+        super().flushInput()
+
+
 class TestMCC2Communicator(TestCase):
     def test_read_reply(self):
         emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
@@ -373,6 +404,41 @@ class TestMCC2Communicator(TestCase):
         communicator.command_to_motor(b'World', 13, 8)
         self.assertEqual(b'\x02d8World\x03', emulator.last_command)
 
+    def test_execute_many(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+        communicator = MCC2Communicator(connector)
+
+        writes = []
+        write = emulator.write
+        emulator.write = lambda data: (writes.append(data), write(data))
+
+        communicator.command_to_motor(b'P14S500', 1, 2)
+        writes.clear()
+        replies = communicator.execute_many([(b'P14R', 1, 2), (b'=H', 0, 1), (b'IVR', 1, None)])
+        self.assertEqual(1, len(writes))
+        self.assertEqual((True, b'500.0'), replies[0])
+        self.assertEqual((True, b'E'), replies[1])
+        self.assertTrue(replies[2][0])
+
+    def test_motors_stand(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+        communicator = MCC2Communicator(connector)
+
+        emulator.go_to(1000, 1, 2)
+        self.assertEqual([True, False, True], communicator.motors_stand([(0, 1), (1, 2), (1, 1)]))
+        emulator.stop(1, 2)
+
+    def test_get_positions(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+        communicator = MCC2Communicator(connector)
+
+        emulator.set_position(12, 0, 1)
+        emulator.set_position(-7, 1, 2)
+        self.assertEqual([-7, 12, 0], communicator.get_positions([(1, 2), (0, 1), (1, 1)]))
+
     def test_command_without_reply(self):
         emulator = MCC2BoxEmulator(n_bus=2, n_axes=2)
         connector = SerialConnector(emulator=emulator)
@@ -484,6 +550,47 @@ class TestMCC2Communicator(TestCase):
 
         self.assertEqual({1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 13, 14}, set(communicator.bus_list()))
 
+    def test_fast_bus_discovery(self):
+        emulator = MCC2BoxEmulator(n_bus=2, n_axes=2, realtime=True)
+        emulator.timeout = 0.2  # ein fehlender Controller kostet das volle Time-out
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+
+        start = time.monotonic()
+        box = Box(MCC2Communicator(connector))
+        self.assertLess(time.monotonic() - start, 0.2)
+        self.assertEqual([0, 1], box.controllers_list())
+        self.assertEqual(0.2, connector.get_timeout())
+
+        # eine Lücke macht die nächste Antwort unsicher, sie wird mit vollem Time-out bestätigt
+        del emulator.controller[1]
+        emulator.controller[2] = MCC2ControllerEmulator(emulator, 2)
+        self.assertEqual((0, 2), MCC2Communicator(connector).bus_list())
+
+        # die bekannten Bus-Nummern werden nur bestätigt
+        communicator = MCC2Communicator(connector, known_buses=[0, 2])
+        start = time.monotonic()
+        self.assertEqual((0, 2), communicator.bus_list())
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(b'\x022IVR\x03', emulator.last_command)
+        self.assertEqual((True, b'MCC2 Emulator v1.0'), communicator.check_connection())
+        self.assertEqual(b'\x020IVR\x03', emulator.last_command)
+
+        # passt die Angabe nicht, wird neu gesucht
+        communicator = MCC2Communicator(connector, known_buses=[0, 1, 2])
+        self.assertEqual((0, 2), communicator.bus_list())
+
+    def test_slow_bus_discovery(self):
+        emulator = SlowBusEmulator(n_bus=4, n_axes=1, realtime=True)
+        emulator.timeout = 0.2
+        connector = SerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', emulator=emulator)
+        # die verspätete Antwort von Bus 1 darf keinen Controller vortäuschen
+        self.assertEqual((0, 1, 2, 3), MCC2Communicator(connector).bus_list())
+
+    def test_suspect_buses(self):
+        self.assertEqual([], MCC2Protocol._suspect_buses([True, True, False, False]))
+        self.assertEqual([1, 2, 3], MCC2Protocol._suspect_buses([True, False, True, True, False]))
+        self.assertEqual([0, 1, 2, 3, 4], MCC2Protocol._suspect_buses([False, False, True, False, True, False]))
+
     def test_axes_list(self):
         emulator = MCC2BoxEmulator(n_bus=2, n_axes=5)
         connector = SerialConnector(emulator=emulator)
@@ -634,5 +741,54 @@ class TestMCC2Communicator(TestCase):
         self.assertEqual(b'\x02e3=I+\x03', emulator.last_command)
 
 
+
+class TestAsyncMCC2Communicator(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.emulator = MCC2BoxEmulator(n_bus=3, n_axes=2)
+        connector = AsyncSerialConnector(beg_symbol=b'\x02', end_symbol=b'\x03', timeout=0.01,
+                                         emulator=self.emulator)
+        self.communicator = AsyncMCC2Communicator(connector)
+
+    async def test_go_to_get_position(self):
+        await self.communicator.go_to(234, 1, 2)
+        self.assertEqual(b'\x0212A234\x03', self.emulator.last_command)
+        self.assertTrue(await self.communicator.motor_stand(1, 2))
+        self.assertEqual(234, await self.communicator.get_position(1, 2))
+
+    async def test_bus_list(self):
+        del self.emulator.controller[1]
+        self.assertEqual((0, 2), await self.communicator.bus_list())
+        self.assertEqual((1, 2), await self.communicator.axes_list(2))
+
+    async def test_known_buses(self):
+        self.communicator.known_buses = (0, 2)
+        self.assertEqual((0, 2), await self.communicator.bus_list())
+        self.assertEqual(b'\x022IVR\x03', self.emulator.last_command)
+        self.communicator.known_buses = (3,)
+        self.assertEqual((0, 1, 2), await self.communicator.bus_list())
+        self.assertEqual(0.01, self.communicator.connector.get_timeout())
+
+    async def test_parameter(self):
+        await self.communicator.set_parameter('Lauffrequenz', 500, 2, 1)
+        self.assertEqual(500, await self.communicator.get_parameter('Lauffrequenz', 2, 1))
+        with self.assertRaises(ValueError):
+            await self.communicator.get_parameter('Unsinn', 2, 1)
+
+    async def test_concurrent_commands(self):
+        self.emulator.controller[0].motor[1].set_position(10)
+        self.emulator.controller[2].motor[2].set_position(20)
+        positions = await asyncio.gather(self.communicator.get_position(0, 1),
+                                         self.communicator.get_position(2, 2),
+                                         self.communicator.motor_stand(0, 1))
+        self.assertEqual([10, 20, True], positions)
+
+    async def test_execute_many(self):
+        replies = await self.communicator.execute_many([(b'P14S500', 1, 2), (b'P14R', 1, 2), (b'=H', 0, 1)])
+        self.assertEqual([(True, b''), (True, b'500.0'), (True, b'E')], replies)
+
+    async def test_no_reply(self):
+        with self.assertRaises(NoReplyError):
+            await self.communicator.go_to(10, 5, 1)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,81 @@
+import threading
+from time import sleep
+from unittest import TestCase, main
+
+from motor_controller.interface import SerialConnector, StatusPoller, Box, ConnectError
+from motor_controller.SmarAct_MCS import *
+
+
+class TestMCSCommunicator(TestCase):
+    def make_communicator(self, asynchronous: bool) -> MCSCommunicator:
+        self.emulator = MCSEmulator(n_channels=3)
+        connector = SerialConnector(beg_symbol=b':', end_symbol=b'\n', emulator=self.emulator)
+        communicator = MCSCommunicator(connector, asynchronous)
+        self.addCleanup(communicator.close)
+        return communicator
+
+    def test_sync_mode(self):
+        communicator = self.make_communicator(False)
+        self.assertFalse(self.emulator.asynchronous)
+        self.assertIsInstance(communicator.status_poller(), StatusPoller)
+        self.assertEqual((0, 1, 2), communicator.axes_list(0))
+
+        communicator.go_to(5000, 0, 2)
+        self.assertTrue(communicator.status_poller().wait_stop([(0, 2)]))
+        self.assertEqual(5000, communicator.get_position(0, 2))
+
+    def test_async_mode(self):
+        communicator = self.make_communicator(True)
+        emulator = self.emulator
+        self.assertTrue(emulator.asynchronous)
+        self.assertEqual({0, 1, 2}, emulator.report_on_complete)
+        watcher = communicator.status_poller()
+        self.assertIsInstance(watcher, MCSCompletionWatcher)
+
+        communicator.set_parameter('max move Speed', 10**7, 0, 1)
+        communicator.go_to(10**6, 0, 1)
+        commands = emulator.commands_received
+        future = watcher.watch(0, 1)
+        # die Leitung bleibt während der Bewegung frei
+        self.assertLess(communicator.get_position(0, 1), 10**6)
+        self.assertTrue(future.result(timeout=1))
+        self.assertEqual(1, watcher.completions_received)
+        # eine Abfrage beim Anfang des Wartens, eine Positionsabfrage und eine nach der Meldung
+        self.assertEqual(3, emulator.commands_received - commands)
+        self.assertEqual(10**6, communicator.get_position(0, 1))
+
+        motor = Box(communicator).motors_cluster.get_motor('Motor0.1')
+        self.assertEqual((True, ''), motor.go_to(0, 'contr', True, True))
+
+    def test_async_stop(self):
+        communicator = self.make_communicator(True)
+        communicator.set_parameter('max move Speed', 10**6, 0, 0)
+        communicator.go(10**6, 0, 0)
+        future = communicator.status_poller().watch(0, 0)
+        sleep(0.02)
+        self.assertFalse(future.done())
+        communicator.stop(0, 0)
+        self.assertTrue(future.result(timeout=1))
+        self.assertTrue(communicator.motor_stand(0, 0))
+
+        with self.assertRaises(ControllerError):
+            communicator.command(b'UNSINN')
+        self.assertEqual(b'N3', communicator.command(b'GNC'))
+
+    def test_close(self):
+        communicator = self.make_communicator(True)
+        communicator.set_parameter('max move Speed', 10**6, 0, 1)
+        communicator.go_to(10**4, 0, 1)
+        self.assertTrue(communicator.status_poller().wait_stop([(0, 1)]))
+
+        communicator.go(10**6, 0, 0)
+        future = communicator.status_poller().watch(0, 0)
+        communicator.close()
+        # die Wartenden bekommen den Fehler, der Thread des Watchers wird beendet
+        with self.assertRaises(ConnectError):
+            future.result(timeout=1)
+        self.assertFalse(any(thread.name.startswith('MCSCompletionWatcher') for thread in threading.enumerate()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+import asyncio
+import socket
+import threading
+from time import sleep, monotonic
+from unittest import TestCase, IsolatedAsyncioTestCase, main
+
+from motor_controller.interface import StandardStopIndicator, TravelError
+from motor_controller.SmarAct_MCS2 import *
+
+
+class TestMCS2Emulator(TestCase):
+    def setUp(self):
+        self.emulator = MCS2Emulator(n_modules=2, n_channels=3)
+
+    def tearDown(self):
+        self.emulator.close()
+
+    def test_execute_line(self):
+        emulator = self.emulator
+        self.assertEqual('2', emulator.execute_line(':DEV:NOBM?'))
+        self.assertEqual('3', emulator.execute_line(':MOD1:NOMC?'))
+        self.assertIsNone(emulator.execute_line(':CHAN4:POS 1000'))
+        self.assertEqual('1000;0', emulator.execute_line(':CHAN4:POS?;:SYST:ERR:COUN?'))
+
+        self.assertEqual('1', emulator.execute_line(':CHAN4:UNSINN?;:SYST:ERR:COUN?'))
+        self.assertIn('UNSINN', emulator.execute_line(':SYST:ERR:NEXT?'))
+        self.assertEqual('0', emulator.execute_line(':SYST:ERR:COUN?'))
+
+    def test_move(self):
+        emulator = self.emulator
+        emulator.execute_line(':CHAN1:VEL 1000000000')
+        emulator.execute_line(':MOVE1 100000000')
+        self.assertEqual(1, int(emulator.execute_line(':CHAN1:STAT?')) & 1)
+        sleep(0.15)
+        self.assertEqual(0, int(emulator.execute_line(':CHAN1:STAT?')) & 1)
+        self.assertEqual('100000000', emulator.execute_line(':CHAN1:POS?'))
+
+        emulator.execute_line(':CHAN1:MMOD 1')
+        emulator.execute_line(':MOVE1 -50')
+        sleep(0.01)
+        self.assertEqual('99999950', emulator.execute_line(':CHAN1:POS?'))
+
+    def test_stream(self):
+        emulator = self.emulator
+        emulator.execute_line(':DEV:STR:BRAT 20')
+        emulator.execute_line(':STR:OPEN')
+        emulator.execute_line(':STR:FRAM 0,1000,5,-1000;:STR:FRAM 0,2000;:STR:FRAM 0,3000,5,-3000')
+        # der erste Punkt wird sofort abgefahren
+        self.assertEqual(str(emulator.stream_buffer_size - 2), emulator.execute_line(':STR:FREE?'))
+        self.assertEqual('1', emulator.execute_line(':STR:STAT?'))
+        emulator.execute_line(':STR:CLOS')
+        sleep(0.2)
+        self.assertEqual('0', emulator.execute_line(':STR:STAT?'))
+        self.assertEqual('3000;-3000', emulator.execute_line(':CHAN0:POS?;:CHAN5:POS?'))
+        self.assertEqual(0, emulator.stream_underruns)
+
+        # ohne :STR:OPEN werden keine Punkte angenommen
+        self.assertEqual('1', emulator.execute_line(':STR:FRAM 0,0;:SYST:ERR:COUN?'))
+
+    def test_events(self):
+        emulator = self.emulator
+        emulator.execute_line(':CHAN2:VEL 1000000000')
+        with socket.create_connection(('localhost', emulator.port), timeout=1) as sock:
+            sock.sendall(b':EVEN:NOT 1;:EVEN:NOT?\r\n')
+            self.assertEqual(b'1\r\n', sock.recv(100))
+            emulator.execute_line(':MOVE2 50000000')
+            emulator.execute_line(':MOVE2 20000000')  # das erste Ereignis entfällt
+            start = monotonic()
+            self.assertEqual(b'EVENT 2,1,0\r\n', sock.recv(100))
+            self.assertGreater(monotonic() - start, 0.01)
+            self.assertEqual('20000000', emulator.execute_line(':CHAN2:POS?'))
+            self.assertEqual(1, emulator.events_sent)
+        self.assertEqual('0', emulator.execute_line(':EVEN:NOT?'))
+
+
+class TestMCS2Communicator(TestCase):
+    def setUp(self):
+        self.emulator = MCS2Emulator(n_modules=2, n_channels=3)
+        self.communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.5))
+
+    def tearDown(self):
+        self.communicator.connector.close()
+        self.emulator.close()
+
+    def test_axes(self):
+        self.assertEqual((0, 1), self.communicator.bus_list())
+        self.assertEqual((0, 1, 2), self.communicator.axes_list(1))
+        with self.assertRaises(ValueError):
+            self.communicator.go(10, 1, 3)
+
+    def test_channel_table(self):
+        self.assertEqual({(0, 0): 0, (0, 1): 1, (2, 0): 2, (2, 1): 3, (2, 2): 4}, channel_table([2, 0, 3]))
+
+    def test_move_mode_cache(self):
+        communicator = self.communicator
+        emulator = self.emulator
+        communicator.set_position(0, 1, 1)
+
+        lines = emulator.lines_received
+        communicator.go(100, 1, 1)
+        communicator.go(100, 1, 1)
+        # :MMOD wird nur beim ersten Mal (in derselben Zeile wie :MOVE) geschickt
+        self.assertEqual(2, emulator.lines_received - lines)
+        self.assertEqual(1, emulator.channels[4].parameters['MMOD'])
+        sleep(0.01)
+        self.assertEqual(200, communicator.get_position(1, 1))
+
+        communicator.go_to(50, 1, 1)
+        self.assertEqual(0, emulator.channels[4].parameters['MMOD'])
+        sleep(0.01)
+        self.assertEqual(50, communicator.get_position(1, 1))
+
+        # nach einem Neustart des Controllers ist der Modus wieder absolut
+        communicator.go(10, 1, 1)
+        sleep(0.01)
+        emulator.channels[4].parameters['MMOD'] = 0
+        communicator.invalidate_topology()
+        communicator.go(10, 1, 1)
+        sleep(0.01)
+        self.assertEqual(70, communicator.get_position(1, 1))
+
+    def test_chained_error_check(self):
+        communicator = self.communicator
+        communicator.set_position(1234, 1, 2)
+        lines = self.emulator.lines_received
+        self.assertEqual(1234, communicator.get_position(1, 2))
+        # Befehl und Fehlerabfrage in einer Zeile
+        self.assertEqual(1, self.emulator.lines_received - lines)
+
+        with self.assertRaises(ControllerError):
+            communicator.command(b':UNSINN?', 1, 2)
+        with self.assertRaises(ControllerError):
+            communicator.command_without_reply(b':UNSINN 1', 1, 2)
+        # die Fehlerschlange ist danach leer
+        self.assertEqual(1234, communicator.get_position(1, 2))
+
+    def test_discarded_line(self):
+        self.emulator.discard_after_error = True
+        communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.05))
+        communicator.set_position(77, 0, 0)
+        with self.assertRaises(ControllerError):
+            communicator.command(b':UNSINN?', 0, 0)
+        self.assertEqual([], self.emulator.errors)
+
+        replies = communicator.execute_many([(b':POS?', 0, 0), (b':UNSINN?', 0, 1), (b':POS?', 0, 0),
+                                             (b':UNSINN 1', 0, 2)])
+        self.assertEqual([True, False, True, False], [success for success, _ in replies])
+        self.assertEqual(b'77', replies[2][1])
+        self.assertIn(b'UNSINN?', replies[1][1])
+        self.assertNotIn(b'UNSINN 1', replies[1][1])
+        communicator.connector.close()
+
+    def test_assign_chained_replies(self):
+        errors = [b'e1', b'e2']
+        self.assertEqual([(True, b'1'), (False, b'e1\ne2\n'), (True, b'3')],
+                         assign_chained_replies([(b'1', 0), (None, 2), (b'3', 2)], 3, errors))
+        # verworfene Zeilen ohne Antwort
+        self.assertEqual([(False, b'e1\n'), (True, b'2'), (False, b'e2\n')],
+                         assign_chained_replies([(b'2', 1)], 3, errors))
+        self.assertIsNone(assign_chained_replies([(b'2', 2)], 2, errors))
+
+    def test_always_error_check(self):
+        communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.05),
+                                        error_check='always')
+        lines = self.emulator.lines_received
+        self.assertEqual(0, communicator.get_position(0, 1))
+        self.assertEqual(3, self.emulator.lines_received - lines)
+        with self.assertRaises(ControllerError):
+            communicator.command(b':UNSINN?', 0, 1)
+
+        with self.assertRaises(ValueError):
+            MCS2Communicator(communicator.connector, error_check='nie')
+
+    def test_execute_many(self):
+        communicator = self.communicator
+        communicator.set_position(10, 0, 1)
+        replies = communicator.execute_many([(b':POS?', 0, 1), (b':MMOD 1', 0, 2), (b':NOMC?', 1, None)])
+        self.assertEqual([(True, b'10'), (True, None), (True, b'3')], replies)
+
+        replies = communicator.execute_many([(b':POS?', 0, 1), (b':UNSINN?', 0, 2), (b':POS?', 0, 1)])
+        self.assertEqual([(True, b'10'), (True, b'10')], [replies[0], replies[2]])
+        self.assertFalse(replies[1][0])
+        self.assertEqual([(True, b'10')], communicator.execute_many([(b':POS?', 0, 1)]))
+
+    def test_snapshot(self):
+        communicator = self.communicator
+        emulator = self.emulator
+        communicator.set_position(300, 0, 2)
+        emulator.channels[1].parameters['VEL'] = 10**9
+        communicator.go_to(10**8, 0, 1)
+
+        lines = emulator.lines_received
+        snapshot = communicator.snapshot()
+        self.assertEqual(1, emulator.lines_received - lines)
+        self.assertEqual(6, len(snapshot))
+        self.assertEqual(300, snapshot[(0, 2)].position)
+        self.assertFalse(snapshot[(0, 2)].moving)
+        self.assertTrue(snapshot[(0, 1)].moving)
+        self.assertEqual([False, True], communicator.motors_stand([(0, 1), (0, 2)]))
+        self.assertEqual([300], communicator.get_positions([(0, 2)]))
+
+        communicator.stop(0, 1)
+        emulator.channels[3].parameters['VEL'] = 10**14
+        communicator.go_to(2 * emulator.range_limit, 1, 0)
+        sleep(0.01)
+        snapshot = communicator.snapshot([(1, 0)])
+        self.assertEqual(emulator.range_limit, snapshot[(1, 0)].position)
+        self.assertTrue(snapshot[(1, 0)].end_stop_reached)
+        self.assertTrue(communicator.motor_at_the_beg(1, 0))
+
+    def test_cluster_positions(self):
+        cluster = Box(self.communicator).motors_cluster
+        self.communicator.set_position(1000, 1, 1)
+
+        lines = self.emulator.lines_received
+        positions = cluster.positions('contr')
+        self.assertTrue(cluster.all_motors_stand())
+        # eine Abfrage für die Positionen und eine für den Status aller Motoren
+        self.assertEqual(2, self.emulator.lines_received - lines)
+        self.assertEqual(1000, positions['Motor1.1'])
+        self.assertEqual({'Motor1.1': 1000, 'Motor0.0': 0}, cluster.positions('contr', ['Motor1.1', 'Motor0.0']))
+
+    def test_event_wait(self):
+        communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.5),
+                                        events=True)
+        emulator = self.emulator
+        watcher = communicator.status_poller()
+        self.assertIsInstance(watcher, MCS2EventWatcher)
+        self.assertTrue(watcher.wait_stop([(1, 1)]))
+        self.assertTrue(watcher.listening)
+
+        emulator.channels[1].parameters['VEL'] = 10**9
+        communicator.go_to(10**8, 0, 1)
+        lines = emulator.lines_received
+        self.assertTrue(watcher.wait_stop([(0, 1), (0, 2)]))
+        # eine Abfrage beim Anfang des Wartens und eine nach dem Ereignis, kein regelmäßiges Abfragen
+        self.assertEqual(2, emulator.lines_received - lines)
+        self.assertEqual(1, watcher.events_received)
+        self.assertEqual(10**8, communicator.get_position(0, 1))
+
+        motor = Box(communicator).motors_cluster.get_motor('Motor0.1')
+        self.assertEqual((True, ''), motor.go_to(0, 'contr', True))
+        self.assertEqual(0, communicator.get_position(0, 1))
+
+    def test_event_fallback(self):
+        # die Ereignisse werden nur auf Wunsch abonniert
+        self.assertIsInstance(self.communicator.status_poller(), StatusPoller)
+
+        communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.5),
+                                        events=True)
+        watcher = communicator.status_poller()
+        self.emulator.channels[1].parameters['VEL'] = 10**9
+        communicator.go_to(10**8, 0, 1)
+        future = watcher.watch(0, 1)
+        # nach dem Abbruch der Ereignisverbindung übernimmt der StatusPoller
+        watcher.close()
+        self.assertTrue(future.result(timeout=2))
+        self.assertFalse(watcher.listening)
+        self.assertEqual(10**8, communicator.get_position(0, 1))
+        self.assertTrue(watcher.wait_stop([(0, 1)]))
+
+        # bleibt die Antwort auf das Abonnement aus, wird nur so lange wie bei anderen Befehlen gewartet
+        execute_line = self.emulator.execute_line
+        self.emulator.execute_line = lambda line, subscriber=None: \
+            None if line.startswith(':EVEN') else execute_line(line, subscriber)
+        communicator = MCS2Communicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.05),
+                                        events=True)
+        start = monotonic()
+        self.assertTrue(communicator.status_poller().wait_stop([(0, 1)]))
+        self.assertLess(monotonic() - start, 0.5)
+        self.assertFalse(communicator.status_poller().listening)
+        communicator.connector.close()
+
+    def test_stream_path(self):
+        emulator = self.emulator
+        emulator.stream_buffer_size = 64
+        cluster = Box(self.communicator).motors_cluster
+        path = [{'Motor0.0': 1000 * i, 'Motor1.2': -500 * i} for i in range(400)]
+
+        lines = emulator.lines_received
+        start = monotonic()
+        self.assertTrue(cluster.stream_path(path, 'contr', rate=2000))
+        # den Takt gibt der Controller vor, nicht die Round-Trips
+        self.assertGreaterEqual(monotonic() - start, 0.2)
+        self.assertLess(emulator.lines_received - lines, 100)
+        self.assertEqual(0, emulator.stream_underruns)
+        self.assertEqual({'Motor0.0': 399000, 'Motor1.2': -199500},
+                         cluster.positions('contr', ['Motor0.0', 'Motor1.2']))
+        self.assertTrue(cluster.all_motors_stand())
+
+        # Stop während der Trajektorie
+        stop_indicator = StandardStopIndicator()
+        threading.Timer(0.05, stop_indicator.stop).start()
+        self.assertFalse(cluster.stream_path([{'Motor0.0': -1000 * i} for i in range(400)], 'contr', 1000,
+                                             stop_indicator))
+        self.assertEqual('0', emulator.execute_line(':STR:STAT?'))
+        self.assertGreater(self.communicator.get_position(0, 0), -400000)
+
+        # Punkte außerhalb der Soft Limits werden vor dem Start abgelehnt
+        cluster.get_motor('Motor0.0').soft_limits_einstellen((None, 5000), 'contr')
+        lines = emulator.lines_received
+        with self.assertRaises(TravelError):
+            cluster.stream_path([{'Motor0.0': 1000}, {'Motor0.0': 6000}], 'contr')
+        self.assertEqual(lines, emulator.lines_received)
+
+    def test_stream_garbled_reply(self):
+        class GarbledCommunicator(MCS2Communicator):
+            def command(self, command: bytes, bus: int = None, axis: int = None):
+                reply = super().command(command, bus, axis)
+                return b'Unsinn' if command.startswith(b':STR:FRAM') else reply
+
+        communicator = GarbledCommunicator(MCS2_EthernetConnector('localhost', self.emulator.port, timeout=0.5),
+                                           events=False)
+        with self.assertRaises(ReplyError):
+            communicator.stream_trajectory([{(0, 0): 1000 * i} for i in range(100)], rate=1000)
+        # die Trajektorie wurde abgebrochen
+        self.assertEqual('0', self.emulator.execute_line(':STR:STAT?'))
+        communicator.connector.close()
+
+    def test_transaction(self):
+        communicator = self.communicator
+        lines = self.emulator.lines_received
+        with communicator.transaction():
+            communicator.set_position(500, 0, 0)
+            self.assertEqual(500, communicator.get_position(0, 0))
+        # zwei Befehle und eine Fehlerabfrage am Ende
+        self.assertEqual(3, self.emulator.lines_received - lines)
+
+        with self.assertRaises(ControllerError):
+            with communicator.transaction():
+                communicator.command_without_reply(b':UNSINN 1', 0, 0)
+                communicator.set_position(700, 0, 0)
+        self.assertEqual(700, communicator.get_position(0, 0))
+
+
+class TestAsyncMCS2Communicator(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.emulator = MCS2Emulator(n_modules=2, n_channels=3)
+        self.communicator = AsyncMCS2Communicator(
+            MCS2_AsyncEthernetConnector('localhost', self.emulator.port, timeout=0.5))
+
+    async def asyncTearDown(self):
+        await self.communicator.connector.close()
+        self.emulator.close()
+
+    async def test_chained_error_check(self):
+        communicator = self.communicator
+        await communicator.set_position(1234, 1, 2)
+        lines = self.emulator.lines_received
+        self.assertEqual(1234, await communicator.get_position(1, 2))
+        self.assertEqual(1, self.emulator.lines_received - lines)
+        with self.assertRaises(ControllerError):
+            await communicator.command(b':UNSINN?', 1, 2)
+
+        self.emulator.discard_after_error = True
+        replies = await communicator.execute_many([(b':UNSINN?', 1, 2), (b':POS?', 1, 2)])
+        self.assertEqual([False, True], [success for success, _ in replies])
+        with self.assertRaises(ControllerError):
+            await communicator.command(b':UNSINN?', 1, 2)
+
+    async def test_move_mode_cache(self):
+        communicator = self.communicator
+        await communicator.set_position(1000, 1, 0)
+        await communicator.go(10, 1, 0)
+        await asyncio.sleep(0.01)
+        self.emulator.channels[3].parameters['MMOD'] = 0
+        communicator.invalidate_topology()
+        await communicator.go(10, 1, 0)
+        await asyncio.sleep(0.01)
+        self.assertEqual(1020, await communicator.get_position(1, 0))
+
+    async def test_snapshot(self):
+        communicator = self.communicator
+        await communicator.set_position(-20, 1, 1)
+        snapshot = await communicator.snapshot()
+        self.assertEqual(ChannelState(-20, 0x20), snapshot[(1, 1)])
+        self.assertEqual([-20, 0], await communicator.get_positions([(1, 1), (0, 0)]))
+        self.assertEqual([True], await communicator.motors_stand([(1, 1)]))
+
+    async def test_transaction(self):
+        communicator = self.communicator
+        async with communicator.transaction():
+            await communicator.set_position(500, 0, 0)
+            self.assertEqual(500, await communicator.get_position(0, 0))
+        with self.assertRaises(ControllerError):
+            async with communicator.transaction():
+                await communicator.command_without_reply(b':UNSINN 1', 0, 0)
+
+
+if __name__ == '__main__':
+    main()